@@ -0,0 +1,205 @@
+import contextlib
+import io
+import re
+import sys
+import time
+
+import fitz
+
+from benchmark_extracao import PASTA_PADRAO, listar_pdfs
+from gerenciador_de_tarefas import (COLUNAS_TAREFA, STATUS_CLOSED, STATUS_OPEN,
+                                    STATUS_POSTPONED, STATUS_REPLANEJADO,
+                                    STATUS_RETIRADA, STATUS_WAIT_APPROVAL,
+                                    _linhas_validadas, _tabelas_das_paginas)
+
+# --- Repetições do corpus no microbenchmark ---
+REPETICOES = 20
+
+
+def _linhas_validadas_legado(tabelas):
+    """Laço original de validação das linhas (antes do classificador), usado como referência."""
+    validated_rows = []
+    VALID_GROUPS = {"Planned", "Internal Procedure", "Customer Request"}
+    ALL_STATUSES = {STATUS_OPEN, STATUS_CLOSED, STATUS_WAIT_APPROVAL,
+                    STATUS_POSTPONED, STATUS_REPLANEJADO, STATUS_RETIRADA}
+    header_signature = ['SEQ', 'GROUP', 'DESCRIPTION']
+
+    for raw_table_data in tabelas:
+        for row in raw_table_data:
+            if any(sig in str(cell) for sig, cell in zip(header_signature, row)):
+                continue
+
+            # --- LÓGICA DE EXTRAÇÃO REVISADA E MAIS ROBUSTA ---
+            id_val = str(row[0] or '').strip() if len(row) > 0 else ''
+            seq_val_c = str(row[1] or '').strip() if len(row) > 1 else ''
+            is_critical_issue = id_val.isdigit() and seq_val_c.isdigit()
+
+            seq_val_n = str(row[1] or '').strip() if len(row) > 1 else ''
+            is_task_normal = seq_val_n.isdigit()
+
+            seq_val_s = str(row[0] or '').strip() if len(row) > 0 else ''
+            is_task_shifted = seq_val_s.isdigit()
+
+            if is_critical_issue:
+                description = str(row[2] or '').strip() if len(
+                    row) > 2 else ''
+                status = str(row[3] or '').strip() if len(
+                    row) > 3 else STATUS_OPEN
+
+                if status not in ALL_STATUSES and len(status) > 20:
+                    description = (description + ' ' + status).strip()
+                    status = STATUS_OPEN
+                elif status not in ALL_STATUSES:
+                    status = STATUS_OPEN
+
+                normalized_row = [None, seq_val_c, 'Finding',
+                                  description, status, id_val, None]
+                validated_rows.append(normalized_row)
+
+            elif is_task_normal:
+                group_val = str(row[2] or '').strip() if len(
+                    row) > 2 else ''
+                if group_val in VALID_GROUPS:
+                    validated_rows.append(list(row))
+                else:
+                    seq = seq_val_n
+                    phase = row[0]
+                    content_cells = row[2:]
+                    full_text = ' '.join(str(c or '').strip()
+                                         for c in content_cells if c).strip()
+                    group, description, status, external_task = "Finding", full_text, STATUS_OPEN, None
+
+                    if description.startswith("SB/ADs"):
+                        group = "SB/ADs"
+                        description = description.replace(
+                            "SB/ADs", "", 1).strip()
+                    elif description.startswith("Customer Report"):
+                        group = "Customer Report"
+                        description = description.replace(
+                            "Customer Report", "", 1).strip()
+
+                    temp_desc = description
+                    for s in ALL_STATUSES:
+                        if f" {s} " in f" {temp_desc} " or temp_desc.endswith(f" {s}"):
+                            parts = temp_desc.rsplit(s, 1)
+                            description = parts[0].strip()
+                            status = s
+                            potential_et = parts[1].strip()
+                            if potential_et:
+                                external_task = potential_et
+                            break
+
+                    if not external_task and group == "SB/ADs":
+                        match = re.search(
+                            r"(AD\s?\(ANAC\)\s?\d{4}-\d{2}-\d{2})", description)
+                        if match:
+                            external_task = match.group(1).strip()
+
+                    validated_rows.append(
+                        [phase, seq, group, description, status, external_task, None])
+
+            elif is_task_shifted and not is_critical_issue:
+                group_val = str(row[1] or '').strip() if len(
+                    row) > 1 else ''
+                if group_val in VALID_GROUPS:
+                    validated_rows.append([None] + list(row))
+                else:
+                    seq = seq_val_s
+                    content_cells = row[1:]
+                    full_text = ' '.join(str(c or '').strip()
+                                         for c in content_cells if c).strip()
+                    group, description, status, external_task = "Finding", full_text, STATUS_OPEN, None
+
+                    if description.startswith("SB/ADs"):
+                        group = "SB/ADs"
+                        description = description.replace(
+                            "SB/ADs", "", 1).strip()
+                    elif description.startswith("Customer Report"):
+                        group = "Customer Report"
+                        description = description.replace(
+                            "Customer Report", "", 1).strip()
+
+                    temp_desc = description
+                    for s in ALL_STATUSES:
+                        if f" {s} " in f" {temp_desc} " or temp_desc.endswith(f" {s}"):
+                            parts = temp_desc.rsplit(s, 1)
+                            description = parts[0].strip()
+                            status = s
+                            potential_et = parts[1].strip()
+                            if potential_et:
+                                external_task = potential_et
+                            break
+
+                    validated_rows.append(
+                        [None, seq, group, description, status, external_task, None])
+
+            elif validated_rows:
+                continuation_text = ' '.join(str(c or '').replace(
+                    '\n', ' ').strip() for c in row if c is not None and str(c).strip())
+                is_new_task_code = re.match(
+                    r"^\d{2}-\d{2}-\d{2}-\d{3}", continuation_text.strip())
+                is_header_text = 'PHASE SEQ GROUP' in continuation_text
+
+                if is_new_task_code or is_header_text:
+                    print(
+                        f"AVISO: Linha ignorada para evitar corrupção da tarefa anterior. Conteúdo: '{continuation_text[:100]}...'")
+                    continue
+
+                if continuation_text:
+                    while len(validated_rows[-1]) <= 3:
+                        validated_rows[-1].append('')
+                    current_description = validated_rows[-1][3]
+                    validated_rows[-1][3] = (str(current_description or '') +
+                                             ' ' + continuation_text).strip()
+    return [r for r in map(_normalizar_registo_legado, validated_rows) if r is not None]
+
+
+def _normalizar_registo_legado(linha):
+    """Normalização original dos registos (re.sub por célula)."""
+    linha = list(linha[:len(COLUNAS_TAREFA)])
+    linha += [None] * (len(COLUNAS_TAREFA) - len(linha))
+    registo = {}
+    for coluna, valor in zip(COLUNAS_TAREFA, linha):
+        texto = re.sub(r'\s+', ' ', str(valor)).strip()
+        registo[coluna] = '' if texto == 'nan' else texto
+    try:
+        registo['SEQ'] = int(registo['SEQ'])
+    except ValueError:
+        return None
+    return registo
+
+
+def registos_novos(tabelas):
+    return list(_linhas_validadas(tabelas))
+
+
+def tabelas_do_corpus(pasta):
+    """Tabelas brutas de todas as páginas dos relatórios de `pasta`."""
+    tabelas = []
+    for arquivo in listar_pdfs(pasta):
+        with fitz.open(arquivo) as doc:
+            tabelas.extend(_tabelas_das_paginas(doc))
+    return tabelas
+
+
+def cronometrar(funcao, tabelas):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcao(tabelas)
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    pasta = sys.argv[1] if len(sys.argv) > 1 else PASTA_PADRAO
+
+    tabelas = tabelas_do_corpus(pasta)
+    linhas = sum(len(t) for t in tabelas)
+    print(f"📄 {len(tabelas)} tabelas, {linhas} linhas\n")
+
+    corpus = tabelas * REPETICOES
+    segundos = cronometrar(registos_novos, corpus)
+    segundos_legado = cronometrar(_linhas_validadas_legado, corpus)
+    total = linhas * REPETICOES
+    print(f"{'versão':<14} {'linhas':>8} {'tempo (s)':>10} {'µs/linha':>9}")
+    print(f"{'classificador':<14} {total:>8} {segundos:>10.3f} {segundos / total * 1e6:>9.2f}")
+    print(f"{'legado':<14} {total:>8} {segundos_legado:>10.3f} {segundos_legado / total * 1e6:>9.2f}")
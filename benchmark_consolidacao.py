@@ -0,0 +1,118 @@
+import contextlib
+import io
+import sys
+import time
+
+import fitz
+import numpy as np
+import pandas as pd
+
+from benchmark_extracao import PASTA_PADRAO, listar_pdfs
+from diagnostico_seq53 import consolidar_por_grupo_e_seq
+from gerenciador_de_tarefas import (COLUNAS_TAREFA, _linhas_validadas,
+                                    _tabelas_das_paginas, consolidar_tarefas)
+
+# --- Tamanho do cenário sintético: (SEQs, máximo de linhas por SEQ) ---
+CENARIO_SINTETICO = (50_000, 4)
+GRUPOS_SINTETICOS = ['Planned', 'SB/ADs', 'Customer Report', 'Finding',
+                     'Internal Procedure']
+DESCRICOES_SINTETICAS = ['', 'ENGINE CHECK', 'ENGINE CHECK AND REPORT', 'APU',
+                         'PHASE SEQ GROUP ENGINE', 'Assunto escalado para o Contact Center',
+                         'MATERIAL SEM PRAZO DE ENTREGA', 'WING INSPECTION', 'WHEEL']
+
+
+def _consolidar_legado(df_final):
+    """
+    Consolidação original do gerenciador (groupby com funções Python por
+    grupo); referência de tempo aqui e de resultado em tests/test_consolidacao.py.
+    """
+    def prioritize_group(series):
+        if 'Customer Report' in series.values:
+            return 'Customer Report'
+        if 'SB/ADs' in series.values:
+            return 'SB/ADs'
+        if 'Planned' in series.values:
+            return 'Planned'
+        return series.iloc[0]
+
+    def prioritize_description(series):
+        descriptions = pd.Series(series).str.strip().dropna().unique()
+        descriptions = [d for d in descriptions if d]
+        if not descriptions:
+            return ""
+        clean_descriptions = [
+            d for d in descriptions if 'PHASE SEQ GROUP' not in d and 'Assunto escalado' not in d and 'MATERIAL SEM PRAZO' not in d]
+        if clean_descriptions:
+            return min(clean_descriptions, key=len)
+        return max(descriptions, key=len)
+
+    agg_dict = {'PHASE': 'first', 'GROUP': prioritize_group, 'DESCRIPTION': prioritize_description,
+                'STATUS': 'first', 'EXTERNAL TASK': 'first', 'ORIG': 'first'}
+    df_final = df_final.groupby('SEQ', as_index=False).agg(agg_dict)
+    return df_final.reindex(columns=COLUNAS_TAREFA)
+
+
+def _consolidar_diagnostico_legado(df_final):
+    """Consolidação original do diagnostico_seq53 (lambda com unique por grupo)."""
+    original_cols = df_final.columns.tolist()
+    agg_funcs = {col: 'first' for col in df_final.columns if col not in ['GROUP', 'SEQ']}
+    agg_funcs['DESCRIPTION'] = lambda x: ' '.join(x.dropna().unique())
+    df_final = df_final.groupby(['GROUP', 'SEQ'], as_index=False).agg(agg_funcs)
+    return df_final.reindex(columns=original_cols)
+
+
+# --- Pares (nova, original) comparados ---
+CONSOLIDACOES = [
+    ('gerenciador', consolidar_tarefas, _consolidar_legado),
+    ('diagnostico', consolidar_por_grupo_e_seq, _consolidar_diagnostico_legado),
+]
+
+
+def registos_do_corpus(pasta):
+    """Um DataFrame de registos por consolidar para cada relatório de `pasta`."""
+    frames = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for arquivo in listar_pdfs(pasta):
+            with fitz.open(arquivo) as doc:
+                registos = list(_linhas_validadas(_tabelas_das_paginas(doc)))
+            frames.append(pd.DataFrame.from_records(
+                registos, columns=COLUNAS_TAREFA))
+    return frames
+
+
+def registos_sinteticos(num_seqs, max_linhas, seed=0):
+    """Registos com vários grupos e descrições (vazias, sujas, repetidas) por SEQ."""
+    rng = np.random.default_rng(seed)
+    repeticoes = rng.integers(1, max_linhas + 1, size=num_seqs)
+    seqs = np.repeat(np.arange(num_seqs), repeticoes)
+    rng.shuffle(seqs)
+    n = len(seqs)
+    return pd.DataFrame({
+        'PHASE': rng.choice(['', 'TO BE DEFINED'], size=n),
+        'SEQ': seqs,
+        'GROUP': rng.choice(GRUPOS_SINTETICOS, size=n),
+        'DESCRIPTION': rng.choice(DESCRICOES_SINTETICAS, size=n),
+        'STATUS': rng.choice(['OPEN', 'CLOSED', ''], size=n),
+        'EXTERNAL TASK': '',
+        'ORIG': '',
+    })
+
+
+def cronometrar(funcao, df):
+    inicio = time.perf_counter()
+    resultado = funcao(df)
+    return resultado, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    pasta = sys.argv[1] if len(sys.argv) > 1 else PASTA_PADRAO
+
+    frames = registos_do_corpus(pasta)
+    df_corpus = pd.concat(frames, ignore_index=True)
+    df_sintetico = registos_sinteticos(*CENARIO_SINTETICO)
+    print(f"{'consolidação':<13} {'cenário':<10} {'linhas':>8} {'nova (s)':>9} {'original (s)':>13}")
+    for nome, nova, legado in CONSOLIDACOES:
+        for cenario, df in (('corpus', df_corpus), ('sintético', df_sintetico)):
+            _, segundos = cronometrar(nova, df)
+            _, segundos_legado = cronometrar(legado, df)
+            print(f"{nome:<13} {cenario:<10} {len(df):>8} {segundos:>9.3f} {segundos_legado:>13.3f}")
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Extratores medidos: nome -> (módulo, função) ---
+EXTRATORES = {
+    'pymupdf': ('gerenciador_de_tarefas', 'extrair_dados_pdf_pymupdf'),
+    'pdfplumber': ('dashboardcustomer', 'extrair_dados_pdf_versao_final'),
+    'pre_processamento': ('processador_final', 'extrair_dados_com_pre_processamento'),
+}
+PASTA_PADRAO = 'Relatorios_PDF'
+
+
+def listar_pdfs(pasta):
+    return sorted(os.path.join(pasta, f) for f in os.listdir(pasta)
+                  if f.lower().endswith('.pdf'))
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo atual, em MB (None no Windows)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux devolve KB; macOS devolve bytes
+    return pico / 1024 / 1024 if sys.platform == 'darwin' else pico / 1024
+
+
+@contextlib.contextmanager
+def contar_aberturas():
+    """Conta as chamadas a fitz.open e pdfplumber.open dentro do bloco."""
+    import fitz
+    import pdfplumber
+    contagem = {'fitz': 0, 'pdfplumber': 0}
+    originais = {'fitz': fitz.open, 'pdfplumber': pdfplumber.open}
+
+    def envolver(nome, funcao):
+        def aberto(*args, **kwargs):
+            contagem[nome] += 1
+            return funcao(*args, **kwargs)
+        return aberto
+
+    fitz.open = envolver('fitz', originais['fitz'])
+    pdfplumber.open = envolver('pdfplumber', originais['pdfplumber'])
+    try:
+        yield contagem
+    finally:
+        fitz.open = originais['fitz']
+        pdfplumber.open = originais['pdfplumber']
+
+
+def medir_extrator(nome, arquivos):
+    """Corre um extrator sobre `arquivos` no processo atual e devolve as métricas."""
+    modulo, funcao = EXTRATORES[nome]
+    extrair = getattr(__import__(modulo), funcao)
+
+    latencias = []
+    linhas = 0
+    falhas = 0
+    with contar_aberturas() as aberturas:
+        for arquivo in arquivos:
+            inicio = time.perf_counter()
+            # Silencia os prints informativos dos extratores
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    _, df = extrair(arquivo)
+                    linhas += len(df)
+                except Exception:
+                    falhas += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    segundos = sum(latencias)
+    return {
+        'extrator': nome,
+        'arquivos': len(arquivos),
+        'linhas': linhas,
+        'falhas': falhas,
+        'segundos': segundos,
+        'linhas_por_segundo': linhas / segundos if segundos else None,
+        'aberturas_por_arquivo': {k: v / len(arquivos) for k, v in aberturas.items()},
+        'latencia_media_ms': 1000 * sum(latencias) / len(latencias),
+        'latencia_max_ms': 1000 * max(latencias),
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def medir_em_subprocesso(nome, pasta):
+    """Mede um extrator num processo novo, para que o pico de RSS seja só dele."""
+    resultado = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--medir', nome, pasta],
+        capture_output=True, text=True, check=True)
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--medir':
+        print(json.dumps(medir_extrator(sys.argv[2], listar_pdfs(sys.argv[3]))))
+        sys.exit()
+
+    pasta = sys.argv[1] if len(sys.argv) > 1 else PASTA_PADRAO
+    print(f"📊 Extração de {len(listar_pdfs(pasta))} PDFs em '{pasta}'\n")
+    print(f"{'extrator':<18} {'aberturas/PDF':>14} {'ms/PDF':>9} {'pico RSS (MB)':>14} {'falhas':>7}")
+    for nome in EXTRATORES:
+        r = medir_em_subprocesso(nome, pasta)
+        aberturas = sum(r['aberturas_por_arquivo'].values())
+        rss = f"{r['pico_rss_mb']:.1f}" if r['pico_rss_mb'] is not None else '-'
+        print(f"{nome:<18} {aberturas:>14.1f} {r['latencia_media_ms']:>9.1f} "
+              f"{rss:>14} {r['falhas']:>7}")
@@ -0,0 +1,142 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from gerenciador_de_tarefas import (STATUS_CLOSED, STATUS_OPEN, STATUS_POSTPONED,
+                                    STATUS_REPLANEJADO, STATUS_RETIRADA,
+                                    STATUS_WAIT_APPROVAL,
+                                    mesclar_relatorio_no_mestre)
+
+# --- Cenários: (total de tarefas, número de relatórios) ---
+# A razão tarefas/relatório é fixa, logo um custo linear mantém o tempo por
+# linha processada aproximadamente constante entre os cenários.
+CENARIOS = [(1_000, 5), (10_000, 50), (100_000, 500)]
+# Cada tarefa permanece nos relatórios durante VIDA_TAREFA relatórios seguidos
+VIDA_TAREFA = 50
+# Cenário (tarefas, relatórios, vida, ausência) comparado com a mesclagem
+# antiga; a vida curta faz tarefas saírem dos relatórios de vez e a ausência
+# tira-as de relatórios isolados, para que voltem depois de RETIRADA.
+CENARIO_PARIDADE = (600, 30, 5, 0.2)
+
+
+def gerar_relatorios(total_tarefas, num_relatorios, vida=VIDA_TAREFA, ausencia=0.0, seed=0):
+    """
+    Gera relatórios sintéticos (data, df_novo) com transições de status
+    aleatórias; cada tarefa falta a um relatório com probabilidade `ausencia`.
+    """
+    rng = np.random.default_rng(seed)
+    status = np.array([STATUS_OPEN, STATUS_CLOSED, STATUS_WAIT_APPROVAL,
+                       STATUS_POSTPONED, STATUS_REPLANEJADO])
+    pesos = [0.5, 0.3, 0.1, 0.05, 0.05]
+    novas_por_relatorio = total_tarefas // num_relatorios
+    data_inicial = pd.Timestamp('2025-01-01').to_pydatetime()
+
+    for r in range(num_relatorios):
+        primeira = max(0, r - vida + 1) * novas_por_relatorio
+        ultima = (r + 1) * novas_por_relatorio
+        seqs = np.arange(primeira, ultima)
+        seqs = seqs[rng.random(len(seqs)) >= ausencia]
+        n = len(seqs)
+        df_novo = pd.DataFrame({
+            'PHASE': '',
+            'SEQ': seqs,
+            'GROUP': 'Planned',
+            'DESCRIPTION': pd.Series(seqs).map('TASK {}'.format),
+            'STATUS': rng.choice(status, size=n, p=pesos),
+            'EXTERNAL TASK': '',
+            'ORIG': '',
+        })
+        yield data_inicial + pd.Timedelta(days=r).to_pytimedelta(), df_novo
+
+
+def mesclar_legado(df_mestre, df_novo, data_relatorio):
+    """Mesclagem original (iterrows + concat por linha), usada como referência."""
+    df_novo['UniqueID'] = df_novo['SEQ'].astype(str)
+    if not df_mestre.empty:
+        ids_retirados = set(df_mestre['UniqueID']) - set(df_novo['UniqueID'])
+        is_already_handled = df_mestre['STATUS'].isin(
+            [STATUS_CLOSED, STATUS_RETIRADA])
+        idx_retirados = df_mestre['UniqueID'].isin(
+            ids_retirados) & ~is_already_handled
+        if idx_retirados.any():
+            df_mestre.loc[idx_retirados, 'STATUS'] = STATUS_RETIRADA
+            df_mestre.loc[idx_retirados, 'Data Fechamento'] = data_relatorio
+
+    for _, row_nova in df_novo.iterrows():
+        unique_id = row_nova['UniqueID']
+        if not df_mestre.empty and unique_id in df_mestre['UniqueID'].values:
+            idx = df_mestre.index[df_mestre['UniqueID'] == unique_id][0]
+            status_antigo = df_mestre.at[idx, 'STATUS']
+            status_novo = row_nova['STATUS']
+            df_mestre.at[idx, 'STATUS'] = status_novo
+            df_mestre.at[idx, 'DESCRIPTION'] = row_nova['DESCRIPTION']
+            df_mestre.at[idx, 'EXTERNAL TASK'] = row_nova['EXTERNAL TASK']
+            df_mestre.at[idx, 'GROUP'] = row_nova['GROUP']
+            data_fechamento_atual = df_mestre.at[idx, 'Data Fechamento']
+            is_paused_novo = status_novo in [
+                STATUS_POSTPONED, STATUS_REPLANEJADO]
+            was_not_paused_before = status_antigo not in [
+                STATUS_POSTPONED, STATUS_REPLANEJADO]
+            if is_paused_novo and was_not_paused_before and pd.isna(data_fechamento_atual):
+                df_mestre.at[idx, 'Data Fechamento'] = data_relatorio
+            elif status_novo == STATUS_CLOSED and pd.isna(data_fechamento_atual):
+                df_mestre.at[idx, 'Data Fechamento'] = data_relatorio
+            elif status_novo not in [STATUS_CLOSED, STATUS_POSTPONED, STATUS_REPLANEJADO] and pd.notna(data_fechamento_atual):
+                df_mestre.at[idx, 'Data Fechamento'] = pd.NaT
+        else:
+            nova_linha = row_nova.to_dict()
+            nova_linha['Data Abertura'] = data_relatorio
+            nova_linha['Última Atualização'] = data_relatorio
+            nova_linha['Data Fechamento'] = data_relatorio if nova_linha['STATUS'] == STATUS_CLOSED else pd.NaT
+            df_mestre = pd.concat(
+                [df_mestre, pd.DataFrame([nova_linha])], ignore_index=True)
+    return df_mestre
+
+
+def executar(funcao_mesclagem, total_tarefas, num_relatorios, vida=VIDA_TAREFA, ausencia=0.0):
+    """Corre a mesclagem sobre todos os relatórios; devolve (mestre, segundos, linhas)."""
+    df_mestre = pd.DataFrame()
+    linhas = 0
+    segundos = 0.0
+    for data_relatorio, df_novo in gerar_relatorios(total_tarefas, num_relatorios, vida, ausencia):
+        linhas += len(df_novo)
+        inicio = time.perf_counter()
+        df_mestre = funcao_mesclagem(df_mestre, df_novo, data_relatorio)
+        segundos += time.perf_counter() - inicio
+    return df_mestre, segundos, linhas
+
+
+def normalizar_mestre(df_mestre):
+    """Colunas comparáveis do mestre, por SEQ, com os tipos do mestre antigo."""
+    df = df_mestre.sort_values('SEQ').reset_index(drop=True)
+    # O mestre novo usa SEQ int32 e colunas categóricas; compara-se pelos valores
+    df['SEQ'] = df['SEQ'].astype('int64')
+    for col in ['GROUP', 'STATUS']:
+        df[col] = df[col].astype(object)
+    for col in ['Data Abertura', 'Data Fechamento', 'Última Atualização']:
+        df[col] = pd.to_datetime(df[col]).astype('datetime64[ns]')
+    return df[['SEQ', 'GROUP', 'DESCRIPTION', 'STATUS', 'Data Abertura',
+               'Data Fechamento', 'Última Atualização']]
+
+
+if __name__ == "__main__":
+    cenarios = CENARIOS
+    if len(sys.argv) > 1:
+        # Ex: python benchmark_merge.py 20000 100
+        cenarios = [(int(sys.argv[1]), int(sys.argv[2]))]
+
+    # A paridade com a mesclagem antiga é verificada em tests/test_mesclagem.py
+    _, segundos, _ = executar(mesclar_relatorio_no_mestre, *CENARIO_PARIDADE)
+    _, segundos_legado, _ = executar(mesclar_legado, *CENARIO_PARIDADE)
+    print(f"Mesclagem {CENARIO_PARIDADE}: "
+          f"{segundos:.2f}s contra {segundos_legado:.2f}s (legado)\n")
+
+    print(f"{'tarefas':>9} {'relatórios':>10} {'linhas':>11} {'tempo (s)':>10} {'µs/linha':>9} {'mestre (MB)':>12}")
+    for total_tarefas, num_relatorios in cenarios:
+        df_mestre, segundos, linhas = executar(
+            mesclar_relatorio_no_mestre, total_tarefas, num_relatorios)
+        memoria = df_mestre.memory_usage(deep=True).sum() / 1024 / 1024
+        print(f"{total_tarefas:>9} {num_relatorios:>10} {linhas:>11} {segundos:>10.2f} "
+              f"{segundos / linhas * 1e6:>9.2f} {memoria:>12.2f}")
@@ -0,0 +1,183 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmark_extracao import (EXTRATORES, PASTA_PADRAO, listar_pdfs,
+                                medir_em_subprocesso, pico_rss_mb)
+
+# --- Relatórios sintéticos: nº de cópias das páginas de tabela do relatório base ---
+FATORES_SINTETICOS = [10, 100]
+
+
+def gerar_relatorio_sintetico(origem, fator, destino):
+    """
+    Cria um relatório com a página de cabeçalho de `origem` seguida das suas
+    páginas de tabela repetidas `fator` vezes.
+    """
+    import fitz
+    with fitz.open(origem) as doc_origem, fitz.open() as doc_novo:
+        doc_novo.insert_pdf(doc_origem, from_page=0, to_page=0)
+        for _ in range(fator):
+            doc_novo.insert_pdf(doc_origem, from_page=1)
+        doc_novo.save(destino)
+        return len(doc_novo)
+
+
+def commit_atual():
+    """Commit do repositório, para comparar resultados entre versões."""
+    try:
+        resultado = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return resultado.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _etapa(nome, segundos, linhas):
+    return {
+        'etapa': nome,
+        'segundos': segundos,
+        'linhas': linhas,
+        'linhas_por_segundo': linhas / segundos if segundos else None,
+        # Pico do processo até ao fim da etapa (inclui as etapas anteriores)
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def medir_pipeline(pasta):
+    """
+    Reconstrói o mestre a partir de `pasta` como o gerenciador_de_tarefas,
+    sem caches, medindo separadamente a leitura dos cabeçalhos (com a
+    remoção de duplicados), extração, mesclagem, pós-processamento,
+    similaridade e escrita do Excel com cada motor.
+    """
+    import pandas as pd
+
+    import gerenciador_de_tarefas as gt
+    from similaridade import encontrar_descricoes_similares
+
+    arquivos = listar_pdfs(pasta)
+    etapas = []
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        hashes = {a: gt.calcular_sha256(a) for a in arquivos}
+        cabecalhos = gt.cabecalhos_dos_relatorios(arquivos, hashes)
+        arquivos, _ = gt.deduplicar_relatorios(arquivos, hashes, cabecalhos)
+    arquivos.sort(key=lambda a: (gt.chave_cronologica(
+        a, cabecalhos[a]['data']), os.path.getmtime(a), a))
+    etapas.append(_etapa('cabecalhos', time.perf_counter() - inicio, len(arquivos)))
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultados = list(gt.extrair_relatorios(arquivos))
+    etapas.append(_etapa('extracao', time.perf_counter() - inicio,
+                         sum(len(df) for _, df in resultados)))
+
+    df_mestre = pd.DataFrame()
+    data_ultimo_relatorio = None
+    linhas = 0
+    inicio = time.perf_counter()
+    for dados_cabecalho, df_novo in resultados:
+        if df_novo.empty:
+            continue
+        linhas += len(df_novo)
+        data_ultimo_relatorio = dados_cabecalho['report_date']
+        df_mestre = gt.mesclar_relatorio_no_mestre(
+            df_mestre, df_novo, data_ultimo_relatorio)
+    etapas.append(_etapa('mesclagem', time.perf_counter() - inicio, linhas))
+
+    inicio = time.perf_counter()
+    df_mestre = gt.preparar_mestre(df_mestre, data_ultimo_relatorio, set())
+    etapas.append(_etapa('pos_processamento',
+                  time.perf_counter() - inicio, len(df_mestre)))
+
+    inicio = time.perf_counter()
+    descricoes = df_mestre['DESCRIPTION'].dropna().astype(str).tolist()
+    indices_para_colorir = encontrar_descricoes_similares(descricoes)
+    etapas.append(_etapa('similaridade',
+                  time.perf_counter() - inicio, len(descricoes)))
+
+    resumo = gt.calcular_resumo(df_mestre)
+    df_mestre_excel = gt.montar_tabela_excel(df_mestre)
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        for motor in ('xlsxwriter', 'openpyxl'):
+            inicio = time.perf_counter()
+            gt.salvar_dashboard(os.path.join(pasta_temp, f'{motor}.xlsx'), df_mestre_excel,
+                                df_mestre['is_new'], indices_para_colorir, resumo, motor=motor)
+            etapas.append(_etapa(f'excel_{motor}', time.perf_counter() - inicio,
+                                 len(df_mestre_excel)))
+    return etapas
+
+
+def pipeline_em_subprocesso(pasta):
+    """Mede o pipeline num processo novo, para que o pico de RSS seja só dele."""
+    resultado = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--pipeline', pasta],
+        capture_output=True, text=True, check=True)
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def executar(pasta, fatores, extratores):
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'pasta': pasta,
+        'extracao': [],
+        'sinteticos': [],
+        'pipeline': pipeline_em_subprocesso(pasta),
+    }
+
+    for nome in extratores:
+        relatorio['extracao'].append(medir_em_subprocesso(nome, pasta))
+
+    # O relatório base dos sintéticos é o mais pequeno, para limitar o tempo
+    origem = min(listar_pdfs(pasta), key=os.path.getsize)
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        for fator in fatores:
+            pasta_fator = os.path.join(pasta_temp, f'x{fator}')
+            os.mkdir(pasta_fator)
+            paginas = gerar_relatorio_sintetico(
+                origem, fator, os.path.join(pasta_fator, f'sintetico_x{fator}.pdf'))
+            for nome in extratores:
+                medicao = medir_em_subprocesso(nome, pasta_fator)
+                medicao.update({'fator': fator, 'paginas': paginas})
+                relatorio['sinteticos'].append(medicao)
+    return relatorio
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--pipeline':
+        with contextlib.redirect_stdout(io.StringIO()):
+            etapas = medir_pipeline(sys.argv[2])
+        print(json.dumps(etapas))
+        sys.exit()
+
+    parser = argparse.ArgumentParser(
+        description="Mede extração, mesclagem, similaridade e escrita do Excel; o resultado sai em JSON.")
+    parser.add_argument('pasta', nargs='?', default=PASTA_PADRAO)
+    parser.add_argument('--fatores', type=int, nargs='*', default=FATORES_SINTETICOS,
+                        help="multiplicadores de páginas dos relatórios sintéticos")
+    parser.add_argument('--extratores', nargs='*', default=list(EXTRATORES),
+                        choices=list(EXTRATORES))
+    parser.add_argument('--saida', help="ficheiro JSON de saída (por omissão, stdout)")
+    args = parser.parse_args()
+
+    relatorio = executar(args.pasta, args.fatores, args.extratores)
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f"📊 Resultados gravados em '{args.saida}'")
+    else:
+        print(texto)
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from datetime import datetime
+
+# --- CACHE: Tamanho máximo (em bytes) ocupado pelas extrações guardadas ---
+TAMANHO_MAXIMO_CACHE = 200 * 1024 * 1024
+
+
+def calcular_sha256(caminho_arquivo, tamanho_bloco=1024 * 1024):
+    """Calcula o SHA-256 do conteúdo de um ficheiro, lendo-o em blocos."""
+    h = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CacheExtracao:
+    """
+    Cache em disco (SQLite) dos resultados de extração de cada PDF.
+
+    As entradas são indexadas pelo SHA-256 do PDF e pela versão do extrator:
+    ao mudar a versão, as entradas antigas deixam de ser válidas e são
+    apagadas. Quando o tamanho total excede `tamanho_maximo`, as entradas
+    menos usadas recentemente (LRU) são removidas.
+    """
+
+    def __init__(self, caminho_db, versao_extrator, tamanho_maximo=TAMANHO_MAXIMO_CACHE):
+        self.versao_extrator = versao_extrator
+        self.tamanho_maximo = tamanho_maximo
+        self.conn = sqlite3.connect(caminho_db)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS extracoes (
+                sha256 TEXT NOT NULL,
+                versao_extrator INTEGER NOT NULL,
+                dados BLOB NOT NULL,
+                tamanho INTEGER NOT NULL,
+                ultimo_acesso REAL NOT NULL,
+                PRIMARY KEY (sha256, versao_extrator)
+            )""")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extracoes_acesso ON extracoes (ultimo_acesso)")
+        # Cabeçalho lido da 1.ª página: data, nº do relatório e data/hora de
+        # emissão (NULL no que não foi encontrado)
+        self.conn.execute("DROP TABLE IF EXISTS datas_relatorio")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cabecalhos_relatorio (
+                sha256 TEXT NOT NULL,
+                versao_extrator INTEGER NOT NULL,
+                data TEXT,
+                numero TEXT,
+                emitido_em TEXT,
+                PRIMARY KEY (sha256, versao_extrator)
+            )""")
+        # Invalida tudo o que foi produzido por outra versão do extrator
+        self.conn.execute(
+            "DELETE FROM extracoes WHERE versao_extrator != ?", (versao_extrator,))
+        self.conn.execute(
+            "DELETE FROM cabecalhos_relatorio WHERE versao_extrator != ?", (versao_extrator,))
+        self.conn.commit()
+
+    def obter(self, sha256):
+        """Devolve (dados_cabecalho, df) guardados para o hash, ou None."""
+        linha = self.conn.execute(
+            "SELECT dados FROM extracoes WHERE sha256 = ? AND versao_extrator = ?",
+            (sha256, self.versao_extrator)).fetchone()
+        if linha is None:
+            return None
+        try:
+            resultado = pickle.loads(linha[0])
+        except Exception:
+            # Entrada ilegível (ex: versão diferente do pandas): trata como falta
+            self.conn.execute(
+                "DELETE FROM extracoes WHERE sha256 = ? AND versao_extrator = ?",
+                (sha256, self.versao_extrator))
+            self.conn.commit()
+            return None
+        self.conn.execute(
+            "UPDATE extracoes SET ultimo_acesso = ? WHERE sha256 = ? AND versao_extrator = ?",
+            (time.time(), sha256, self.versao_extrator))
+        self.conn.commit()
+        return resultado
+
+    def guardar(self, sha256, resultado):
+        """Guarda o resultado (dados_cabecalho, df) e aplica o limite LRU."""
+        dados = pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO extracoes VALUES (?, ?, ?, ?, ?)",
+            (sha256, self.versao_extrator, dados, len(dados), time.time()))
+        self._aplicar_limite()
+        self.conn.commit()
+
+    def obter_cabecalhos(self, sha256s):
+        """{sha256: cabeçalho} já lidos para os hashes pedidos (ver guardar_cabecalhos)."""
+        procurados = set(sha256s)
+        cabecalhos = {}
+        for sha256, data, numero, emitido_em in self.conn.execute(
+                "SELECT sha256, data, numero, emitido_em FROM cabecalhos_relatorio WHERE versao_extrator = ?",
+                (self.versao_extrator,)):
+            if sha256 in procurados:
+                cabecalhos[sha256] = {
+                    'data': datetime.fromisoformat(data) if data else None,
+                    'numero': numero,
+                    'emitido_em': datetime.fromisoformat(emitido_em) if emitido_em else None,
+                }
+        return cabecalhos
+
+    def hashes_com_cabecalho(self):
+        """Conjunto dos sha256 com cabeçalho guardado para a versão atual do extrator."""
+        return {sha256 for sha256, in self.conn.execute(
+            "SELECT sha256 FROM cabecalhos_relatorio WHERE versao_extrator = ?",
+            (self.versao_extrator,))}
+
+    def guardar_cabecalhos(self, cabecalhos):
+        """
+        Guarda {sha256: {'data', 'numero', 'emitido_em'}}; valores None ficam
+        registados para que o PDF não volte a ser lido.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cabecalhos_relatorio VALUES (?, ?, ?, ?, ?)",
+                [(sha256, self.versao_extrator,
+                  c['data'].isoformat() if c['data'] else None, c['numero'],
+                  c['emitido_em'].isoformat() if c['emitido_em'] else None)
+                 for sha256, c in cabecalhos.items()])
+
+    def _aplicar_limite(self):
+        total = self.conn.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM extracoes").fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+        excedente = total - self.tamanho_maximo
+        a_remover = []
+        for sha256, versao, tamanho in self.conn.execute(
+                "SELECT sha256, versao_extrator, tamanho FROM extracoes ORDER BY ultimo_acesso"):
+            if excedente <= 0:
+                break
+            a_remover.append((sha256, versao))
+            excedente -= tamanho
+        self.conn.executemany(
+            "DELETE FROM extracoes WHERE sha256 = ? AND versao_extrator = ?", a_remover)
+
+    def fechar(self):
+        self.conn.close()
+
+
+def caminho_cache_para(caminho_mestre):
+    """Caminho do ficheiro de cache guardado ao lado do ficheiro mestre."""
+    base, _ = os.path.splitext(caminho_mestre)
+    return f"{base}.cache.sqlite"
@@ -12,10 +12,19 @@ def extrair_dados_pdf_versao_final(caminho_pdf):
     robusta e simplificada, inspirada em métodos comprovadamente eficazes.
     """
     dados_cabecalho = {"report_datetime": None, "progress_percentage": None}
+    todas_as_linhas = []
 
-    # --- Parte 1: Extrair dados do cabeçalho com pdfplumber ---
+    # O PDF é aberto uma única vez para o cabeçalho e para as tabelas
     try:
-        with pdfplumber.open(caminho_pdf) as pdf:
+        pdf = pdfplumber.open(caminho_pdf)
+    except Exception as e:
+        print(f"Aviso: Não foi possível ler o cabeçalho. Erro: {e}")
+        print(f"Erro ao extrair tabelas do PDF com pdfplumber: {e}")
+        return dados_cabecalho, pd.DataFrame()
+
+    with pdf:
+        # --- Parte 1: Extrair dados do cabeçalho com pdfplumber ---
+        try:
             page_one = pdf.pages[0]
             text_page_one = page_one.extract_text()
             match_date = re.search(r"Today\n(.*)", text_page_one)
@@ -32,13 +41,12 @@ def extrair_dados_pdf_versao_final(caminho_pdf):
                     except (ValueError, IndexError):
                         pass
                     break
-    except Exception as e:
-        print(f"Aviso: Não foi possível ler o cabeçalho. Erro: {e}")
+            page_one.close()
+        except Exception as e:
+            print(f"Aviso: Não foi possível ler o cabeçalho. Erro: {e}")
 
-    # --- Parte 2: Extrair todas as linhas de tabelas com pdfplumber ---
-    todas_as_linhas = []
-    try:
-        with pdfplumber.open(caminho_pdf) as pdf:
+        # --- Parte 2: Extrair todas as linhas de tabelas com pdfplumber ---
+        try:
             # Itera a partir da página 2 (índice 1)
             for page in pdf.pages[1:]:
                 # Usa a extração de tabela padrão, que funciona bem como ponto de partida
@@ -46,9 +54,11 @@ def extrair_dados_pdf_versao_final(caminho_pdf):
                 if tabela:
                     # Adiciona todas as linhas da tabela da página à nossa lista geral
                     todas_as_linhas.extend(tabela)
-    except Exception as e:
-        print(f"Erro ao extrair tabelas do PDF com pdfplumber: {e}")
-        return dados_cabecalho, pd.DataFrame()
+                # Liberta os objetos em cache da página já processada
+                page.close()
+        except Exception as e:
+            print(f"Erro ao extrair tabelas do PDF com pdfplumber: {e}")
+            return dados_cabecalho, pd.DataFrame()
 
     if not todas_as_linhas:
         return dados_cabecalho, pd.DataFrame()
@@ -21,6 +21,29 @@ STATUS_REPLANEJADO = "REPLANEJADO"
 STATUS_RETIRADA = "RETIRADA"
 
 
+def consolidar_por_grupo_e_seq(df_final):
+    """
+    Agrupa as linhas com o mesmo GROUP e SEQ: DESCRIPTION junta as descrições
+    distintas pela ordem em que aparecem e as outras colunas ficam com o
+    primeiro valor. As descrições repetidas saem com drop_duplicates antes da
+    junção, em vez de uma lambda com unique() por grupo.
+    """
+    original_cols = df_final.columns.tolist()
+    chaves = ['GROUP', 'SEQ']
+    colunas_primeiro = [
+        col for col in original_cols if col not in chaves + ['DESCRIPTION']]
+    df_agrupado = df_final.groupby(chaves, as_index=False)[
+        colunas_primeiro].first()
+
+    descricoes = (df_final.dropna(subset=['DESCRIPTION'])
+                  .drop_duplicates(subset=chaves + ['DESCRIPTION'])
+                  .groupby(chaves)['DESCRIPTION'].agg(' '.join))
+    df_agrupado = df_agrupado.merge(
+        descricoes.reset_index(), on=chaves, how='left')
+    df_agrupado['DESCRIPTION'] = df_agrupado['DESCRIPTION'].fillna('')
+    return df_agrupado.reindex(columns=original_cols)
+
+
 def extrair_dados_pdf_pymupdf(caminho_pdf):
     """
     Extrai dados de tabelas de um PDF usando a arquitetura robusta do PyMuPDF,
@@ -141,13 +164,8 @@ def extrair_dados_pdf_pymupdf(caminho_pdf):
     df_final.dropna(subset=['SEQ'], inplace=True)
     df_final['SEQ'] = df_final['SEQ'].astype(int)
 
-    # Define as funções de agregação
-    agg_funcs = {col: 'first' for col in df_final.columns if col not in ['GROUP', 'SEQ']}
-    agg_funcs['DESCRIPTION'] = lambda x: ' '.join(x.dropna().unique())
-
     # Agrupa por GROUP e SEQ, agrega os outros campos e depois reordena as colunas
-    df_final = df_final.groupby(['GROUP', 'SEQ'], as_index=False).agg(agg_funcs)
-    df_final = df_final.reindex(columns=original_cols)
+    df_final = consolidar_por_grupo_e_seq(df_final)
 
     # Preenchimento de status padrão APÓS a consolidação
     df_final.loc[df_final['STATUS'] == '', 'STATUS'] = STATUS_WAIT_APPROVAL
@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COLUNAS_DATA = ['Data Abertura', 'Data Fechamento', 'Última Atualização']
+# Chave, nos metadados do Parquet, com a versão das tarefas gravadas
+CHAVE_VERSAO_PARQUET = b'versao_tarefas'
+
+
+class EstadoMestre:
+    """
+    Estado persistente do dashboard mestre, usado no modo incremental.
+
+    As tarefas já mescladas (SEQ, STATUS, datas, etc.) ficam num ficheiro
+    Parquet ao lado do Excel, com os tipos do mestre: é a fonte de verdade
+    para as execuções seguintes e para análises, e o Excel é só a vista
+    formatada. O SQLite guarda a data do último relatório aplicado e o
+    registo dos PDFs já ingeridos (pelo seu SHA-256), para que cada execução
+    aplique apenas os relatórios novos. Os PDFs cuja extração saiu vazia (ou
+    falhou) ficam num registo à parte: voltam a ser tentados, mas um deles
+    anterior aos já ingeridos não obriga, por si, a reconstruir o mestre.
+
+    Cada gravação do Parquet leva uma versão que fica também no SQLite. Se
+    não coincidirem (ex: execução interrompida entre as duas escritas), o
+    registo de relatórios é descartado e o mestre é reconstruído.
+    """
+
+    def __init__(self, caminho_db, caminho_parquet):
+        self.caminho_parquet = caminho_parquet
+        self.conn = sqlite3.connect(caminho_db)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS relatorios_ingeridos (
+                sha256 TEXT PRIMARY KEY,
+                nome_arquivo TEXT NOT NULL,
+                chave_ordem REAL NOT NULL,
+                ingerido_em TEXT NOT NULL
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS relatorios_sem_tarefas (
+                sha256 TEXT PRIMARY KEY,
+                nome_arquivo TEXT NOT NULL,
+                chave_ordem REAL NOT NULL,
+                tentado_em TEXT NOT NULL
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadados (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            )""")
+        self.conn.commit()
+        self._verificar_versao()
+
+    def _metadado(self, chave):
+        linha = self.conn.execute(
+            "SELECT valor FROM metadados WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def _versao_parquet(self):
+        if not os.path.exists(self.caminho_parquet):
+            return None
+        metadados = pq.read_schema(self.caminho_parquet).metadata or {}
+        versao = metadados.get(CHAVE_VERSAO_PARQUET)
+        return versao.decode() if versao else None
+
+    def _verificar_versao(self):
+        versao = self._metadado('versao_tarefas')
+        if versao is not None and versao != self._versao_parquet():
+            print(
+                f"⚠️ '{self.caminho_parquet}' não corresponde ao estado guardado. O mestre será reconstruído.")
+            with self.conn:
+                self.conn.execute("DELETE FROM relatorios_ingeridos")
+
+    def relatorios_ingeridos(self):
+        """Devolve {sha256: chave_ordem} dos relatórios já aplicados ao mestre."""
+        return dict(self.conn.execute(
+            "SELECT sha256, chave_ordem FROM relatorios_ingeridos"))
+
+    def relatorios_sem_tarefas(self):
+        """Devolve {sha256: chave_ordem} dos relatórios tentados cuja extração saiu vazia."""
+        return dict(self.conn.execute(
+            "SELECT sha256, chave_ordem FROM relatorios_sem_tarefas"))
+
+    def registar_sem_tarefas(self, relatorios):
+        """Regista `relatorios`, uma lista de (sha256, nome_arquivo, chave_ordem), sem tarefas."""
+        tentado_em = pd.Timestamp.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO relatorios_sem_tarefas VALUES (?, ?, ?, ?)",
+                [(sha, nome, chave, tentado_em) for sha, nome, chave in relatorios])
+
+    def carregar(self):
+        """Devolve (df_mestre, data_ultimo_relatorio) guardados no estado."""
+        valor = self._metadado('data_ultimo_relatorio')
+        data_ultimo_relatorio = pd.Timestamp(
+            valor).to_pydatetime() if valor else None
+
+        if os.path.exists(self.caminho_parquet):
+            return pd.read_parquet(self.caminho_parquet), data_ultimo_relatorio
+
+        # Estados de versões anteriores guardavam as tarefas no próprio SQLite
+        existe = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tarefas'").fetchone()
+        if not existe:
+            return pd.DataFrame(), data_ultimo_relatorio
+        df_mestre = pd.read_sql('SELECT * FROM tarefas', self.conn)
+        for col in COLUNAS_DATA:
+            if col in df_mestre.columns:
+                df_mestre[col] = pd.to_datetime(df_mestre[col], errors='coerce')
+        return df_mestre, data_ultimo_relatorio
+
+    def salvar(self, df_mestre, data_ultimo_relatorio, relatorios, reconstruir=False):
+        """
+        Grava as tarefas no Parquet e regista `relatorios`, uma lista de
+        (sha256, nome_arquivo, chave_ordem). Com `reconstruir=True`, os
+        registos anteriores (ingeridos e sem tarefas) são descartados.
+        """
+        versao = None
+        if df_mestre.empty:
+            if os.path.exists(self.caminho_parquet):
+                os.remove(self.caminho_parquet)
+        else:
+            versao = uuid.uuid4().hex
+            tabela = pa.Table.from_pandas(df_mestre, preserve_index=False)
+            tabela = tabela.replace_schema_metadata(
+                {**(tabela.schema.metadata or {}), CHAVE_VERSAO_PARQUET: versao.encode()})
+            # Escrita atómica: quem ler nunca vê um Parquet a meio
+            temporario = f"{self.caminho_parquet}.tmp"
+            pq.write_table(tabela, temporario)
+            os.replace(temporario, self.caminho_parquet)
+
+        with self.conn:
+            if reconstruir:
+                self.conn.execute("DELETE FROM relatorios_ingeridos")
+                self.conn.execute("DELETE FROM relatorios_sem_tarefas")
+            self.conn.execute("DROP TABLE IF EXISTS tarefas")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO metadados VALUES (?, ?)",
+                [('data_ultimo_relatorio', data_ultimo_relatorio.isoformat() if data_ultimo_relatorio else None),
+                 ('versao_tarefas', versao)])
+            ingerido_em = pd.Timestamp.now().isoformat()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO relatorios_ingeridos VALUES (?, ?, ?, ?)",
+                [(sha, nome, chave, ingerido_em) for sha, nome, chave in relatorios])
+            self.conn.executemany(
+                "DELETE FROM relatorios_sem_tarefas WHERE sha256 = ?", [(sha,) for sha, _, _ in relatorios])
+
+    def fechar(self):
+        self.conn.close()
+
+
+def caminho_estado_para(caminho_mestre):
+    """Caminho do ficheiro de estado guardado ao lado do ficheiro mestre."""
+    base, _ = os.path.splitext(caminho_mestre)
+    return f"{base}.estado.sqlite"
+
+
+def caminho_parquet_para(caminho_mestre):
+    """Caminho do Parquet com as tarefas do mestre, ao lado do ficheiro Excel."""
+    base, _ = os.path.splitext(caminho_mestre)
+    return f"{base}.parquet"
@@ -1,16 +1,28 @@
+import argparse
 import pdfplumber
 import pandas as pd
+import numpy as np
 import re
 import os
 from datetime import datetime
-import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 # A biblioteca openpyxl é necessária para escrever ficheiros .xlsx
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.formatting.rule import Rule, DataBarRule, DifferentialStyle
 from openpyxl.utils import get_column_letter
+from openpyxl.chart import BarChart, LineChart, Reference
+import xlsxwriter
 # --- NOVA ARQUITETURA: Importação do PyMuPDF (fitz) ---
 import fitz  # PyMuPDF
-from thefuzz import fuzz
+from cache_extracao import CacheExtracao, caminho_cache_para, calcular_sha256
+from estado_mestre import (EstadoMestre, caminho_estado_para,
+                           caminho_parquet_para)
+from historico_tarefas import HistoricoTarefas, caminho_historico_para
+from similaridade import (LIMITE_SIMILARIDADE, CacheSimilaridade,
+                          encontrar_descricoes_similares)
+import instrumentacao
+from modelos_layout import carregar_modelos, extrair_tabela
 
 # --- REATORAÇÃO: Constantes para nomes de status ---
 STATUS_OPEN = "OPEN"
@@ -20,183 +32,421 @@ STATUS_POSTPONED = "POSTPONED"
 STATUS_REPLANEJADO = "REPLANEJADO"
 STATUS_RETIRADA = "RETIRADA"
 
-
-def extrair_dados_pdf_pymupdf(caminho_pdf):
+# --- PARALELISMO: Número de processos usados na extração dos PDFs ---
+# None usa todos os núcleos disponíveis; 1 força o modo serial.
+NUM_PROCESSOS_EXTRACAO = None
+
+# --- PARALELISMO POR PÁGINA: Relatórios grandes têm as páginas repartidas ---
+# Relatórios com pelo menos PAGINAS_MINIMAS_PARALELISMO páginas, extraídos no
+# processo principal, têm o `find_tables` repartido por NUM_PROCESSOS_PAGINAS
+# processos (None usa todos os núcleos; 1 desliga este modo).
+PAGINAS_MINIMAS_PARALELISMO = 40
+NUM_PROCESSOS_PAGINAS = None
+
+# --- MODELOS DE LAYOUT: Extração por posições calibradas (pasta Modelos_Layout) ---
+# Páginas que correspondem a um modelo são lidas sem `find_tables`; as
+# restantes (ex: a 1ª página da lista de tarefas) continuam a usá-lo.
+USAR_MODELOS_LAYOUT = True
+
+# --- CACHE: Versão da lógica de extração ---
+# Incremente sempre que `extrair_dados_pdf_pymupdf` mudar de comportamento,
+# para invalidar as extrações guardadas em cache.
+VERSAO_EXTRATOR = 2
+
+# --- EXCEL: Motor usado para escrever o Dashboard_Mestre.xlsx ---
+# 'xlsxwriter' (rápido, memória constante) ou 'openpyxl' (motor original).
+MOTOR_EXCEL = 'xlsxwriter'
+
+# --- INCREMENTAL: Aplica apenas os PDFs ainda não ingeridos no estado guardado ---
+MODO_INCREMENTAL = True
+
+# --- PARTIÇÕES: Um mestre por nº de relatório (work package) ---
+# Os ficheiros '<PREFIXO_RELATORIOS>*.pdf' são agrupados pelo nº lido no
+# cabeçalho. Cada nº tem o seu mestre (<mestre>_<nº>.xlsx) e estado, e o
+# resumo da frota fica em <mestre>_Frota.xlsx. Relatórios sem nº
+# reconhecível ficam na partição SEM_NUMERO.
+PREFIXO_RELATORIOS = 'customer_report'
+SEM_NUMERO = 'sem_numero'
+
+# --- INSTRUMENTAÇÃO: Tempo, chamadas e páginas/linhas por etapa ---
+# Ligada, imprime um resumo por etapa no fim da execução. Com
+# TRACE_INSTRUMENTACAO (ex: 'Dashboard_Mestre.trace'), grava também
+# <prefixo>.json com os eventos e <prefixo>.prof com o perfil do cProfile.
+INSTRUMENTACAO = False
+TRACE_INSTRUMENTACAO = None
+
+
+def ler_data_relatorio(text_page_one, verboso=True):
     """
-    Extrai dados de tabelas de um PDF usando a arquitetura robusta do PyMuPDF,
-    projetada para lidar com tabelas que se estendem por várias páginas.
+    Procura a data do relatório ("Today ...") no texto da primeira página,
+    nos dois formatos conhecidos. Devolve um datetime ou None.
     """
-    dados_cabecalho = {"report_date": None}
-    try:
-        doc = fitz.open(caminho_pdf)
-        page_one = doc[0]
-        text_page_one = page_one.get_text()
-
-        # Extração de data (lógica mantida)
-        report_date = None
-        match1 = re.search(
-            r"Today\s+([\w\s,]+\d{4})", text_page_one, re.IGNORECASE)
-        if match1:
-            date_str_raw = match1.group(1).strip()
-            date_str_clean = date_str_raw.replace(',', '')
-            for fmt in ["%B %d %Y", "%b %d %Y"]:
-                try:
-                    report_date = datetime.strptime(date_str_clean, fmt)
+    report_date = None
+    match1 = re.search(
+        r"Today\s+([\w\s,]+\d{4})", text_page_one, re.IGNORECASE)
+    if match1:
+        date_str_raw = match1.group(1).strip()
+        date_str_clean = date_str_raw.replace(',', '')
+        for fmt in ["%B %d %Y", "%b %d %Y"]:
+            try:
+                report_date = datetime.strptime(date_str_clean, fmt)
+                if verboso:
                     print(
                         f"INFO: Data encontrada (Padrão 1): '{date_str_raw}'")
-                    break
-                except ValueError:
-                    continue
-        if not report_date:
-            match2 = re.search(
-                r"Today\s+(\d{2}/\d{2}/\d{4})", text_page_one, re.IGNORECASE)
-            if match2:
-                date_str = match2.group(1).strip()
-                try:
-                    report_date = datetime.strptime(date_str, "%d/%m/%Y")
+                break
+            except ValueError:
+                continue
+    if not report_date:
+        match2 = re.search(
+            r"Today\s+(\d{2}/\d{2}/\d{4})", text_page_one, re.IGNORECASE)
+        if match2:
+            date_str = match2.group(1).strip()
+            try:
+                report_date = datetime.strptime(date_str, "%d/%m/%Y")
+                if verboso:
                     print(f"INFO: Data encontrada (Padrão 2): '{date_str}'")
-                except ValueError:
-                    pass
+            except ValueError:
+                pass
+    return report_date
+
 
-        dados_cabecalho["report_date"] = report_date or datetime.now()
+# --- ORDEM CRONOLÓGICA: Pré-leitura do cabeçalho ("Today", nº do relatório) só na primeira página ---
+# Nº do relatório: a parte numérica do WP NUMBER (ex: '19000277/FAB-2591')
+NUMERO_RELATORIO_RE = re.compile(r"\b(\d{6,})/")
+NUMERO_NO_NOME_RE = re.compile(
+    rf"{re.escape(PREFIXO_RELATORIOS)}_(\d+)", re.IGNORECASE)
+HORA_RELATORIO_RE = re.compile(
+    r"Today\s+[\w\s,]+?\d{4}\s+(\d{1,2}:\d{2}\s*[AP]M)", re.IGNORECASE)
 
+
+def ler_cabecalho_pdf(caminho_pdf):
+    """
+    Cabeçalho lido apenas do texto da primeira página:
+      - data: data do relatório (ler_data_relatorio), ou None
+      - numero: nº do relatório; na falta, o número no nome do ficheiro
+      - emitido_em: data e hora de emissão ('Today ... 03:39 PM'), ou a data
+    """
+    cabecalho = {'data': None, 'numero': None, 'emitido_em': None}
+    try:
+        with fitz.open(caminho_pdf) as doc:
+            texto = doc[0].get_text()
     except Exception as e:
         print(
-            f"Aviso: Não foi possível ler o cabeçalho do PDF. Erro: {e}. Usando data atual.")
-        dados_cabecalho["report_date"] = datetime.now()
+            f"Aviso: Não foi possível ler o cabeçalho de '{os.path.basename(caminho_pdf)}'. Erro: {e}")
+        texto = ''
+
+    cabecalho['data'] = ler_data_relatorio(texto, verboso=False)
+    match_numero = NUMERO_RELATORIO_RE.search(texto) or NUMERO_NO_NOME_RE.search(
+        os.path.basename(caminho_pdf))
+    if match_numero:
+        cabecalho['numero'] = match_numero.group(1)
+    cabecalho['emitido_em'] = cabecalho['data']
+    match_hora = HORA_RELATORIO_RE.search(texto)
+    if cabecalho['data'] and match_hora:
+        try:
+            hora = datetime.strptime(
+                match_hora.group(1).upper().replace(' ', ''), '%I:%M%p')
+            cabecalho['emitido_em'] = cabecalho['data'].replace(
+                hour=hora.hour, minute=hora.minute)
+        except ValueError:
+            pass
+    return cabecalho
 
-    # --- CORREÇÃO DEFINITIVA (SEQ 53): Arquitetura de Validação na Fonte ---
-    # ETAPA 1: Extração Bruta e Filtro de Integridade Imediato
-    validated_rows = []
-    # Adicione outros grupos válidos se necessário
-    VALID_GROUPS = {"Planned", "Internal Procedure", "Customer Request"}
-    ALL_STATUSES = {STATUS_OPEN, STATUS_CLOSED, STATUS_WAIT_APPROVAL,
-                    STATUS_POSTPONED, STATUS_REPLANEJADO, STATUS_RETIRADA}
 
-    try:
-        doc = fitz.open(caminho_pdf)
-        for page_num in range(1, len(doc)):
-            page = doc[page_num]
+def cabecalhos_dos_relatorios(arquivos_pdf, hashes, cache=None, num_processos=NUM_PROCESSOS_EXTRACAO):
+    """
+    {arquivo: cabeçalho (ver ler_cabecalho_pdf)}, sem extrair tabelas. Os
+    cabeçalhos já conhecidos vêm do `cache` (pelo SHA-256 em `hashes`); os
+    restantes são lidos em paralelo e guardados no cache.
+    """
+    conhecidos = cache.obter_cabecalhos(
+        [hashes[a] for a in arquivos_pdf]) if cache is not None else {}
+    a_ler = [a for a in arquivos_pdf if hashes[a] not in conhecidos]
+
+    if num_processos is None:
+        num_processos = os.cpu_count() or 1
+    num_processos = max(1, min(num_processos, len(a_ler)))
+    if num_processos == 1:
+        lidos = [ler_cabecalho_pdf(a) for a in a_ler]
+    else:
+        with ProcessPoolExecutor(max_workers=num_processos) as executor:
+            lidos = list(executor.map(ler_cabecalho_pdf, a_ler))
+
+    novos = {hashes[a]: cabecalho for a, cabecalho in zip(a_ler, lidos)}
+    if cache is not None and novos:
+        cache.guardar_cabecalhos(novos)
+    if a_ler:
+        print(
+            f"📅 Cabeçalho lido da 1.ª página de {len(a_ler)} relatórios ({len(arquivos_pdf) - len(a_ler)} do cache).")
+    conhecidos.update(novos)
+    return {a: conhecidos[hashes[a]] for a in arquivos_pdf}
+
+
+def hashes_e_cabecalhos(arquivos_pdf, cache=None):
+    """({arquivo: sha256}, {arquivo: cabeçalho}) de cada PDF (ver cabecalhos_dos_relatorios)."""
+    hashes = {a: calcular_sha256(a) for a in arquivos_pdf}
+    return hashes, cabecalhos_dos_relatorios(arquivos_pdf, hashes, cache=cache)
+
+
+def deduplicar_relatorios(arquivos_pdf, hashes, cabecalhos):
+    """
+    Remove, antes da extração, os relatórios repetidos:
+      - cópias idênticas (mesmo SHA-256): fica a modificada mais recentemente
+      - o mesmo relatório (nº e data) em ficheiros diferentes: fica o emitido
+        mais tarde ('Today ... hh:mm'), e em empate o modificado mais tarde
+    Devolve (arquivos mantidos, [(arquivo ignorado, motivo)]).
+    """
+    def mais_recente(a):
+        return (cabecalhos[a]['emitido_em'] or datetime.min, os.path.getmtime(a), a)
+
+    ignorados = []
+    por_hash = {}
+    for arquivo in sorted(arquivos_pdf, key=mais_recente, reverse=True):
+        mantido = por_hash.setdefault(hashes[arquivo], arquivo)
+        if mantido != arquivo:
+            ignorados.append(
+                (arquivo, f"cópia idêntica de '{os.path.basename(mantido)}'"))
+
+    por_relatorio = {}
+    for arquivo in sorted(por_hash.values(), key=mais_recente, reverse=True):
+        numero, data = cabecalhos[arquivo]['numero'], cabecalhos[arquivo]['data']
+        if numero is None or data is None:
+            continue
+        mantido = por_relatorio.setdefault((numero, data.date()), arquivo)
+        if mantido != arquivo:
+            ignorados.append((arquivo, f"relatório {numero} de {data.strftime('%d/%m/%Y')} "
+                                       f"repetido; fica '{os.path.basename(mantido)}'"))
+
+    excluidos = {a for a, _ in ignorados}
+    return [a for a in arquivos_pdf if a not in excluidos], ignorados
+
+
+def chave_cronologica(arquivo_pdf, data_relatorio):
+    """
+    Chave de ordem de um relatório: a data do relatório (em segundos desde
+    a época) ou, se não tiver data reconhecível, a data de modificação.
+    """
+    if data_relatorio is not None:
+        return data_relatorio.timestamp()
+    return os.path.getmtime(arquivo_pdf)
+
+
+# --- CLASSIFICADOR DE LINHAS: Tipos de linha das tabelas de tarefas ---
+LINHA_CABECALHO = 'cabecalho'
+LINHA_CRITICA = 'critica'          # ID | SEQ | DESCRIPTION | STATUS (critical issues)
+LINHA_NORMAL = 'normal'            # PHASE | SEQ | GROUP | ...
+LINHA_DESLOCADA = 'deslocada'      # SEQ | GROUP | ... (sem a coluna PHASE)
+LINHA_CONTINUACAO = 'continuacao'  # Resto da descrição da tarefa anterior
+
+# Adicione outros grupos válidos se necessário
+GRUPOS_VALIDOS = {"Planned", "Internal Procedure", "Customer Request"}
+TODOS_STATUS = {STATUS_OPEN, STATUS_CLOSED, STATUS_WAIT_APPROVAL,
+                STATUS_POSTPONED, STATUS_REPLANEJADO, STATUS_RETIRADA}
+
+# Um status como palavra isolada por espaços dentro do texto de uma linha
+STATUS_NO_TEXTO_RE = re.compile(
+    r"(?<![^ ])(" + "|".join(re.escape(s) for s in sorted(TODOS_STATUS, key=len, reverse=True)) + r")(?![^ ])")
+AD_ANAC_RE = re.compile(r"(AD\s?\(ANAC\)\s?\d{4}-\d{2}-\d{2})")
+CODIGO_TAREFA_RE = re.compile(r"^\d{2}-\d{2}-\d{2}-\d{3}")
+
+
+def classificar_linha(row):
+    """
+    Classifica uma linha bruta da tabela e devolve (tipo, celulas), com as
+    células já convertidas em texto sem espaços nas pontas.
+    """
+    celulas = [str(c or '').strip() for c in row]
+    primeira = celulas[0] if len(celulas) > 0 else ''
+    segunda = celulas[1] if len(celulas) > 1 else ''
+    terceira = celulas[2] if len(celulas) > 2 else ''
+    # Assinatura do cabeçalho: SEQ | GROUP | DESCRIPTION nas três primeiras colunas
+    if 'SEQ' in primeira or 'GROUP' in segunda or 'DESCRIPTION' in terceira:
+        return LINHA_CABECALHO, celulas
+
+    if primeira.isdigit() and segunda.isdigit():
+        return LINHA_CRITICA, celulas
+    if segunda.isdigit():
+        return LINHA_NORMAL, celulas
+    if primeira.isdigit():
+        return LINHA_DESLOCADA, celulas
+    return LINHA_CONTINUACAO, celulas
+
+
+def _separar_status(texto):
+    """
+    Separa (descrição, status, external task) de um texto corrido. Com mais
+    de um status no texto, vale o último; sem nenhum, a tarefa fica OPEN.
+    """
+    encontrados = STATUS_NO_TEXTO_RE.findall(texto)
+    if not encontrados:
+        return texto, STATUS_OPEN, None
+    status = encontrados[-1]
+    parts = texto.rsplit(status, 1)
+    return parts[0].strip(), status, parts[1].strip() or None
+
+
+def _tarefa_em_texto_corrido(row, celulas, inicio, procurar_ad):
+    """
+    Reconstrói uma tarefa cujas colunas vieram juntas num só texto a partir
+    da coluna `inicio` (grupo Finding, SB/ADs ou Customer Report).
+    """
+    full_text = ' '.join(
+        celula for c, celula in zip(row[inicio:], celulas[inicio:]) if c).strip()
+    group, description = "Finding", full_text
+
+    if description.startswith("SB/ADs"):
+        group = "SB/ADs"
+        description = description.replace("SB/ADs", "", 1).strip()
+    elif description.startswith("Customer Report"):
+        group = "Customer Report"
+        description = description.replace("Customer Report", "", 1).strip()
+
+    description, status, external_task = _separar_status(description)
+
+    if procurar_ad and not external_task and group == "SB/ADs":
+        match = AD_ANAC_RE.search(description)
+        if match:
+            external_task = match.group(1).strip()
+    return group, description, status, external_task
+
+
+def montar_linha_tarefa(tipo, row, celulas):
+    """
+    Linha validada [PHASE, SEQ, GROUP, DESCRIPTION, STATUS, EXTERNAL TASK,
+    ORIG] para uma linha de tarefa já classificada (crítica, normal ou
+    deslocada).
+    """
+    if tipo == LINHA_CRITICA:
+        description = celulas[2] if len(celulas) > 2 else ''
+        status = celulas[3] if len(celulas) > 3 else STATUS_OPEN
+        if status not in TODOS_STATUS and len(status) > 20:
+            description = (description + ' ' + status).strip()
+            status = STATUS_OPEN
+        elif status not in TODOS_STATUS:
+            status = STATUS_OPEN
+        return [None, celulas[1], 'Finding', description, status, celulas[0], None]
+
+    if tipo == LINHA_NORMAL:
+        if len(celulas) > 2 and celulas[2] in GRUPOS_VALIDOS:
+            return list(row)
+        group, description, status, external_task = _tarefa_em_texto_corrido(
+            row, celulas, 2, procurar_ad=True)
+        return [row[0], celulas[1], group, description, status, external_task, None]
+
+    if len(celulas) > 1 and celulas[1] in GRUPOS_VALIDOS:
+        return [None] + list(row)
+    group, description, status, external_task = _tarefa_em_texto_corrido(
+        row, celulas, 1, procurar_ad=False)
+    return [None, celulas[0], group, description, status, external_task, None]
+
+
+def texto_continuacao(celulas):
+    """Texto de uma linha de continuação, numa só linha."""
+    return ' '.join(celula.replace('\n', ' ').strip() for celula in celulas if celula)
+
+
+# --- STREAMING: Colunas dos registos de tarefa produzidos pelo extrator ---
+COLUNAS_TAREFA = ['PHASE', 'SEQ', 'GROUP', 'DESCRIPTION',
+                  'STATUS', 'EXTERNAL TASK', 'ORIG']
+
+
+def _tabelas_das_paginas(doc, paginas=None):
+    """
+    Gera, página a página, a primeira tabela encontrada em cada uma das
+    `paginas` (por omissão, da 2ª à última).
+    """
+    if paginas is None:
+        paginas = range(1, len(doc))
+    modelos = carregar_modelos() if USAR_MODELOS_LAYOUT else ()
+    for page_num in paginas:
+        page = doc[page_num]
+        if modelos:
+            with instrumentacao.etapa('modelo_layout') as medicao:
+                raw_table_data = extrair_tabela(page, modelos)
+                medicao.contar(paginas=1)
+            if raw_table_data is not None:
+                yield raw_table_data
+                continue
+
+        with instrumentacao.etapa('find_tables') as medicao:
             tables_on_page = page.find_tables()
+            medicao.contar(paginas=1)
             if not tables_on_page:
                 continue
-
             raw_table_data = tables_on_page[0].extract()
-            header_signature = ['SEQ', 'GROUP', 'DESCRIPTION']
+        yield raw_table_data
+
+
+def _tabelas_do_intervalo(caminho_pdf, inicio, fim, instrumentar=False):
+    """
+    Worker do paralelismo por página: abre o seu próprio handle do PDF e
+    devolve (tabelas das páginas [inicio, fim), estatísticas da instrumentação).
+    """
+    if instrumentar:
+        instrumentacao.ativar()
+    with fitz.open(caminho_pdf) as doc:
+        tabelas = list(_tabelas_das_paginas(doc, range(inicio, fim)))
+    return tabelas, instrumentacao.exportar_e_desativar() if instrumentar else None
+
+
+def _tabelas_em_paralelo(caminho_pdf, num_paginas, num_processos):
+    """
+    Gera as tabelas das páginas 2..num_paginas extraídas por `num_processos`
+    workers, na ordem das páginas, para que as linhas de continuação sejam
+    juntadas como na extração serial.
+    """
+    # Blocos contíguos e mais numerosos que os workers, para equilibrar a carga
+    tamanho_bloco = max(1, -(-(num_paginas - 1) // (num_processos * 4)))
+    inicios = list(range(1, num_paginas, tamanho_bloco))
+    fins = [min(i + tamanho_bloco, num_paginas) for i in inicios]
+
+    executor = ProcessPoolExecutor(max_workers=num_processos)
+    try:
+        blocos = executor.map(_tabelas_do_intervalo, [caminho_pdf] * len(inicios),
+                              inicios, fins, [instrumentacao.ativa()] * len(inicios))
+        for tabelas, estatisticas in blocos:
+            instrumentacao.incorporar(estatisticas, origem='worker')
+            yield from tabelas
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _num_processos_paginas(num_paginas):
+    """
+    Número de workers para repartir as páginas de um relatório, ou 1 quando
+    o relatório é pequeno ou já estamos num worker do pool de ficheiros.
+    """
+    if num_paginas < PAGINAS_MINIMAS_PARALELISMO or multiprocessing.parent_process() is not None:
+        return 1
+    num_processos = NUM_PROCESSOS_PAGINAS or os.cpu_count() or 1
+    return max(1, min(num_processos, num_paginas - 1))
+
+
+def _linhas_validadas(tabelas):
+    """
+    Gera os registos de tarefa normalizados (ver _normalizar_registo) a
+    partir das tabelas brutas, na ordem em que aparecem no relatório.
 
+    Só a última tarefa fica retida entre páginas, porque as linhas de
+    continuação da página seguinte ainda podem completar a sua descrição.
+    """
+    # --- CORREÇÃO DEFINITIVA (SEQ 53): Arquitetura de Validação na Fonte ---
+    # ETAPA 1: Extração Bruta e Filtro de Integridade Imediato
+    validated_rows = []
+
+    for raw_table_data in tabelas:
+        with instrumentacao.etapa('normalizacao') as medicao:
             for row in raw_table_data:
-                if any(sig in str(cell) for sig, cell in zip(header_signature, row)):
+                tipo, celulas = classificar_linha(row)
+                if tipo == LINHA_CABECALHO:
                     continue
 
-                # --- LÓGICA DE EXTRAÇÃO REVISADA E MAIS ROBUSTA ---
-                id_val = str(row[0] or '').strip() if len(row) > 0 else ''
-                seq_val_c = str(row[1] or '').strip() if len(row) > 1 else ''
-                is_critical_issue = id_val.isdigit() and seq_val_c.isdigit()
-
-                seq_val_n = str(row[1] or '').strip() if len(row) > 1 else ''
-                is_task_normal = seq_val_n.isdigit()
-
-                seq_val_s = str(row[0] or '').strip() if len(row) > 0 else ''
-                is_task_shifted = seq_val_s.isdigit()
-
-                if is_critical_issue:
-                    description = str(row[2] or '').strip() if len(
-                        row) > 2 else ''
-                    status = str(row[3] or '').strip() if len(
-                        row) > 3 else STATUS_OPEN
-
-                    if status not in ALL_STATUSES and len(status) > 20:
-                        description = (description + ' ' + status).strip()
-                        status = STATUS_OPEN
-                    elif status not in ALL_STATUSES:
-                        status = STATUS_OPEN
-
-                    normalized_row = [None, seq_val_c, 'Finding',
-                                      description, status, id_val, None]
-                    validated_rows.append(normalized_row)
-
-                elif is_task_normal:
-                    group_val = str(row[2] or '').strip() if len(
-                        row) > 2 else ''
-                    if group_val in VALID_GROUPS:
-                        validated_rows.append(list(row))
-                    else:
-                        seq = seq_val_n
-                        phase = row[0]
-                        content_cells = row[2:]
-                        full_text = ' '.join(str(c or '').strip()
-                                             for c in content_cells if c).strip()
-                        group, description, status, external_task = "Finding", full_text, STATUS_OPEN, None
-
-                        if description.startswith("SB/ADs"):
-                            group = "SB/ADs"
-                            description = description.replace(
-                                "SB/ADs", "", 1).strip()
-                        elif description.startswith("Customer Report"):
-                            group = "Customer Report"
-                            description = description.replace(
-                                "Customer Report", "", 1).strip()
-
-                        temp_desc = description
-                        for s in ALL_STATUSES:
-                            if f" {s} " in f" {temp_desc} " or temp_desc.endswith(f" {s}"):
-                                parts = temp_desc.rsplit(s, 1)
-                                description = parts[0].strip()
-                                status = s
-                                potential_et = parts[1].strip()
-                                if potential_et:
-                                    external_task = potential_et
-                                break
-
-                        if not external_task and group == "SB/ADs":
-                            match = re.search(
-                                r"(AD\s?\(ANAC\)\s?\d{4}-\d{2}-\d{2})", description)
-                            if match:
-                                external_task = match.group(1).strip()
-
-                        validated_rows.append(
-                            [phase, seq, group, description, status, external_task, None])
-
-                elif is_task_shifted and not is_critical_issue:
-                    group_val = str(row[1] or '').strip() if len(
-                        row) > 1 else ''
-                    if group_val in VALID_GROUPS:
-                        validated_rows.append([None] + list(row))
-                    else:
-                        seq = seq_val_s
-                        content_cells = row[1:]
-                        full_text = ' '.join(str(c or '').strip()
-                                             for c in content_cells if c).strip()
-                        group, description, status, external_task = "Finding", full_text, STATUS_OPEN, None
-
-                        if description.startswith("SB/ADs"):
-                            group = "SB/ADs"
-                            description = description.replace(
-                                "SB/ADs", "", 1).strip()
-                        elif description.startswith("Customer Report"):
-                            group = "Customer Report"
-                            description = description.replace(
-                                "Customer Report", "", 1).strip()
-
-                        temp_desc = description
-                        for s in ALL_STATUSES:
-                            if f" {s} " in f" {temp_desc} " or temp_desc.endswith(f" {s}"):
-                                parts = temp_desc.rsplit(s, 1)
-                                description = parts[0].strip()
-                                status = s
-                                potential_et = parts[1].strip()
-                                if potential_et:
-                                    external_task = potential_et
-                                break
-
-                        validated_rows.append(
-                            [None, seq, group, description, status, external_task, None])
+                if tipo != LINHA_CONTINUACAO:
+                    validated_rows.append(montar_linha_tarefa(tipo, row, celulas))
 
                 elif validated_rows:
-                    continuation_text = ' '.join(str(c or '').replace(
-                        '\n', ' ').strip() for c in row if c is not None and str(c).strip())
-                    is_new_task_code = re.match(
-                        r"^\d{2}-\d{2}-\d{2}-\d{3}", continuation_text.strip())
+                    continuation_text = texto_continuacao(celulas)
+                    is_new_task_code = CODIGO_TAREFA_RE.match(continuation_text)
                     is_header_text = 'PHASE SEQ GROUP' in continuation_text
 
                     if is_new_task_code or is_header_text:
@@ -210,434 +460,1302 @@ def extrair_dados_pdf_pymupdf(caminho_pdf):
                         current_description = validated_rows[-1][3]
                         validated_rows[-1][3] = (str(current_description or '') +
                                                  ' ' + continuation_text).strip()
-        doc.close()
 
+            # Liberta as tarefas já fechadas, retendo só a última
+            prontas = [r for r in map(_normalizar_registo, validated_rows[:-1])
+                       if r is not None]
+            del validated_rows[:-1]
+            medicao.contar(paginas=1, linhas=len(raw_table_data))
+        yield from prontas
+
+    yield from (r for r in map(_normalizar_registo, validated_rows)
+                if r is not None)
+
+
+def _normalizar_registo(linha):
+    """
+    Converte uma linha validada num registo {coluna: valor}, com os espaços
+    normalizados e o SEQ inteiro. Devolve None se o SEQ não for numérico.
+    """
+    linha = list(linha[:len(COLUNAS_TAREFA)])
+    linha += [None] * (len(COLUNAS_TAREFA) - len(linha))
+    # split/join equivale a trocar cada sequência de espaços por um e aparar
+    textos = [' '.join(str(valor).split()) for valor in linha]
+    try:
+        seq = int(textos[1])
+    except ValueError:
+        return None
+    registo = {coluna: '' if texto == 'nan' else texto
+               for coluna, texto in zip(COLUNAS_TAREFA, textos)}
+    registo['SEQ'] = seq
+    return registo
+
+
+def gerar_tarefas_pdf(caminho_pdf):
+    """
+    Gera os registos de tarefa ({coluna: valor}, colunas de COLUNAS_TAREFA)
+    de um relatório PDF, página a página, sem carregar o relatório inteiro
+    em memória. As linhas de continuação são juntadas à tarefa anterior
+    mesmo quando ela ficou na página anterior.
+
+    Os registos ainda não estão consolidados: o mesmo SEQ pode aparecer mais
+    de uma vez (ver extrair_dados_pdf_pymupdf). Erros de leitura do PDF são
+    propagados para quem consome o gerador.
+    """
+    with fitz.open(caminho_pdf) as doc:
+        yield from _linhas_validadas(_tabelas_das_paginas(doc))
+
+
+# --- CONSOLIDAÇÃO: Prioridades ao juntar as linhas repetidas de um mesmo SEQ ---
+PRIORIDADE_GRUPOS = ['Customer Report', 'SB/ADs', 'Planned']
+MARCADORES_DESCRICAO_SUJA = ['PHASE SEQ GROUP',
+                             'Assunto escalado', 'MATERIAL SEM PRAZO']
+MARCADORES_DESCRICAO_RE = '|'.join(
+    re.escape(m) for m in MARCADORES_DESCRICAO_SUJA)
+
+
+def consolidar_tarefas(df_registos):
+    """
+    Junta as linhas com o mesmo SEQ numa só tarefa, ordenadas por SEQ:
+      - GROUP: Customer Report, depois SB/ADs, depois Planned; senão o da
+        primeira linha
+      - DESCRIPTION: a mais curta sem marcadores de texto espúrio; se todas
+        os tiverem, a mais longa (em empate, a que aparece primeiro)
+      - restantes colunas: o primeiro valor
+    As escolhas são feitas com colunas auxiliares e sort_values +
+    drop_duplicates, sem funções Python por grupo.
+    """
+    df = df_registos.reset_index(drop=True)
+    ordem = np.arange(len(df))
+    colunas_primeiro = [
+        c for c in df.columns if c not in ('SEQ', 'GROUP', 'DESCRIPTION')]
+    df_final = df.groupby('SEQ', as_index=False)[colunas_primeiro].first()
+
+    if 'GROUP' in df.columns:
+        # Códigos da categoria: 0 = maior prioridade; fora da lista = -1
+        codigos = pd.Categorical(
+            df['GROUP'], categories=PRIORIDADE_GRUPOS).codes
+        prioridade = np.where(codigos < 0, len(PRIORIDADE_GRUPOS), codigos)
+        escolhidos = (pd.DataFrame({'SEQ': df['SEQ'], 'GROUP': df['GROUP'],
+                                    '_prioridade': prioridade, '_ordem': ordem})
+                      .sort_values(['SEQ', '_prioridade', '_ordem'])
+                      .drop_duplicates('SEQ'))
+        df_final['GROUP'] = df_final['SEQ'].map(
+            escolhidos.set_index('SEQ')['GROUP'])
+
+    if 'DESCRIPTION' in df.columns:
+        descricao = df['DESCRIPTION'].fillna('').astype(str).str.strip()
+        suja = descricao.str.contains(MARCADORES_DESCRICAO_RE, regex=True)
+        comprimento = descricao.str.len()
+        escolhidos = (pd.DataFrame({'SEQ': df['SEQ'], 'DESCRIPTION': descricao,
+                                    '_vazia': descricao == '', '_suja': suja,
+                                    # Limpas: a mais curta primeiro; sujas: a mais longa
+                                    '_comprimento': comprimento.where(~suja, -comprimento),
+                                    '_ordem': ordem})
+                      .sort_values(['SEQ', '_vazia', '_suja', '_comprimento', '_ordem'])
+                      .drop_duplicates('SEQ'))
+        df_final['DESCRIPTION'] = df_final['SEQ'].map(
+            escolhidos.set_index('SEQ')['DESCRIPTION'])
+
+    colunas = [c for c in COLUNAS_TAREFA if c in df.columns]
+    return df_final.reindex(columns=colunas)
+
+
+def extrair_dados_pdf_pymupdf(caminho_pdf):
+    """
+    Extrai dados de tabelas de um PDF usando a arquitetura robusta do PyMuPDF,
+    projetada para lidar com tabelas que se estendem por várias páginas.
+    O documento é aberto uma única vez para o cabeçalho e para as tabelas.
+    """
+    dados_cabecalho = {"report_date": None}
+    try:
+        doc = fitz.open(caminho_pdf)
+    except Exception as e:
+        print(
+            f"Aviso: Não foi possível ler o cabeçalho do PDF. Erro: {e}. Usando data atual.")
+        dados_cabecalho["report_date"] = datetime.now()
+        print(f"Erro ao extrair tabelas com PyMuPDF: {e}")
+        return dados_cabecalho, pd.DataFrame()
+
+    try:
+        with instrumentacao.etapa('cabecalho') as medicao:
+            text_page_one = doc[0].get_text()
+            report_date = ler_data_relatorio(text_page_one)
+            dados_cabecalho["report_date"] = report_date or datetime.now()
+            medicao.contar(paginas=1)
+
+    except Exception as e:
+        print(
+            f"Aviso: Não foi possível ler o cabeçalho do PDF. Erro: {e}. Usando data atual.")
+        dados_cabecalho["report_date"] = datetime.now()
+
+    try:
+        with doc:
+            num_processos = _num_processos_paginas(len(doc))
+            if num_processos > 1:
+                tabelas = _tabelas_em_paralelo(
+                    caminho_pdf, len(doc), num_processos)
+            else:
+                tabelas = _tabelas_das_paginas(doc)
+            registos = list(_linhas_validadas(tabelas))
     except Exception as e:
         print(f"Erro ao extrair tabelas com PyMuPDF: {e}")
         return dados_cabecalho, pd.DataFrame()
 
-    if not validated_rows:
+    if not registos:
         return dados_cabecalho, pd.DataFrame()
 
-    colunas = ['PHASE', 'SEQ', 'GROUP', 'DESCRIPTION',
-               'STATUS', 'EXTERNAL TASK', 'ORIG']
-    df_final = pd.DataFrame(validated_rows)
-
-    num_cols_to_assign = min(len(df_final.columns), len(colunas))
-    df_final = df_final.iloc[:, :num_cols_to_assign]
-    df_final.columns = colunas[:num_cols_to_assign]
-
-    if df_final.empty:
-        return dados_cabecalho, df_final
-
-    original_cols = [col for col in colunas if col in df_final.columns]
-
-    for col in original_cols:
-        if df_final[col].dtype == 'object':
-            df_final[col] = df_final[col].astype(str).str.replace(
-                r'\s+', ' ', regex=True).str.strip().replace('nan', '')
-
-    df_final['SEQ'] = pd.to_numeric(df_final['SEQ'], errors='coerce')
-    df_final.dropna(subset=['SEQ'], inplace=True)
-    df_final['SEQ'] = df_final['SEQ'].astype(int)
-
-    def prioritize_group(series):
-        if 'Customer Report' in series.values:
-            return 'Customer Report'
-        if 'SB/ADs' in series.values:
-            return 'SB/ADs'
-        if 'Planned' in series.values:
-            return 'Planned'
-        return series.iloc[0]
-
-    def prioritize_description(series):
-        descriptions = pd.Series(series).str.strip().dropna().unique()
-        descriptions = [d for d in descriptions if d]
-        if not descriptions:
-            return ""
-        clean_descriptions = [
-            d for d in descriptions if 'PHASE SEQ GROUP' not in d and 'Assunto escalado' not in d and 'MATERIAL SEM PRAZO' not in d]
-        if clean_descriptions:
-            return min(clean_descriptions, key=len)
-        return max(descriptions, key=len)
-
-    agg_dict = {'PHASE': 'first', 'GROUP': prioritize_group, 'DESCRIPTION': prioritize_description,
-                'STATUS': 'first', 'EXTERNAL TASK': 'first', 'ORIG': 'first'}
-    agg_dict_filtered = {k: v for k,
-                         v in agg_dict.items() if k in df_final.columns}
-    df_final = df_final.groupby('SEQ', as_index=False).agg(agg_dict_filtered)
-    df_final = df_final.reindex(columns=original_cols)
-    df_final.loc[df_final['STATUS'] == '', 'STATUS'] = STATUS_WAIT_APPROVAL
+    with instrumentacao.etapa('consolidacao') as medicao:
+        df_final = consolidar_tarefas(
+            pd.DataFrame.from_records(registos, columns=COLUNAS_TAREFA))
+        df_final.loc[df_final['STATUS'] == '', 'STATUS'] = STATUS_WAIT_APPROVAL
+        medicao.contar(linhas=len(registos))
     return dados_cabecalho, df_final
 
 
-if __name__ == "__main__":
-    nome_pasta_relatorios = 'Relatorios_PDF'
-    if not os.path.isdir(nome_pasta_relatorios):
-        print(f"❌ ERRO: A pasta '{nome_pasta_relatorios}' não foi encontrada.")
-        sys.exit()
+def _extrair_com_instrumentacao(caminho_pdf):
+    """
+    Versão de `extrair_dados_pdf_pymupdf` para os workers do pool: mede a
+    extração no worker e devolve as estatísticas junto com o resultado, para
+    que o processo principal as some às suas.
+    """
+    instrumentacao.ativar()
+    resultado = extrair_dados_pdf_pymupdf(caminho_pdf)
+    return resultado, instrumentacao.exportar_e_desativar()
 
-    arquivos_candidatos = [os.path.join(nome_pasta_relatorios, f) for f in os.listdir(
-        nome_pasta_relatorios) if f.lower().startswith('customer_report') and f.lower().endswith('.pdf')]
-    if not arquivos_candidatos:
-        print(
-            f"❌ ERRO: Nenhum ficheiro PDF 'Customer_Report' encontrado na pasta '{nome_pasta_relatorios}'.")
-        sys.exit()
 
-    arquivos_ordenados = sorted(arquivos_candidatos, key=os.path.getmtime)
-    print(
-        f"📄 Encontrados {len(arquivos_ordenados)} relatórios para processar.")
-    nome_arquivo_mestre = 'Dashboard_Mestre.xlsx'
-    ids_antigos = set()
+def _incorporar_estatisticas(resultados_medidos):
+    for resultado, estatisticas in resultados_medidos:
+        instrumentacao.incorporar(estatisticas, origem='worker')
+        yield resultado
 
-    if os.path.exists(nome_arquivo_mestre):
-        print(
-            f"📖 Verificando o ficheiro mestre existente: '{nome_arquivo_mestre}'")
-        try:
-            df_antigo = pd.read_excel(
-                nome_arquivo_mestre, sheet_name='Dashboard', skiprows=11)
-            if 'SEQ' in df_antigo.columns:
-                df_antigo['SEQ'] = pd.to_numeric(
-                    df_antigo['SEQ'], errors='coerce')
-                df_antigo.dropna(subset=['SEQ'], inplace=True)
-                df_antigo['SEQ'] = df_antigo['SEQ'].astype(int)
-                ids_antigos = set(df_antigo['SEQ'].astype(str))
-                print(
-                    f"   -> {len(ids_antigos)} tarefas encontradas na versão anterior.")
-        except Exception as e:
+
+def extrair_relatorios(arquivos_pdf, num_processos=NUM_PROCESSOS_EXTRACAO, cache=None, hashes=None):
+    """
+    Extrai os PDFs num pool de processos e devolve os resultados
+    (dados_cabecalho, df) na mesma ordem de `arquivos_pdf`, para que a
+    mesclagem cronológica produza o mesmo mestre que o modo serial.
+    Com um `CacheExtracao`, os PDFs já extraídos são lidos do cache e só os
+    restantes passam pelo `find_tables`. `hashes` ({arquivo: sha256}) evita
+    recalcular hashes já conhecidos.
+    """
+    resultados_cache = {}
+    hashes = dict(hashes or {})
+    if cache is not None:
+        for arquivo_pdf in arquivos_pdf:
+            if arquivo_pdf not in hashes:
+                hashes[arquivo_pdf] = calcular_sha256(arquivo_pdf)
+            resultado = cache.obter(hashes[arquivo_pdf])
+            if resultado is not None:
+                resultados_cache[arquivo_pdf] = resultado
+        if resultados_cache:
             print(
-                f"   -> Aviso: Não foi possível ler o ficheiro mestre anterior: {e}.")
+                f"💾 {len(resultados_cache)} de {len(arquivos_pdf)} relatórios carregados do cache.")
 
-    df_mestre = pd.DataFrame()
-    print("✨ Criando novo dashboard...")
+    arquivos_a_extrair = [
+        a for a in arquivos_pdf if a not in resultados_cache]
 
-    data_ultimo_relatorio = None
+    if num_processos is None:
+        num_processos = os.cpu_count() or 1
+    num_processos = max(1, min(num_processos, len(arquivos_a_extrair)))
 
-    for arquivo_pdf in arquivos_ordenados:
-        print(f"\n--- Processando: '{os.path.basename(arquivo_pdf)}' ---")
-        dados_cabecalho, df_novo = extrair_dados_pdf_pymupdf(arquivo_pdf)
-        if df_novo.empty:
-            print(
-                f"⚠️ Nenhuma tarefa encontrada em '{os.path.basename(arquivo_pdf)}'.")
-            continue
+    executor = None
+    if num_processos == 1:
+        extraidos = map(extrair_dados_pdf_pymupdf, arquivos_a_extrair)
+    else:
+        print(f"⚙️ Extraindo PDFs com {num_processos} processos em paralelo...")
+        executor = ProcessPoolExecutor(max_workers=num_processos)
+        # executor.map preserva a ordem de entrada, independentemente de
+        # qual processo termina primeiro.
+        if instrumentacao.ativa():
+            extraidos = _incorporar_estatisticas(executor.map(
+                _extrair_com_instrumentacao, arquivos_a_extrair))
+        else:
+            extraidos = executor.map(
+                extrair_dados_pdf_pymupdf, arquivos_a_extrair)
+
+    try:
+        for arquivo_pdf in arquivos_pdf:
+            if arquivo_pdf in resultados_cache:
+                yield resultados_cache.pop(arquivo_pdf)
+                continue
+            resultado = next(extraidos)
+            # Extrações vazias não são guardadas: podem resultar de erros
+            # transitórios de leitura e devem ser repetidas na próxima execução.
+            if cache is not None and not resultado[1].empty:
+                cache.guardar(hashes[arquivo_pdf], resultado)
+            yield resultado
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+# --- ESQUEMA DO MESTRE: tipos compactos das colunas ---
+# SEQ (int32) é a chave das tarefas; as colunas com poucos valores distintos
+# são categóricas e as datas ficam guardadas uma só vez, em datetime64.
+COLUNAS_CATEGORICAS = ['STATUS', 'GROUP', 'ORIG']
+COLUNAS_DATA_MESTRE = ['Data Abertura',
+                       'Data Fechamento', 'Última Atualização']
+
+
+def aplicar_esquema_mestre(df_mestre):
+    """
+    Converte o mestre (ou as tarefas novas de um relatório) para o esquema
+    compacto. Remove o UniqueID de estados gravados por versões anteriores.
+    """
+    if df_mestre.empty:
+        return df_mestre
+    df_mestre = df_mestre.drop(columns=['UniqueID'], errors='ignore')
+    df_mestre['SEQ'] = df_mestre['SEQ'].astype('int32')
+    for col in COLUNAS_CATEGORICAS:
+        if col in df_mestre.columns:
+            df_mestre[col] = df_mestre[col].astype('category')
+    for col in COLUNAS_DATA_MESTRE:
+        if col in df_mestre.columns:
+            df_mestre[col] = pd.to_datetime(df_mestre[col], errors='coerce')
+    return df_mestre
+
+
+def _garantir_categorias(df, col, valores):
+    """Acrescenta às categorias de `col` os `valores` que ainda não existam."""
+    novas = pd.Index(pd.unique(np.asarray(valores, dtype=object))).dropna().difference(
+        df[col].cat.categories)
+    if len(novas):
+        df[col] = df[col].cat.add_categories(novas)
+
+
+def _unir_categorias(df_mestre, df_novas):
+    """Põe as mesmas categorias nos dois DataFrames, para o concat as manter."""
+    for col in COLUNAS_CATEGORICAS:
+        if col in df_mestre.columns and col in df_novas.columns:
+            categorias = df_mestre[col].cat.categories.union(
+                df_novas[col].cat.categories)
+            df_mestre[col] = df_mestre[col].cat.set_categories(categorias)
+            df_novas[col] = df_novas[col].cat.set_categories(categorias)
+
+
+def mesclar_relatorio_no_mestre(df_mestre, df_novo, data_relatorio):
+    """
+    Aplica um relatório (df_novo) ao mestre, seguindo as regras de transição
+    de status (fechamento, replanejamento, retirada e reabertura), e devolve
+    o mestre atualizado.
+
+    A mesclagem é feita por conjuntos sobre o SEQ (sem iterar linha a
+    linha), pelo que o custo cresce linearmente com o tamanho do mestre e do
+    relatório. Assume SEQs únicos em df_novo, como garante o groupby por SEQ
+    da extração. O mestre devolvido segue o esquema de aplicar_esquema_mestre.
+    """
+    status_pausados = [STATUS_POSTPONED, STATUS_REPLANEJADO]
 
-        data_relatorio = dados_cabecalho['report_date']
-        data_ultimo_relatorio = data_relatorio
-        df_novo['UniqueID'] = df_novo['SEQ'].astype(str)
-
-        if not df_mestre.empty:
-            ids_mestre = set(df_mestre['UniqueID'])
-            ids_novo = set(df_novo['UniqueID'])
-            ids_retirados = ids_mestre - ids_novo
-            is_already_handled = df_mestre['STATUS'].isin(
-                [STATUS_CLOSED, STATUS_RETIRADA])
-            idx_retirados = df_mestre['UniqueID'].isin(
-                ids_retirados) & ~is_already_handled
-            if idx_retirados.any():
-                df_mestre.loc[idx_retirados, 'STATUS'] = STATUS_RETIRADA
-                df_mestre.loc[idx_retirados,
+    if df_mestre.empty:
+        ja_existe = pd.Series(False, index=df_novo.index)
+    else:
+        ja_existe = df_novo['SEQ'].isin(df_mestre['SEQ'])
+        presente_no_novo = df_mestre['SEQ'].isin(df_novo['SEQ'])
+
+        # --- Tarefas que sumiram do relatório: RETIRADA ---
+        is_already_handled = df_mestre['STATUS'].isin(
+            [STATUS_CLOSED, STATUS_RETIRADA])
+        idx_retirados = ~presente_no_novo & ~is_already_handled
+        if idx_retirados.any():
+            _garantir_categorias(df_mestre, 'STATUS', [STATUS_RETIRADA])
+            df_mestre.loc[idx_retirados, 'STATUS'] = STATUS_RETIRADA
+            df_mestre.loc[idx_retirados,
+                          'Data Fechamento'] = data_relatorio
+
+        # --- Tarefas já conhecidas: atualização indexada pelo SEQ ---
+        if presente_no_novo.any():
+            idx_mestre = df_mestre.index[presente_no_novo]
+            df_atualizacao = df_novo.set_index('SEQ').loc[
+                df_mestre.loc[idx_mestre, 'SEQ']]
+
+            status_antigo = df_mestre.loc[idx_mestre, 'STATUS'].to_numpy()
+            status_novo = df_atualizacao['STATUS'].to_numpy()
+            sem_data_fechamento = df_mestre.loc[idx_mestre,
+                                                'Data Fechamento'].isna().to_numpy()
+
+            is_paused_novo = pd.Series(status_novo).isin(
+                status_pausados).to_numpy()
+            was_not_paused_before = ~pd.Series(status_antigo).isin(
+                status_pausados).to_numpy()
+            is_closed_novo = status_novo == STATUS_CLOSED
+
+            fechar = sem_data_fechamento & (
+                (is_paused_novo & was_not_paused_before) | is_closed_novo)
+            reabrir = ~sem_data_fechamento & ~is_closed_novo & ~is_paused_novo
+
+            for col in ['STATUS', 'DESCRIPTION', 'EXTERNAL TASK', 'GROUP']:
+                if col in COLUNAS_CATEGORICAS:
+                    _garantir_categorias(df_mestre, col, df_atualizacao[col])
+                df_mestre.loc[idx_mestre, col] = df_atualizacao[col].to_numpy()
+            if fechar.any():
+                df_mestre.loc[idx_mestre[fechar],
                               'Data Fechamento'] = data_relatorio
+            if reabrir.any():
+                df_mestre.loc[idx_mestre[reabrir], 'Data Fechamento'] = pd.NaT
+
+    # --- Tarefas novas: um único concat por relatório ---
+    df_novas = df_novo.loc[~ja_existe].copy()
+    if not df_novas.empty:
+        df_novas['Data Abertura'] = data_relatorio
+        df_novas['Última Atualização'] = data_relatorio
+        df_novas['Data Fechamento'] = pd.Series(
+            data_relatorio, index=df_novas.index).where(df_novas['STATUS'] == STATUS_CLOSED)
+        df_novas = aplicar_esquema_mestre(df_novas)
+        if df_mestre.empty:
+            df_mestre = df_novas.reset_index(drop=True)
+        else:
+            _unir_categorias(df_mestre, df_novas)
+            df_mestre = pd.concat([df_mestre, df_novas], ignore_index=True)
+
+    return df_mestre
+
+
+def calcular_resumo(df_mestre):
+    """Contagens de status e progresso exibidos no sumário do dashboard."""
+    total_tarefas = len(df_mestre)
+    contagens = df_mestre['STATUS'].value_counts()
+    count_fechadas = int(contagens.get(STATUS_CLOSED, 0))
+    count_retiradas = int(contagens.get(STATUS_RETIRADA, 0))
+    count_nao_aprov = int(contagens.get(STATUS_WAIT_APPROVAL, 0))
+    count_replanejadas = int(contagens.get(STATUS_POSTPONED, 0)) + \
+        int(contagens.get(STATUS_REPLANEJADO, 0))
+    count_abertas = int(contagens.get(STATUS_OPEN, 0))
+    percentual_conclusao = (
+        count_fechadas + count_retiradas) / total_tarefas if total_tarefas > 0 else 0
+    return {
+        'percentual_conclusao': percentual_conclusao,
+        'fechadas': count_fechadas,
+        'retiradas': count_retiradas,
+        'abertas': count_abertas,
+        'nao_aprovadas': count_nao_aprov,
+        'replanejadas': count_replanejadas,
+        'total': total_tarefas,
+    }
+
+
+# --- ANÁLISE HISTÓRICA: Evolução por relatório, a partir do histórico de tarefas ---
+def calcular_evolucao(df_historico):
+    """
+    Contagens por data de relatório, numa só passagem sobre a matriz
+    relatórios x SEQ do histórico, com as mesmas regras da mesclagem:
+      - Fechadas: CLOSED no relatório, ou CLOSED quando saíram dele
+      - Retiradas: já vistas, ausentes do relatório e não fechadas
+      - Abertas: presentes com qualquer outro STATUS
+    e o throughput de cada relatório (novas, fechadas e retiradas face ao
+    anterior, e fechadas por dia desde o relatório anterior).
+    """
+    df = (df_historico.sort_values('data_relatorio', kind='stable')
+          .drop_duplicates(['data_relatorio', 'seq'], keep='last'))
+    datas, linha = np.unique(df['data_relatorio'].to_numpy(), return_inverse=True)
+    _, coluna = np.unique(df['seq'].to_numpy(), return_inverse=True)
+
+    presente = np.zeros((len(datas), coluna.max() + 1 if len(df) else 0), dtype=bool)
+    fechada_no_relatorio = np.zeros_like(presente)
+    presente[linha, coluna] = True
+    fechada_no_relatorio[linha, coluna] = (df['status'] == STATUS_CLOSED).to_numpy()
+
+    # Último relatório em que cada tarefa apareceu (0 antes da primeira vez)
+    indices = np.arange(len(datas))[:, None]
+    ultimo = np.maximum.accumulate(np.where(presente, indices, 0), axis=0)
+    vista = np.logical_or.accumulate(presente, axis=0)
+    fechada_ao_sair = np.take_along_axis(fechada_no_relatorio, ultimo, axis=0)
+
+    fechada = np.where(presente, fechada_no_relatorio, vista & fechada_ao_sair)
+    retirada = vista & ~presente & ~fechada_ao_sair
+    aberta = presente & ~fechada_no_relatorio
+
+    def _antes(matriz):
+        return np.vstack([np.zeros_like(matriz[:1]), matriz[:-1]])
+
+    datas = pd.to_datetime(datas)
+    fechadas_no_relatorio = (fechada & ~_antes(fechada)).sum(axis=1)
+    dias = pd.Series(datas).diff().dt.days.to_numpy()
+    evolucao = pd.DataFrame({
+        'Data do Relatório': datas,
+        'Abertas': aberta.sum(axis=1),
+        'Fechadas': fechada.sum(axis=1),
+        'Retiradas': retirada.sum(axis=1),
+        'Total': vista.sum(axis=1),
+    })
+    throughput = pd.DataFrame({
+        'Data do Relatório': datas,
+        'Novas': (vista & ~_antes(vista)).sum(axis=1),
+        'Fechadas no Relatório': fechadas_no_relatorio,
+        'Retiradas no Relatório': (retirada & ~_antes(retirada)).sum(axis=1),
+        'Dias desde o Anterior': dias,
+        'Fechadas por Dia': np.round(fechadas_no_relatorio / np.where(dias > 0, dias, np.nan), 2),
+    })
+    return evolucao, throughput
+
+
+def calcular_dias_por_grupo(df_mestre):
+    """Número de tarefas e média de 'Dias em Aberto' por GROUP (mestre preparado)."""
+    por_grupo = (df_mestre.assign(_em_aberto=df_mestre['Data Fechamento'].isna())
+                 .groupby('GROUP', observed=True)
+                 .agg(tarefas=('SEQ', 'size'), abertas=('_em_aberto', 'sum'),
+                      media=('Dias em Aberto', 'mean')))
+    return pd.DataFrame({
+        'GROUP': por_grupo.index.astype(str),
+        'Tarefas': por_grupo['tarefas'].to_numpy(),
+        'Em Aberto': por_grupo['abertas'].to_numpy(),
+        'Média de Dias em Aberto': por_grupo['media'].astype(float).round(1).to_numpy(),
+    })
+
+
+def calcular_analise(df_historico, df_mestre):
+    """DataFrames das folhas de análise, indexados pela chave usada em FOLHAS_ANALISE."""
+    analise = {'dias_por_grupo': calcular_dias_por_grupo(df_mestre)}
+    if not df_historico.empty:
+        analise['evolucao'], analise['throughput'] = calcular_evolucao(
+            df_historico)
+    return analise
+
+
+def preparar_mestre(df_mestre, data_ultimo_relatorio, ids_antigos):
+    """
+    Completa o mestre mesclado para o dashboard: última atualização, tarefas
+    novas face ao ficheiro anterior, colunas de data e dias em aberto.
+    """
+    if data_ultimo_relatorio is not None:
+        df_mestre['Última Atualização'] = data_ultimo_relatorio
+
+    idx_closed_no_date = (df_mestre['STATUS'] == STATUS_CLOSED) & (
+        df_mestre['Data Fechamento'].isna())
+    if idx_closed_no_date.any():
+        df_mestre.loc[idx_closed_no_date,
+                      'Data Fechamento'] = df_mestre.loc[idx_closed_no_date, 'Última Atualização']
+
+    # ids_antigos: SEQs (int) presentes no ficheiro mestre anterior
+    df_mestre['is_new'] = ~df_mestre['SEQ'].isin(ids_antigos)
+
+    # Sem data de fecho, os dias em aberto contam até hoje
+    data_fim = df_mestre['Data Fechamento'].fillna(pd.Timestamp(datetime.now()))
+    df_mestre['Dias em Aberto'] = (
+        data_fim - df_mestre['Data Abertura']).dt.days.astype('Int64')
+
+    df_mestre.sort_values(by='SEQ', inplace=True)
+    df_mestre.reset_index(drop=True, inplace=True)
+    return df_mestre
+
+
+def montar_tabela_excel(df_mestre):
+    """Colunas exibidas no dashboard, com o texto de Replanejado/Retirada."""
+    colunas_finais = ['GROUP', 'SEQ', 'DESCRIPTION', 'STATUS', 'EXTERNAL TASK', 'ORIG',
+                      'Data Abertura', 'Data Fechamento', 'Última Atualização', 'Dias em Aberto']
+    df_mestre_excel = df_mestre[colunas_finais].copy()
+    df_mestre_excel['Data Fechamento'] = df_mestre_excel['Data Fechamento'].astype(
+        object)
+    idx_replanejado = df_mestre_excel['STATUS'].isin(
+        [STATUS_POSTPONED, STATUS_REPLANEJADO])
+    # A exibição no Excel agora usará a 'Data Fechamento' que foi definida corretamente
+    df_mestre_excel.loc[idx_replanejado, 'Data Fechamento'] = df_mestre.loc[idx_replanejado, 'Data Fechamento'].apply(
+        lambda x: f"Replanejado em {x.strftime('%d/%m/%Y')}" if pd.notna(x) else "Replanejado")
+    idx_retiradas = df_mestre_excel['STATUS'] == STATUS_RETIRADA
+    df_mestre_excel.loc[idx_retiradas, 'Data Fechamento'] = df_mestre.loc[idx_retiradas, 'Data Fechamento'].apply(
+        lambda x: f"Retirada em {x.strftime('%d/%m/%Y')}" if pd.notna(x) else "Retirada")
+    return df_mestre_excel
+
+
+# --- LAYOUT DO DASHBOARD: partilhado pelos dois motores de escrita ---
+# (rótulo, chave em calcular_resumo, cor da fonte do rótulo)
+ITENS_RESUMO = [
+    ('📈 Progresso Geral:', 'percentual_conclusao', None),
+    ('✅ Tarefas Fechadas:', 'fechadas', '00B050'),
+    ('❌ Tarefas Retiradas:', 'retiradas', 'C00000'),
+    ('📋 Tarefas Abertas:', 'abertas', '0070C0'),
+    ('⏳ Não Aprovadas:', 'nao_aprovadas', '9C6500'),
+    ('🔄 Tarefas Replanejadas:', 'replanejadas', '008B8B'),
+    ('🎯 Total de Tarefas:', 'total', None),
+]
+LEGENDA_CORES = [
+    ("Tarefa Retirada", "C00000"), ("Tarefa Fechada", "00B050"),
+    ("Aguardando Aprovação", "FFFF00"), ("Tarefa Aberta", "ADD8E6"),
+    (f"Tarefa {STATUS_REPLANEJADO.capitalize()}",
+     "00FFFF"), ("Nova Tarefa", "FA8072"),
+    (f"Descrição Similar (>={LIMITE_SIMILARIDADE}%)", "4B0082")
+]
+LARGURAS_COLUNAS = [25.5, 15, 60, 25, 30, 20, 20, 25, 20, 15]
+# Colunas (0-based) com datas: 'Data Abertura', 'Data Fechamento', 'Última Atualização'
+COLUNAS_DATA_EXCEL = {6, 7, 8}
+LINHA_CABECALHO_TABELA = 12
+# Folhas de análise: (nome da folha, chave em calcular_analise, colunas no
+# gráfico, tipo de gráfico, título). A 1.ª coluna de cada tabela é o eixo.
+FOLHAS_ANALISE = [
+    ('Burn-down', 'evolucao', ['Abertas', 'Fechadas', 'Retiradas'], 'line',
+     'Tarefas abertas, fechadas e retiradas por relatório'),
+    ('Throughput', 'throughput', ['Novas', 'Fechadas no Relatório', 'Retiradas no Relatório'], 'column',
+     'Tarefas novas, fechadas e retiradas em cada relatório'),
+    ('Dias por Grupo', 'dias_por_grupo', ['Média de Dias em Aberto'], 'bar',
+     'Média de dias em aberto por GROUP'),
+]
+LARGURA_COLUNAS_ANALISE = 22
+# Folha do resumo da frota (<mestre>_Frota.xlsx), no formato de FOLHAS_ANALISE
+FOLHAS_FROTA = [
+    ('Frota', 'frota', ['Abertas', 'Fechadas', 'Retiradas'], 'column',
+     'Tarefas abertas, fechadas e retiradas por nº de relatório'),
+]
+
+
+def _folhas_analise(analise, folhas=FOLHAS_ANALISE):
+    """Itens de `folhas` com tabela não vazia, com o respetivo DataFrame."""
+    for nome, chave, series, tipo, titulo in folhas:
+        df = (analise or {}).get(chave)
+        if df is not None and not df.empty:
+            yield nome, df, series, tipo, titulo
+
+
+def _escrever_analise_openpyxl(writer, analise, folhas=FOLHAS_ANALISE):
+    """Acrescenta as folhas de análise, com gráficos nativos, ao ExcelWriter."""
+    for nome, df, series, tipo, titulo in _folhas_analise(analise, folhas):
+        df.to_excel(writer, sheet_name=nome, index=False)
+        worksheet = writer.sheets[nome]
+        ultima_linha = len(df) + 1
+        for idx, coluna in enumerate(df.columns, start=1):
+            if pd.api.types.is_datetime64_any_dtype(df[coluna]):
+                for (cell,) in worksheet.iter_rows(min_row=2, max_row=ultima_linha, min_col=idx, max_col=idx):
+                    cell.number_format = 'dd/mm/yyyy'
+
+        grafico = LineChart() if tipo == 'line' else BarChart()
+        if tipo != 'line':
+            grafico.type = 'bar' if tipo == 'bar' else 'col'
+        grafico.title = titulo
+        grafico.width, grafico.height = 24, 12
+        for serie in series:
+            coluna = df.columns.get_loc(serie) + 1
+            grafico.add_data(Reference(worksheet, min_col=coluna, min_row=1,
+                                       max_row=ultima_linha), titles_from_data=True)
+        grafico.set_categories(
+            Reference(worksheet, min_col=1, min_row=2, max_row=ultima_linha))
+        worksheet.add_chart(
+            grafico, f"{get_column_letter(len(df.columns) + 2)}2")
+        for idx in range(len(df.columns)):
+            worksheet.column_dimensions[get_column_letter(
+                idx + 1)].width = LARGURA_COLUNAS_ANALISE
+
+
+def _escrever_analise_xlsxwriter(workbook, analise, folhas=FOLHAS_ANALISE):
+    """Acrescenta as folhas de análise, com gráficos nativos, ao workbook."""
+    formato_cabecalho = workbook.add_format(
+        {'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#215C98', 'border': 1, 'align': 'center'})
+    formato_data = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+    for nome, df, series, tipo, titulo in _folhas_analise(analise, folhas):
+        worksheet = workbook.add_worksheet(nome)
+        worksheet.set_column(0, len(df.columns) - 1, LARGURA_COLUNAS_ANALISE)
+        for col, coluna in enumerate(df.columns):
+            worksheet.write_string(0, col, coluna, formato_cabecalho)
+        for linha, valores in enumerate(df.itertuples(index=False, name=None), start=1):
+            for col, valor in enumerate(valores):
+                if valor is None or valor is pd.NaT or (isinstance(valor, float) and valor != valor):
+                    worksheet.write_blank(linha, col, None)
+                elif isinstance(valor, datetime):
+                    worksheet.write_datetime(linha, col, valor, formato_data)
+                else:
+                    worksheet.write(linha, col, valor)
+
+        grafico = workbook.add_chart({'type': tipo})
+        for serie in series:
+            coluna = df.columns.get_loc(serie)
+            grafico.add_series({'name': [nome, 0, coluna],
+                                'categories': [nome, 1, 0, len(df), 0],
+                                'values': [nome, 1, coluna, len(df), coluna]})
+        grafico.set_title({'name': titulo})
+        grafico.set_size({'width': 900, 'height': 450})
+        worksheet.insert_chart(1, len(df.columns) + 1, grafico)
+
+
+def salvar_dashboard_openpyxl(caminho_arquivo, df_mestre_excel, is_new_series, indices_para_colorir, resumo, analise=None):
+    """Escreve o dashboard mestre com openpyxl, estilizando célula a célula."""
+    with pd.ExcelWriter(caminho_arquivo, engine='openpyxl') as writer:
+        df_mestre_excel.to_excel(
+            writer, sheet_name='Dashboard', startrow=LINHA_CABECALHO_TABELA - 1, index=False)
+        worksheet = writer.sheets['Dashboard']
+
+        # --- CABEÇALHO ---
+        font_titulo = Font(name='Roboto', size=16,
+                           bold=True, color='FFFFFF')
+        fill_titulo = PatternFill(
+            start_color='215C98', end_color='215C98', fill_type='solid')
+        align_center = Alignment(
+            horizontal='center', vertical='center')
+        align_left = Alignment(horizontal='left', vertical='center')
+        align_right = Alignment(horizontal='right', vertical='center')
+        borda_fina = Border(left=Side(style='thin'), right=Side(
+            style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+
+        worksheet.merge_cells('A1:C1')
+        cell_titulo = worksheet['A1']
+        cell_titulo.value = 'Dashboard Mestre de Acompanhamento de Tarefas'
+        cell_titulo.font = font_titulo
+        cell_titulo.fill = fill_titulo
+        cell_titulo.alignment = align_center
+
+        worksheet.merge_cells('A2:C2')
+        cell_timestamp = worksheet['A2']
+        cell_timestamp.value = f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+        cell_timestamp.font = Font(
+            name='Roboto', size=9, italic=True, color='808080')
+        cell_timestamp.alignment = align_center
+
+        # --- SUMÁRIO COM ÍCONES COLORIDOS ---
+        font_label_default = Font(name='Roboto', size=11, bold=True)
+        for i, (label, chave, cor) in enumerate(ITENS_RESUMO):
+            label_cell = worksheet[f'A{4+i}']
+            label_cell.value = label
+            label_cell.font = Font(
+                name='Roboto', size=11, bold=True, color=cor) if cor else font_label_default
+            label_cell.alignment = align_left
+
+            value_cell = worksheet[f'B{4+i}']
+            value_cell.value = resumo[chave]
+            value_cell.font = font_label_default
+            value_cell.alignment = align_right
+
+        worksheet['B4'].number_format = '0.00%'
+        worksheet.conditional_formatting.add('B4', DataBarRule(
+            start_type='num', start_value=0, end_type='num', end_value=1, color="00B050", showValue=True))
+
+        # --- LEGENDA DE CORES ---
+        worksheet['D2'].value = "Legenda de Cores:"
+        worksheet['D2'].font = Font(
+            name='Roboto', size=11, bold=True, underline="single")
+        worksheet['D2'].alignment = align_left
+        for i, (label, color_hex) in enumerate(LEGENDA_CORES):
+            worksheet[f'D{3+i}'].value = label
+            worksheet[f'D{3+i}'].font = Font(name='Roboto', size=10)
+            worksheet[f'E{3+i}'].fill = PatternFill(
+                start_color=color_hex, end_color=color_hex, fill_type="solid")
+            worksheet[f'E{3+i}'].border = borda_fina
+
+        # --- FORMATAÇÃO DA TABELA PRINCIPAL ---
+        font_cabecalho_tabela = Font(
+            name='Roboto', bold=True, color='FFFFFF')
+        fill_cabecalho_tabela = PatternFill(
+            start_color='215C98', end_color='215C98', fill_type='solid')
+
+        for cell in worksheet["12:12"]:
+            cell.font = font_cabecalho_tabela
+            cell.fill = fill_cabecalho_tabela
+            cell.alignment = align_center
+            cell.border = borda_fina
+
+        table_range = f"A12:{get_column_letter(worksheet.max_column)}{worksheet.max_row}"
+        worksheet.auto_filter.ref = table_range
+
+        max_row = worksheet.max_row
+        for row in worksheet.iter_rows(min_row=13, max_row=max_row):
+            for cell in row:
+                cell.border = borda_fina
+                cell.alignment = Alignment(
+                    vertical='center', wrap_text=True, horizontal='center')
+
+        for col_letter in ['G', 'I', 'H']:
+            for cell in worksheet[col_letter]:
+                if cell.row > 12 and not isinstance(cell.value, str):
+                    cell.number_format = 'dd/mm/yyyy'
+
+        dxf_retirada = DifferentialStyle(
+            font=Font(color="FFFFFF"), fill=PatternFill(bgColor="C00000"))
+        dxf_closed = DifferentialStyle(
+            font=Font(color="FFFFFF"), fill=PatternFill(bgColor="00B050"))
+        dxf_wait = DifferentialStyle(
+            fill=PatternFill(bgColor="FFFF00"))
+        dxf_open = DifferentialStyle(
+            fill=PatternFill(bgColor="ADD8E6"))
+        dxf_postponed = DifferentialStyle(
+            fill=PatternFill(bgColor="00FFFF"))
+
+        range_total = f"A13:J{worksheet.max_row}"
+        worksheet.conditional_formatting.add(range_total, Rule(type="expression", formula=[
+            f'$D13="{STATUS_RETIRADA}"'], stopIfTrue=True, dxf=dxf_retirada))
+        worksheet.conditional_formatting.add(range_total, Rule(type="expression", formula=[
+            f'OR($D13="{STATUS_POSTPONED}", $D13="{STATUS_REPLANEJADO}")'], stopIfTrue=True, dxf=dxf_postponed))
+
+        range_status = f"D13:D{worksheet.max_row}"
+        worksheet.conditional_formatting.add(range_status, Rule(
+            type="cellIs", operator="equal", formula=[f'"{STATUS_OPEN}"'], dxf=dxf_open))
+        worksheet.conditional_formatting.add(range_status, Rule(
+            type="cellIs", operator="equal", formula=[f'"{STATUS_CLOSED}"'], dxf=dxf_closed))
+        worksheet.conditional_formatting.add(range_status, Rule(
+            type="cellIs", operator="equal", formula=[f'"{STATUS_WAIT_APPROVAL}"'], dxf=dxf_wait))
+        worksheet.conditional_formatting.add(f"J13:J{worksheet.max_row}", Rule(
+            type="expression", formula=['AND($G13<>"", $H13<>"")'], dxf=dxf_closed))
+
+        fill_new_seq = PatternFill(
+            start_color="FA8072", end_color="FA8072", fill_type="solid")
+        for index, is_new in is_new_series.items():
+            if is_new:
+                excel_row = index + 13
+                worksheet[f'B{excel_row}'].fill = fill_new_seq
+                worksheet[f'C{excel_row}'].fill = fill_new_seq
 
-        for _, row_nova in df_novo.iterrows():
-            unique_id = row_nova['UniqueID']
-            if not df_mestre.empty and unique_id in df_mestre['UniqueID'].values:
-                idx = df_mestre.index[df_mestre['UniqueID'] == unique_id][0]
+        if indices_para_colorir:
+            fill_similar = PatternFill(
+                start_color="4B0082", end_color="4B0082", fill_type="solid")
+            font_similar = Font(color="FFFFFF", name='Roboto')
+            for index_df in indices_para_colorir:
+                cell = worksheet[f'C{index_df + 13}']
+                cell.fill = fill_similar
+                cell.font = font_similar
 
-                status_antigo = df_mestre.at[idx, 'STATUS']
-                status_novo = row_nova['STATUS']
+        for idx, largura in enumerate(LARGURAS_COLUNAS):
+            worksheet.column_dimensions[get_column_letter(
+                idx + 1)].width = largura
+        worksheet.sheet_view.zoomScale = 70
+        worksheet.freeze_panes = 'A13'
 
-                df_mestre.at[idx, 'STATUS'] = status_novo
-                df_mestre.at[idx, 'DESCRIPTION'] = row_nova['DESCRIPTION']
-                df_mestre.at[idx, 'EXTERNAL TASK'] = row_nova['EXTERNAL TASK']
-                df_mestre.at[idx, 'GROUP'] = row_nova['GROUP']
+        _escrever_analise_openpyxl(writer, analise)
 
-                data_fechamento_atual = df_mestre.at[idx, 'Data Fechamento']
-                is_paused_novo = status_novo in [
-                    STATUS_POSTPONED, STATUS_REPLANEJADO]
-                was_not_paused_before = status_antigo not in [
-                    STATUS_POSTPONED, STATUS_REPLANEJADO]
 
-                if is_paused_novo and was_not_paused_before and pd.isna(data_fechamento_atual):
-                    df_mestre.at[idx, 'Data Fechamento'] = data_relatorio
-                elif status_novo == STATUS_CLOSED and pd.isna(data_fechamento_atual):
-                    df_mestre.at[idx, 'Data Fechamento'] = data_relatorio
-                elif status_novo not in [STATUS_CLOSED, STATUS_POSTPONED, STATUS_REPLANEJADO] and pd.notna(data_fechamento_atual):
-                    df_mestre.at[idx, 'Data Fechamento'] = pd.NaT
+def salvar_dashboard_xlsxwriter(caminho_arquivo, df_mestre_excel, is_new_series, indices_para_colorir, resumo, analise=None):
+    """
+    Escreve o mesmo dashboard com xlsxwriter em modo `constant_memory`.
 
+    As linhas são escritas estritamente em ordem (exigência do modo de
+    memória constante) e cada célula reutiliza um pequeno conjunto de
+    formatos pré-criados por coluna, em vez de estilos criados célula a célula.
+    """
+    workbook = xlsxwriter.Workbook(caminho_arquivo, {
+        'constant_memory': True, 'remove_timezone': True})
+    worksheet = workbook.add_worksheet('Dashboard')
+
+    fonte = {'font_name': 'Roboto'}
+    formato_titulo = workbook.add_format({**fonte, 'font_size': 16, 'bold': True, 'font_color': '#FFFFFF',
+                                          'bg_color': '#215C98', 'align': 'center', 'valign': 'vcenter'})
+    formato_timestamp = workbook.add_format({**fonte, 'font_size': 9, 'italic': True, 'font_color': '#808080',
+                                             'align': 'center', 'valign': 'vcenter'})
+    formato_valor = workbook.add_format(
+        {**fonte, 'font_size': 11, 'bold': True, 'align': 'right', 'valign': 'vcenter'})
+    formato_percentual = workbook.add_format(
+        {**fonte, 'font_size': 11, 'bold': True, 'align': 'right', 'valign': 'vcenter', 'num_format': '0.00%'})
+    formato_legenda_titulo = workbook.add_format(
+        {**fonte, 'font_size': 11, 'bold': True, 'underline': 1, 'align': 'left', 'valign': 'vcenter'})
+    formato_legenda = workbook.add_format({**fonte, 'font_size': 10})
+    formatos_rotulo = {}
+    for _, _, cor in ITENS_RESUMO:
+        propriedades = {**fonte, 'font_size': 11, 'bold': True,
+                        'align': 'left', 'valign': 'vcenter'}
+        if cor:
+            propriedades['font_color'] = f'#{cor}'
+        formatos_rotulo[cor] = workbook.add_format(propriedades)
+    formatos_cor_legenda = {cor: workbook.add_format({'bg_color': f'#{cor}', 'border': 1})
+                            for _, cor in LEGENDA_CORES}
+    formato_cabecalho_tabela = workbook.add_format({**fonte, 'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#215C98',
+                                                    'align': 'center', 'valign': 'vcenter', 'border': 1})
+
+    # Formatos das células da tabela: base (borda + centrado + quebra de linha),
+    # datas, e os destaques de tarefa nova / descrição similar.
+    celula = {'border': 1, 'align': 'center',
+              'valign': 'vcenter', 'text_wrap': True}
+    formato_celula = workbook.add_format(celula)
+    formato_data = workbook.add_format({**celula, 'num_format': 'dd/mm/yyyy'})
+    formato_nova = workbook.add_format({**celula, 'bg_color': '#FA8072'})
+    formato_similar = workbook.add_format(
+        {**celula, 'bg_color': '#4B0082', 'font_color': '#FFFFFF', 'font_name': 'Roboto'})
+
+    # --- CABEÇALHO, SUMÁRIO E LEGENDA (linhas 1 a 10, em ordem) ---
+    worksheet.merge_range(
+        'A1:C1', 'Dashboard Mestre de Acompanhamento de Tarefas', formato_titulo)
+    worksheet.merge_range(
+        'A2:C2', f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", formato_timestamp)
+    worksheet.write('D2', "Legenda de Cores:", formato_legenda_titulo)
+    for linha in range(2, 10):
+        i_resumo, i_legenda = linha - 3, linha - 2
+        if 0 <= i_resumo < len(ITENS_RESUMO):
+            label, chave, cor = ITENS_RESUMO[i_resumo]
+            worksheet.write(linha, 0, label, formatos_rotulo[cor])
+            worksheet.write(linha, 1, resumo[chave],
+                            formato_percentual if chave == 'percentual_conclusao' else formato_valor)
+        if 0 <= i_legenda < len(LEGENDA_CORES):
+            label, cor = LEGENDA_CORES[i_legenda]
+            worksheet.write(linha, 3, label, formato_legenda)
+            worksheet.write_blank(linha, 4, None, formatos_cor_legenda[cor])
+    worksheet.conditional_format('B4', {'type': 'data_bar', 'min_type': 'num', 'min_value': 0,
+                                        'max_type': 'num', 'max_value': 1, 'bar_color': '#00B050'})
+
+    # --- TABELA PRINCIPAL ---
+    linha_cabecalho = LINHA_CABECALHO_TABELA - 1
+    for col, nome in enumerate(df_mestre_excel.columns):
+        worksheet.write_string(linha_cabecalho, col, nome,
+                               formato_cabecalho_tabela)
+
+    formatos_coluna = [formato_data if col in COLUNAS_DATA_EXCEL else formato_celula
+                       for col in range(len(df_mestre_excel.columns))]
+    is_new = is_new_series.to_numpy()
+    for posicao, valores in enumerate(df_mestre_excel.itertuples(index=False, name=None)):
+        linha = linha_cabecalho + 1 + posicao
+        formato_seq = formato_nova if is_new[posicao] else formato_celula
+        formato_desc = formato_similar if posicao in indices_para_colorir else formato_seq
+        for col, valor in enumerate(valores):
+            formato = formatos_coluna[col]
+            if col == 1:
+                formato = formato_seq
+            elif col == 2:
+                formato = formato_desc
+            if valor is None or valor is pd.NaT or valor is pd.NA or valor == '' or (isinstance(valor, float) and valor != valor):
+                worksheet.write_blank(linha, col, None, formato)
+            elif isinstance(valor, str):
+                worksheet.write_string(linha, col, valor,
+                                       formato_celula if formato is formato_data else formato)
+            elif isinstance(valor, datetime):
+                worksheet.write_datetime(linha, col, valor, formato)
             else:
-                nova_linha = row_nova.to_dict()
-                nova_linha['Data Abertura'] = data_relatorio
-                nova_linha['Última Atualização'] = data_relatorio
-                nova_linha['Data Fechamento'] = data_relatorio if nova_linha['STATUS'] == STATUS_CLOSED else pd.NaT
-                df_mestre = pd.concat(
-                    [df_mestre, pd.DataFrame([nova_linha])], ignore_index=True)
-
-        if 'UniqueID' not in df_mestre.columns and not df_mestre.empty:
-            df_mestre['UniqueID'] = df_mestre['SEQ'].astype(str)
-
-    if not df_mestre.empty:
-        if data_ultimo_relatorio is not None:
-            df_mestre['Última Atualização'] = data_ultimo_relatorio
-
-        idx_closed_no_date = (df_mestre['STATUS'] == STATUS_CLOSED) & (
-            df_mestre['Data Fechamento'].isna())
-        if idx_closed_no_date.any():
-            df_mestre.loc[idx_closed_no_date,
-                          'Data Fechamento'] = df_mestre.loc[idx_closed_no_date, 'Última Atualização']
-
-        df_mestre['is_new'] = df_mestre['UniqueID'].apply(
-            lambda x: x not in ids_antigos)
-
-        hoje = datetime.now()
-        df_mestre['Data Abertura_dt'] = pd.to_datetime(
-            df_mestre['Data Abertura'], errors='coerce')
-        df_mestre['Data Fechamento_dt'] = pd.to_datetime(
-            df_mestre['Data Fechamento'], errors='coerce')
-        df_mestre['Última Atualização_dt'] = pd.to_datetime(
-            df_mestre['Última Atualização'], errors='coerce')
-
-        idx_com_data_fim = df_mestre['Data Fechamento_dt'].notna()
-        df_mestre.loc[idx_com_data_fim, 'Dias em Aberto'] = (
-            df_mestre.loc[idx_com_data_fim, 'Data Fechamento_dt'] - df_mestre.loc[idx_com_data_fim, 'Data Abertura_dt']).dt.days
-
-        idx_sem_data_fim = df_mestre['Data Fechamento_dt'].isna()
-        df_mestre.loc[idx_sem_data_fim, 'Dias em Aberto'] = (
-            hoje - df_mestre.loc[idx_sem_data_fim, 'Data Abertura_dt']).dt.days
-
-        df_mestre['Dias em Aberto'] = pd.to_numeric(
-            df_mestre['Dias em Aberto'], errors='coerce').astype('Int64')
-
-        df_mestre.sort_values(by='SEQ', inplace=True)
-        df_mestre.reset_index(drop=True, inplace=True)
-
-        print("\n🔍 Analisando similaridade de 'DESCRIPTION'...")
-        LIMITE_SIMILARIDADE = 98
-        descricoes = df_mestre['DESCRIPTION'].dropna().astype(str).tolist()
-        indices_para_colorir = set()
-        for i in range(len(descricoes)):
-            for j in range(i + 1, len(descricoes)):
-                if fuzz.ratio(descricoes[i], descricoes[j]) >= LIMITE_SIMILARIDADE:
-                    indices_para_colorir.add(i)
-                    indices_para_colorir.add(j)
-        if indices_para_colorir:
+                worksheet.write_number(linha, col, valor, formato)
+
+    ultima_linha = linha_cabecalho + len(df_mestre_excel)
+    ultima_coluna = len(df_mestre_excel.columns) - 1
+    worksheet.autofilter(linha_cabecalho, 0, ultima_linha, ultima_coluna)
+
+    # --- FORMATAÇÃO CONDICIONAL (mesmas regras do motor openpyxl) ---
+    formato_retirada = workbook.add_format(
+        {'font_color': '#FFFFFF', 'bg_color': '#C00000'})
+    formato_closed = workbook.add_format(
+        {'font_color': '#FFFFFF', 'bg_color': '#00B050'})
+    formato_wait = workbook.add_format({'bg_color': '#FFFF00'})
+    formato_open = workbook.add_format({'bg_color': '#ADD8E6'})
+    formato_postponed = workbook.add_format({'bg_color': '#00FFFF'})
+
+    primeira = linha_cabecalho + 1
+    ultima_linha = max(ultima_linha, primeira)
+    worksheet.conditional_format(primeira, 0, ultima_linha, 9, {
+        'type': 'formula', 'criteria': f'=$D13="{STATUS_RETIRADA}"', 'stop_if_true': True, 'format': formato_retirada})
+    worksheet.conditional_format(primeira, 0, ultima_linha, 9, {
+        'type': 'formula', 'criteria': f'=OR($D13="{STATUS_POSTPONED}", $D13="{STATUS_REPLANEJADO}")',
+        'stop_if_true': True, 'format': formato_postponed})
+    for status, formato in [(STATUS_OPEN, formato_open), (STATUS_CLOSED, formato_closed),
+                            (STATUS_WAIT_APPROVAL, formato_wait)]:
+        worksheet.conditional_format(primeira, 3, ultima_linha, 3, {
+            'type': 'cell', 'criteria': '==', 'value': f'"{status}"', 'format': formato})
+    worksheet.conditional_format(primeira, 9, ultima_linha, 9, {
+        'type': 'formula', 'criteria': '=AND($G13<>"", $H13<>"")', 'format': formato_closed})
+
+    for idx, largura in enumerate(LARGURAS_COLUNAS):
+        worksheet.set_column(idx, idx, largura)
+    worksheet.set_zoom(70)
+    worksheet.freeze_panes(LINHA_CABECALHO_TABELA, 0)
+
+    _escrever_analise_xlsxwriter(workbook, analise)
+    workbook.close()
+
+
+def salvar_dashboard(caminho_arquivo, df_mestre_excel, is_new_series, indices_para_colorir, resumo, motor=None,
+                     analise=None):
+    """
+    Escreve o dashboard mestre com o motor configurado em MOTOR_EXCEL e, se
+    houver `analise` (ver calcular_analise), as folhas de análise.
+    """
+    motor = motor or MOTOR_EXCEL
+    if motor == 'xlsxwriter':
+        salvar_dashboard_xlsxwriter(
+            caminho_arquivo, df_mestre_excel, is_new_series, indices_para_colorir, resumo, analise)
+    elif motor == 'openpyxl':
+        salvar_dashboard_openpyxl(
+            caminho_arquivo, df_mestre_excel, is_new_series, indices_para_colorir, resumo, analise)
+    else:
+        raise ValueError(f"Motor de Excel desconhecido: '{motor}'")
+
+
+def salvar_resumo_frota(caminho_arquivo, df_frota, motor=None):
+    """Escreve o resumo da frota (uma linha por nº de relatório) com o motor configurado."""
+    motor = motor or MOTOR_EXCEL
+    if motor == 'xlsxwriter':
+        workbook = xlsxwriter.Workbook(
+            caminho_arquivo, {'remove_timezone': True})
+        _escrever_analise_xlsxwriter(workbook, {'frota': df_frota}, FOLHAS_FROTA)
+        workbook.close()
+    elif motor == 'openpyxl':
+        with pd.ExcelWriter(caminho_arquivo, engine='openpyxl') as writer:
+            _escrever_analise_openpyxl(
+                writer, {'frota': df_frota}, FOLHAS_FROTA)
+    else:
+        raise ValueError(f"Motor de Excel desconhecido: '{motor}'")
+
+
+# --- PARTIÇÕES: Relatórios agrupados por nº, cada um com o seu mestre ---
+def eh_relatorio_pdf(nome_arquivo):
+    """True para os ficheiros '<PREFIXO_RELATORIOS>*.pdf' (sem distinguir maiúsculas)."""
+    nome = nome_arquivo.lower()
+    return nome.startswith(PREFIXO_RELATORIOS) and nome.endswith('.pdf')
+
+
+def caminho_mestre_da_particao(caminho_mestre, numero):
+    """Caminho do mestre do relatório nº `numero` (ex: 'Dashboard_Mestre_19000277.xlsx')."""
+    base, extensao = os.path.splitext(caminho_mestre)
+    return f"{base}_{numero}{extensao}"
+
+
+def caminho_frota_para(caminho_mestre):
+    """Caminho do resumo da frota, com uma linha por nº de relatório."""
+    base, extensao = os.path.splitext(caminho_mestre)
+    return f"{base}_Frota{extensao}"
+
+
+def particionar_relatorios(arquivos_pdf, cabecalhos):
+    """{nº do relatório: [arquivos]}, mantendo a ordem de `arquivos_pdf`."""
+    particoes = {}
+    for arquivo in arquivos_pdf:
+        numero = cabecalhos[arquivo]['numero'] or SEM_NUMERO
+        particoes.setdefault(numero, []).append(arquivo)
+    return particoes
+
+
+def seqs_da_versao_anterior(caminho_mestre):
+    """
+    SEQs (set de int) da versão anterior do mestre: do Parquet ou, em
+    ficheiros gerados por versões anteriores, da folha 'Dashboard' do Excel.
+    Devolve None se não houver versão anterior.
+    """
+    caminho_parquet = caminho_parquet_para(caminho_mestre)
+    if os.path.exists(caminho_parquet):
+        ids_antigos = set(pd.read_parquet(
+            caminho_parquet, columns=['SEQ'])['SEQ'].tolist())
+        print(
+            f"📖 {len(ids_antigos)} tarefas encontradas na versão anterior ('{caminho_parquet}').")
+        return ids_antigos
+    if not os.path.exists(caminho_mestre):
+        return None
+
+    ids_antigos = set()
+    print(f"📖 Verificando o ficheiro mestre existente: '{caminho_mestre}'")
+    try:
+        df_antigo = pd.read_excel(
+            caminho_mestre, sheet_name='Dashboard', skiprows=11)
+        if 'SEQ' in df_antigo.columns:
+            df_antigo['SEQ'] = pd.to_numeric(df_antigo['SEQ'], errors='coerce')
+            df_antigo.dropna(subset=['SEQ'], inplace=True)
+            ids_antigos = set(df_antigo['SEQ'].astype(int))
             print(
-                f"   -> {len(indices_para_colorir)} tarefas com descrição similar encontradas.")
-        else:
-            print("   -> Nenhuma tarefa com descrição similar encontrada.")
-
-        is_new_series = df_mestre['is_new']
-
-        total_tarefas = len(df_mestre)
-        count_fechadas = len(df_mestre[df_mestre['STATUS'] == STATUS_CLOSED])
-        count_retiradas = len(
-            df_mestre[df_mestre['STATUS'] == STATUS_RETIRADA])
-        count_nao_aprov = len(
-            df_mestre[df_mestre['STATUS'] == STATUS_WAIT_APPROVAL])
-        count_replanejadas = len(
-            df_mestre[df_mestre['STATUS'].isin([STATUS_POSTPONED, STATUS_REPLANEJADO])])
-        count_abertas = len(df_mestre[df_mestre['STATUS'] == STATUS_OPEN])
-        percentual_conclusao = (
-            count_fechadas + count_retiradas) / total_tarefas if total_tarefas > 0 else 0
-
-        colunas_finais = ['GROUP', 'SEQ', 'DESCRIPTION', 'STATUS', 'EXTERNAL TASK', 'ORIG',
-                          'Data Abertura', 'Data Fechamento', 'Última Atualização', 'Dias em Aberto']
-        df_mestre_excel = df_mestre[colunas_finais].copy()
-        df_mestre_excel['Data Fechamento'] = df_mestre_excel['Data Fechamento'].astype(
-            object)
-        idx_replanejado = df_mestre_excel['STATUS'].isin(
-            [STATUS_POSTPONED, STATUS_REPLANEJADO])
-        # A exibição no Excel agora usará a 'Data Fechamento' que foi definida corretamente
-        df_mestre_excel.loc[idx_replanejado, 'Data Fechamento'] = df_mestre.loc[idx_replanejado, 'Data Fechamento'].apply(
-            lambda x: f"Replanejado em {x.strftime('%d/%m/%Y')}" if pd.notna(x) else "Replanejado")
-        idx_retiradas = df_mestre_excel['STATUS'] == STATUS_RETIRADA
-        df_mestre_excel.loc[idx_retiradas, 'Data Fechamento'] = df_mestre.loc[idx_retiradas, 'Data Fechamento'].apply(
-            lambda x: f"Retirada em {x.strftime('%d/%m/%Y')}" if pd.notna(x) else "Retirada")
+                f"   -> {len(ids_antigos)} tarefas encontradas na versão anterior.")
+    except Exception as e:
+        print(f"   -> Aviso: Não foi possível ler o ficheiro mestre anterior: {e}.")
+    return ids_antigos
 
-        try:
-            with pd.ExcelWriter(nome_arquivo_mestre, engine='openpyxl') as writer:
-                df_mestre_excel.to_excel(
-                    writer, sheet_name='Dashboard', startrow=11, index=False)
-                workbook = writer.book
-                worksheet = writer.sheets['Dashboard']
-
-                # --- CABEÇALHO ---
-                font_titulo = Font(name='Roboto', size=16,
-                                   bold=True, color='FFFFFF')
-                fill_titulo = PatternFill(
-                    start_color='215C98', end_color='215C98', fill_type='solid')
-                align_center = Alignment(
-                    horizontal='center', vertical='center')
-                align_left = Alignment(horizontal='left', vertical='center')
-                align_right = Alignment(horizontal='right', vertical='center')
-                borda_fina = Border(left=Side(style='thin'), right=Side(
-                    style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-                worksheet.merge_cells('A1:C1')
-                cell_titulo = worksheet['A1']
-                cell_titulo.value = 'Dashboard Mestre de Acompanhamento de Tarefas'
-                cell_titulo.font = font_titulo
-                cell_titulo.fill = fill_titulo
-                cell_titulo.alignment = align_center
-
-                worksheet.merge_cells('A2:C2')
-                cell_timestamp = worksheet['A2']
-                cell_timestamp.value = f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-                cell_timestamp.font = Font(
-                    name='Roboto', size=9, italic=True, color='808080')
-                cell_timestamp.alignment = align_center
-
-                # --- SUMÁRIO COM ÍCONES COLORIDOS ---
-                font_label_default = Font(name='Roboto', size=11, bold=True)
-                font_fechadas = Font(name='Roboto', size=11,
-                                     bold=True, color="00B050")
-                font_retiradas = Font(
-                    name='Roboto', size=11, bold=True, color="C00000")
-                font_abertas = Font(name='Roboto', size=11,
-                                    bold=True, color="0070C0")
-                font_nao_aprov = Font(
-                    name='Roboto', size=11, bold=True, color="9C6500")
-                font_replanejadas = Font(
-                    name='Roboto', size=11, bold=True, color="008B8B")
-
-                summary_data = [
-                    {'ref': 'A4', 'label': '📈 Progresso Geral:', 'value_ref': 'B4',
-                     'value': percentual_conclusao, 'font': font_label_default},
-                    {'ref': 'A5', 'label': '✅ Tarefas Fechadas:', 'value_ref': 'B5',
-                     'value': count_fechadas, 'font': font_fechadas},
-                    {'ref': 'A6', 'label': '❌ Tarefas Retiradas:', 'value_ref': 'B6',
-                     'value': count_retiradas, 'font': font_retiradas},
-                    {'ref': 'A7', 'label': '📋 Tarefas Abertas:', 'value_ref': 'B7',
-                     'value': count_abertas, 'font': font_abertas},
-                    {'ref': 'A8', 'label': '⏳ Não Aprovadas:', 'value_ref': 'B8',
-                     'value': count_nao_aprov, 'font': font_nao_aprov},
-                    {'ref': 'A9', 'label': '🔄 Tarefas Replanejadas:', 'value_ref': 'B9',
-                     'value': count_replanejadas, 'font': font_replanejadas},
-                    {'ref': 'A10', 'label': '🎯 Total de Tarefas:', 'value_ref': 'B10',
-                     'value': total_tarefas, 'font': font_label_default},
-                ]
-
-                for item in summary_data:
-                    label_cell = worksheet[item['ref']]
-                    label_cell.value = item['label']
-                    label_cell.font = item['font']
-                    label_cell.alignment = align_left
-
-                    value_cell = worksheet[item['value_ref']]
-                    value_cell.value = item['value']
-                    value_cell.font = font_label_default
-                    value_cell.alignment = align_right
-
-                worksheet['B4'].number_format = '0.00%'
-                worksheet.conditional_formatting.add('B4', DataBarRule(
-                    start_type='num', start_value=0, end_type='num', end_value=1, color="00B050", showValue=True))
-
-                # --- LEGENDA DE CORES ---
-                worksheet['D2'].value = "Legenda de Cores:"
-                worksheet['D2'].font = Font(
-                    name='Roboto', size=11, bold=True, underline="single")
-                worksheet['D2'].alignment = align_left
-                legend_data = [
-                    ("Tarefa Retirada", "C00000"), ("Tarefa Fechada", "00B050"),
-                    ("Aguardando Aprovação", "FFFF00"), ("Tarefa Aberta", "ADD8E6"),
-                    (f"Tarefa {STATUS_REPLANEJADO.capitalize()}",
-                     "00FFFF"), ("Nova Tarefa", "FA8072"),
-                    ("Descrição Similar (>=98%)", "4B0082")
-                ]
-                for i, (label, color_hex) in enumerate(legend_data):
-                    worksheet[f'D{3+i}'].value = label
-                    worksheet[f'D{3+i}'].font = Font(name='Roboto', size=10)
-                    worksheet[f'E{3+i}'].fill = PatternFill(
-                        start_color=color_hex, end_color=color_hex, fill_type="solid")
-                    worksheet[f'E{3+i}'].border = borda_fina
-
-                # --- FORMATAÇÃO DA TABELA PRINCIPAL ---
-                font_cabecalho_tabela = Font(
-                    name='Roboto', bold=True, color='FFFFFF')
-                fill_cabecalho_tabela = PatternFill(
-                    start_color='215C98', end_color='215C98', fill_type='solid')
-
-                for cell in worksheet["12:12"]:
-                    cell.font = font_cabecalho_tabela
-                    cell.fill = fill_cabecalho_tabela
-                    cell.alignment = align_center
-                    cell.border = borda_fina
-
-                table_range = f"A12:{get_column_letter(worksheet.max_column)}{worksheet.max_row}"
-                worksheet.auto_filter.ref = table_range
-
-                max_row = worksheet.max_row
-                for row in worksheet.iter_rows(min_row=13, max_row=max_row):
-                    for cell in row:
-                        cell.border = borda_fina
-                        cell.alignment = Alignment(
-                            vertical='center', wrap_text=True, horizontal='center')
-
-                for col_letter in ['G', 'I', 'H']:
-                    for cell in worksheet[col_letter]:
-                        if cell.row > 12 and not isinstance(cell.value, str):
-                            cell.number_format = 'dd/mm/yyyy'
-
-                dxf_retirada = DifferentialStyle(
-                    font=Font(color="FFFFFF"), fill=PatternFill(bgColor="C00000"))
-                dxf_closed = DifferentialStyle(
-                    font=Font(color="FFFFFF"), fill=PatternFill(bgColor="00B050"))
-                dxf_wait = DifferentialStyle(
-                    fill=PatternFill(bgColor="FFFF00"))
-                dxf_open = DifferentialStyle(
-                    fill=PatternFill(bgColor="ADD8E6"))
-                dxf_postponed = DifferentialStyle(
-                    fill=PatternFill(bgColor="00FFFF"))
-
-                range_total = f"A13:J{worksheet.max_row}"
-                worksheet.conditional_formatting.add(range_total, Rule(type="expression", formula=[
-                    f'$D13="{STATUS_RETIRADA}"'], stopIfTrue=True, dxf=dxf_retirada))
-                worksheet.conditional_formatting.add(range_total, Rule(type="expression", formula=[
-                    f'OR($D13="{STATUS_POSTPONED}", $D13="{STATUS_REPLANEJADO}")'], stopIfTrue=True, dxf=dxf_postponed))
-
-                range_status = f"D13:D{worksheet.max_row}"
-                worksheet.conditional_formatting.add(range_status, Rule(
-                    type="cellIs", operator="equal", formula=[f'"{STATUS_OPEN}"'], dxf=dxf_open))
-                worksheet.conditional_formatting.add(range_status, Rule(
-                    type="cellIs", operator="equal", formula=[f'"{STATUS_CLOSED}"'], dxf=dxf_closed))
-                worksheet.conditional_formatting.add(range_status, Rule(
-                    type="cellIs", operator="equal", formula=[f'"{STATUS_WAIT_APPROVAL}"'], dxf=dxf_wait))
-                worksheet.conditional_formatting.add(f"J13:J{worksheet.max_row}", Rule(
-                    type="expression", formula=['AND($G13<>"", $H13<>"")'], dxf=dxf_closed))
-
-                fill_new_seq = PatternFill(
-                    start_color="FA8072", end_color="FA8072", fill_type="solid")
-                for index, is_new in is_new_series.items():
-                    if is_new:
-                        excel_row = index + 13
-                        worksheet[f'B{excel_row}'].fill = fill_new_seq
-                        worksheet[f'C{excel_row}'].fill = fill_new_seq
-
-                if indices_para_colorir:
-                    fill_similar = PatternFill(
-                        start_color="4B0082", end_color="4B0082", fill_type="solid")
-                    font_similar = Font(color="FFFFFF", name='Roboto')
-                    for index_df in indices_para_colorir:
-                        cell = worksheet[f'C{index_df + 13}']
-                        cell.fill = fill_similar
-                        cell.font = font_similar
-
-                worksheet.column_dimensions['A'].width = 25.5
-                worksheet.column_dimensions['B'].width = 15
-                worksheet.column_dimensions['C'].width = 60
-                worksheet.column_dimensions['D'].width = 25
-                worksheet.column_dimensions['E'].width = 30
-                worksheet.column_dimensions['F'].width = 20
-                worksheet.column_dimensions['G'].width = 20
-                worksheet.column_dimensions['H'].width = 25
-                worksheet.column_dimensions['I'].width = 20
-                worksheet.column_dimensions['J'].width = 15
-                worksheet.sheet_view.zoomScale = 70
-                worksheet.freeze_panes = 'A13'
 
+def planear_particao(numero, arquivos_ordenados, caminho_mestre, hashes_arquivos, chaves_ordem):
+    """
+    Abre o estado do mestre da partição e decide que relatórios aplicar: só
+    os ainda não ingeridos (modo incremental) ou todos, reconstruindo o
+    mestre se algum relatório já ingerido deixou de estar em
+    `arquivos_ordenados` ou se chegou um novo anterior a eles. Devolve um dicionário com o plano e o mestre de partida.
+    """
+    caminho_parquet = caminho_parquet_para(caminho_mestre)
+    particao = {
+        'numero': numero,
+        'caminho_mestre': caminho_mestre,
+        'arquivos': arquivos_ordenados,
+        'estado': EstadoMestre(caminho_estado_para(caminho_mestre), caminho_parquet),
+        'ids_antigos': seqs_da_versao_anterior(caminho_mestre),
+        'df_mestre': pd.DataFrame(),
+        'data_ultimo_relatorio': None,
+        'a_processar': arquivos_ordenados,
+        'reconstruir': True,
+        'aplicados': [],
+        # Relatórios novos anteriores aos já ingeridos que já saíram vazios;
+        # se agora tiverem tarefas, o mestre é reconstruído depois da extração
+        'em_atraso': [],
+        'sem_tarefas': [],
+        'historico': HistoricoTarefas(caminho_historico_para(caminho_mestre)),
+    }
+
+    if MODO_INCREMENTAL:
+        ingeridos = particao['estado'].relatorios_ingeridos()
+        sem_tarefas = particao['estado'].relatorios_sem_tarefas()
+        arquivos_novos = [
+            a for a in arquivos_ordenados if hashes_arquivos[a] not in ingeridos]
+        em_atraso = [a for a in arquivos_novos
+                     if ingeridos and chaves_ordem[a] < max(ingeridos.values())]
+        # Relatórios já aplicados que deixaram a pasta ou foram substituídos
+        # na deduplicação (ex: uma cópia posterior do mesmo nº e data)
+        substituidos = set(ingeridos) - \
+            {hashes_arquivos[a] for a in arquivos_ordenados}
+        if substituidos:
+            print(f"⚠️ {len(substituidos)} relatórios já processados foram substituídos ou "
+                  "removidos da pasta. O mestre será reconstruído.")
+        elif any(hashes_arquivos[a] not in sem_tarefas for a in em_atraso):
+            print("⚠️ Há relatórios novos anteriores aos já processados. O mestre será reconstruído.")
+        elif ingeridos:
+            df_mestre, particao['data_ultimo_relatorio'] = particao['estado'].carregar()
+            particao['df_mestre'] = aplicar_esquema_mestre(df_mestre)
+            particao['a_processar'] = arquivos_novos
+            particao['em_atraso'] = em_atraso
+            particao['reconstruir'] = False
             print(
-                f"\n✅ Dashboard mestre salvo e atualizado com sucesso em: '{nome_arquivo_mestre}'")
-        except Exception as e:
-            print(f"\n❌ ERRO ao salvar o ficheiro Excel: {e}")
-            print("Verifique se o ficheiro 'Dashboard_Mestre.xlsx' não está aberto.")
+                f"♻️ Modo incremental: {len(ingeridos)} relatórios já processados, {len(arquivos_novos)} novos.")
+
+    if particao['reconstruir']:
+        print("✨ Criando novo dashboard...")
+    return particao
+
+
+def gerar_dashboard(caminho_mestre, df_mestre, data_ultimo_relatorio, ids_antigos, df_historico):
+    """
+    Prepara o mestre mesclado e escreve o dashboard em `caminho_mestre`.
+    Devolve o resumo (calcular_resumo), ou None se o Excel não foi gravado.
+    """
+    df_mestre = preparar_mestre(
+        df_mestre, data_ultimo_relatorio, ids_antigos)
+
+    print("\n🔍 Analisando similaridade de 'DESCRIPTION'...")
+    descricoes = df_mestre['DESCRIPTION'].dropna().astype(str).tolist()
+    # Cada partição tem a sua cache de similaridade: a sincronização remove
+    # os hashes que não estão no mestre dado, que seriam os das outras
+    cache_similaridade = CacheSimilaridade(caminho_cache_para(caminho_mestre))
+    with instrumentacao.etapa('similaridade') as medicao:
+        indices_para_colorir = encontrar_descricoes_similares(
+            descricoes, LIMITE_SIMILARIDADE, cache=cache_similaridade)
+        medicao.contar(linhas=len(descricoes))
+    cache_similaridade.fechar()
+    if indices_para_colorir:
+        print(
+            f"   -> {len(indices_para_colorir)} tarefas com descrição similar encontradas.")
     else:
-        print("\n❌ Nenhuma tarefa foi extraída. O ficheiro mestre não foi alterado.")
+        print("   -> Nenhuma tarefa com descrição similar encontrada.")
+
+    is_new_series = df_mestre['is_new']
+
+    resumo = calcular_resumo(df_mestre)
+
+    df_mestre_excel = montar_tabela_excel(df_mestre)
+
+    with instrumentacao.etapa('analise') as medicao:
+        analise = calcular_analise(df_historico, df_mestre)
+        medicao.contar(linhas=len(df_historico))
+
+    try:
+        with instrumentacao.etapa('excel') as medicao:
+            salvar_dashboard(caminho_mestre, df_mestre_excel,
+                             is_new_series, indices_para_colorir, resumo, analise=analise)
+            medicao.contar(linhas=len(df_mestre_excel))
+        print(
+            f"\n✅ Dashboard mestre salvo e atualizado com sucesso em: '{caminho_mestre}'")
+        return resumo
+    except Exception as e:
+        print(f"\n❌ ERRO ao salvar o ficheiro Excel: {e}")
+        print(f"Verifique se o ficheiro '{caminho_mestre}' não está aberto.")
+        return None
+
+
+def linha_frota(particao, resumo):
+    """Linha do resumo da frota para uma partição, a partir do seu resumo."""
+    return {
+        'Nº Relatório': particao['numero'],
+        'Último Relatório': particao['data_ultimo_relatorio'],
+        'Relatórios': len(particao['arquivos']),
+        'Total': resumo['total'],
+        'Abertas': resumo['abertas'],
+        'Fechadas': resumo['fechadas'],
+        'Retiradas': resumo['retiradas'],
+        'Não Aprovadas': resumo['nao_aprovadas'],
+        'Replanejadas': resumo['replanejadas'],
+        'Progresso (%)': round(resumo['percentual_conclusao'] * 100, 1),
+        'Ficheiro': os.path.basename(particao['caminho_mestre']),
+    }
+
+
+def atualizar_dashboard(nome_pasta_relatorios='Relatorios_PDF', nome_arquivo_mestre='Dashboard_Mestre.xlsx',
+                        extrair=None, arquivos=None, ler_cabecalhos=None):
+    """
+    Aplica os relatórios '<PREFIXO_RELATORIOS>*.pdf' de `nome_pasta_relatorios`
+    aos mestres dos respetivos nºs de relatório (só os novos, no modo
+    incremental), grava o estado dos mestres alterados e volta a escrever o
+    Excel de todos os mestres e o resumo da frota. A extração dos relatórios
+    de todas as partições partilha um só pool de processos. Devolve True se
+    todos os ficheiros Excel foram gravados.
+
+    `extrair` substitui `extrair_relatorios` (mesma assinatura, sem
+    `num_processos`), ex: a extração com tempo limite de processar_lote.py;
+    `ler_cabecalhos` substitui da mesma forma `hashes_e_cabecalhos`, e os
+    ficheiros que não devolver ficam de fora desta execução.
+    Com `arquivos`, só esses caminhos da pasta são lidos (ex: os ficheiros
+    que o observador já viu estabilizar); os restantes ficam para depois.
+    """
+    extrair = extrair or extrair_relatorios
+    ler_cabecalhos = ler_cabecalhos or hashes_e_cabecalhos
+    if not os.path.isdir(nome_pasta_relatorios):
+        print(f"❌ ERRO: A pasta '{nome_pasta_relatorios}' não foi encontrada.")
+        return False
+
+    arquivos_candidatos = [os.path.join(nome_pasta_relatorios, f) for f in os.listdir(
+        nome_pasta_relatorios) if eh_relatorio_pdf(f)]
+    if arquivos is not None:
+        permitidos = {os.path.normpath(a) for a in arquivos}
+        arquivos_candidatos = [
+            a for a in arquivos_candidatos if os.path.normpath(a) in permitidos]
+    if not arquivos_candidatos:
+        print(
+            f"❌ ERRO: Nenhum ficheiro PDF '{PREFIXO_RELATORIOS}*.pdf' encontrado na pasta '{nome_pasta_relatorios}'.")
+        return False
+
+    print(
+        f"📄 Encontrados {len(arquivos_candidatos)} relatórios para processar.")
+
+    # Ordem cronológica pela data "Today" de cada relatório (e não pela data
+    # de modificação, igual em todas as cópias de uma pasta)
+    cache_extracao = CacheExtracao(
+        caminho_cache_para(nome_arquivo_mestre), VERSAO_EXTRATOR)
+    with instrumentacao.etapa('cabecalhos') as medicao:
+        hashes_arquivos, cabecalhos = ler_cabecalhos(
+            arquivos_candidatos, cache_extracao)
+        medicao.contar(paginas=len(arquivos_candidatos))
+    for arquivo in [a for a in arquivos_candidatos if a not in cabecalhos]:
+        print(f"⏭️ '{os.path.basename(arquivo)}' ignorado: não foi possível ler o cabeçalho.")
+    arquivos_candidatos = [a for a in arquivos_candidatos if a in cabecalhos]
+
+    arquivos_candidatos, ignorados = deduplicar_relatorios(
+        arquivos_candidatos, hashes_arquivos, cabecalhos)
+    for arquivo, motivo in ignorados:
+        print(f"⏭️ '{os.path.basename(arquivo)}' ignorado: {motivo}.")
+
+    chaves_ordem = {a: chave_cronologica(a, cabecalhos[a]['data'])
+                    for a in arquivos_candidatos}
+    arquivos_ordenados = sorted(arquivos_candidatos, key=lambda a: (
+        chaves_ordem[a], os.path.getmtime(a), a))
+
+    grupos = particionar_relatorios(arquivos_ordenados, cabecalhos)
+    particoes = []
+    for numero, arquivos in sorted(grupos.items()):
+        print(f"\n📦 Relatório nº {numero}: {len(arquivos)} ficheiros.")
+        particao = planear_particao(numero, arquivos, caminho_mestre_da_particao(
+            nome_arquivo_mestre, numero), hashes_arquivos, chaves_ordem)
+        if particao['ids_antigos'] is None:
+            # Com um só nº de relatório, o mestre de versões sem partições
+            # é a versão anterior deste
+            particao['ids_antigos'] = (len(grupos) == 1 and seqs_da_versao_anterior(
+                nome_arquivo_mestre)) or set()
+        particoes.append(particao)
+
+    # Uma só extração (um só pool) para os relatórios novos de todas as partições
+    arquivos_a_processar = [a for p in particoes for a in p['a_processar']]
+    resultados_extracao = dict(zip(arquivos_a_processar, extrair(
+        arquivos_a_processar, cache=cache_extracao, hashes=hashes_arquivos)))
+
+    for particao in particoes:
+        if any(not resultados_extracao[a][1].empty for a in particao['em_atraso']):
+            print(f"\n⚠️ Relatório nº {particao['numero']}: um relatório anterior aos já processados "
+                  "tem agora tarefas. O mestre será reconstruído.")
+            particao.update(df_mestre=pd.DataFrame(), data_ultimo_relatorio=None,
+                            a_processar=particao['arquivos'], em_atraso=[], reconstruir=True)
+            faltam = [a for a in particao['arquivos']
+                      if a not in resultados_extracao]
+            resultados_extracao.update(zip(faltam, extrair(
+                faltam, cache=cache_extracao, hashes=hashes_arquivos)))
+
+    sem_historico = []
+    for particao in particoes:
+        if len(particoes) > 1 and particao['a_processar']:
+            print(f"\n📦 Relatório nº {particao['numero']}")
+        historico = particao['historico']
+        for arquivo_pdf in particao['a_processar']:
+            dados_cabecalho, df_novo = resultados_extracao[arquivo_pdf]
+            print(f"\n--- Processando: '{os.path.basename(arquivo_pdf)}' ---")
+            if df_novo.empty:
+                print(
+                    f"⚠️ Nenhuma tarefa encontrada em '{os.path.basename(arquivo_pdf)}'.")
+                particao['sem_tarefas'].append(
+                    (hashes_arquivos[arquivo_pdf], os.path.basename(arquivo_pdf), chaves_ordem[arquivo_pdf]))
+                continue
+
+            data_relatorio = dados_cabecalho['report_date']
+            particao['data_ultimo_relatorio'] = data_relatorio
+            with instrumentacao.etapa('mesclagem') as medicao:
+                particao['df_mestre'] = mesclar_relatorio_no_mestre(
+                    particao['df_mestre'], df_novo, data_relatorio)
+                medicao.contar(linhas=len(df_novo))
+            with instrumentacao.etapa('historico') as medicao:
+                historico.registar(
+                    hashes_arquivos[arquivo_pdf], data_relatorio, df_novo)
+                medicao.contar(linhas=len(df_novo))
+            particao['aplicados'].append(
+                (hashes_arquivos[arquivo_pdf], os.path.basename(arquivo_pdf), chaves_ordem[arquivo_pdf]))
+
+        # Relatórios ingeridos antes de existir o histórico: são registados
+        # a partir da cache de extração, sem voltar a mesclá-los
+        registados = historico.relatorios_registados()
+        sem_historico += [(particao, a) for a in particao['arquivos'] if a not in particao['a_processar']
+                          and hashes_arquivos[a] not in registados]
+
+    if sem_historico:
+        print(
+            f"\n🗂️ A registar {len(sem_historico)} relatórios anteriores no histórico de tarefas...")
+        arquivos_sem_historico = [a for _, a in sem_historico]
+        for (particao, arquivo_pdf), (dados_cabecalho, df_novo) in zip(sem_historico, extrair(
+                arquivos_sem_historico, cache=cache_extracao, hashes=hashes_arquivos)):
+            if not df_novo.empty:
+                particao['historico'].registar(
+                    hashes_arquivos[arquivo_pdf], dados_cabecalho['report_date'], df_novo)
+    cache_extracao.fechar()
+
+    linhas_frota = []
+    sucesso = True
+    for particao in particoes:
+        caminho_mestre = particao['caminho_mestre']
+        estado_mestre = particao['estado']
+        alterada = (particao['aplicados'] or particao['reconstruir']
+                    or not os.path.exists(caminho_parquet_para(caminho_mestre)))
+        # Sem Parquet (estado de uma versão anterior), grava-o já com o mestre atual
+        if alterada:
+            estado_mestre.salvar(particao['df_mestre'], particao['data_ultimo_relatorio'],
+                                 particao['aplicados'], reconstruir=particao['reconstruir'])
+        if particao['sem_tarefas']:
+            estado_mestre.registar_sem_tarefas(particao['sem_tarefas'])
+        estado_mestre.fechar()
+        historico = particao['historico']
+
+        df_mestre = particao['df_mestre']
+        if df_mestre.empty:
+            historico.fechar()
+            print(
+                f"\n❌ Nenhuma tarefa foi extraída. O ficheiro mestre '{caminho_mestre}' não foi alterado.")
+            sucesso = False
+            continue
+        # O Excel é sempre reescrito, mesmo sem relatórios novos: refresca
+        # 'Dias em Aberto' e repõe uma gravação que tenha falhado antes (ex:
+        # ficheiro aberto no Excel) depois de o estado já ter sido guardado
+        if not alterada:
+            print(f"\n✔️ '{caminho_mestre}' sem relatórios novos.")
+
+        df_historico = historico.carregar(
+            {hashes_arquivos[a] for a in particao['arquivos']})
+        historico.fechar()
+        if len(particoes) > 1:
+            print(f"\n📦 Relatório nº {particao['numero']}")
+        resumo = gerar_dashboard(caminho_mestre, df_mestre, particao['data_ultimo_relatorio'],
+                                 particao['ids_antigos'], df_historico)
+        if resumo is None:
+            sucesso = False
+        else:
+            linhas_frota.append(linha_frota(particao, resumo))
+
+    if not linhas_frota:
+        return False
+    caminho_frota = caminho_frota_para(nome_arquivo_mestre)
+    try:
+        salvar_resumo_frota(caminho_frota, pd.DataFrame(linhas_frota))
+        print(f"\n🛫 Resumo da frota ({len(linhas_frota)} nºs de relatório) salvo em: '{caminho_frota}'")
+    except Exception as e:
+        print(f"\n❌ ERRO ao salvar o resumo da frota: {e}")
+        print(f"Verifique se o ficheiro '{caminho_frota}' não está aberto.")
+        return False
+    return sucesso
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Atualiza os dashboards mestre com os relatórios PDF de uma pasta "
+                    "(para tempos limite e novas tentativas por ficheiro, ver processar_lote.py).")
+    parser.add_argument('pasta', nargs='?', default='Relatorios_PDF')
+    parser.add_argument('--mestre', default='Dashboard_Mestre.xlsx',
+                        help="ficheiro mestre base (os mestres por nº de relatório ficam ao lado)")
+    args = parser.parse_args()
+
+    if INSTRUMENTACAO:
+        instrumentacao.ativar(perfil=TRACE_INSTRUMENTACAO is not None)
+
+    atualizar_dashboard(args.pasta, args.mestre)
+
+    if INSTRUMENTACAO:
+        instrumentacao.imprimir_resumo()
+        if TRACE_INSTRUMENTACAO:
+            instrumentacao.gravar(TRACE_INSTRUMENTACAO)
+            print(
+                f"📝 Trace gravado em '{TRACE_INSTRUMENTACAO}.json' e '{TRACE_INSTRUMENTACAO}.prof'")
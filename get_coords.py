@@ -2,13 +2,31 @@ import fitz  # PyMuPDF
 import tkinter as tk
 from tkinter import filedialog, simpledialog
 
+from modelos_layout import calibrar_modelo, criar_modelo, salvar_modelo
+
 # --- Variáveis globais para armazenar os pontos ---
 points = []
+# --- Modelo de layout: área selecionada e fronteiras das colunas clicadas ---
+# A 1 ponto = 1 pixel (zoom padrão do get_pixmap), os cliques já estão em
+# coordenadas do PDF.
+area = None
+colunas = []
+pagina_atual = {}
+
+CABECALHO_PADRAO = "PHASE,SEQ,GROUP,DESCRIPTION,STATUS,EXTERNAL TASK,ORIG"
 
 
 def get_mouse_click(event):
     """Callback para capturar o clique do mouse e imprimir as coordenadas."""
+    global area
     x, y = event.x, event.y
+
+    # Depois da área, cada clique marca uma fronteira entre colunas
+    if area is not None:
+        colunas.append(x)
+        print(f"Fronteira de coluna: x={x}")
+        return
+
     print(f"Ponto capturado: (x={x}, y={y})")
     points.append((x, y))
 
@@ -22,6 +40,47 @@ def get_mouse_click(event):
         print(f"area = ({x0}, {y0}, {x1}, {y1})")
         print("-------------------------------------------\n")
         points.clear()  # Limpa para a próxima seleção
+        area = (x0, y0, x1, y1)
+        print("Clique agora nas fronteiras ENTRE as colunas e prima Enter para guardar o modelo "
+              "(ou 'a' para calibrar automaticamente com o find_tables).")
+
+
+def salvar_modelo_clicado(event=None):
+    """Guarda a área e as colunas clicadas como modelo de layout."""
+    global area
+    if area is None or not colunas:
+        print("Selecione a área e pelo menos uma fronteira de coluna antes de guardar.")
+        return
+    nome = simpledialog.askstring("Modelo de Layout", "Nome do modelo:")
+    cabecalho = simpledialog.askstring(
+        "Modelo de Layout", "Cabeçalho das colunas (separado por vírgulas):",
+        initialvalue=CABECALHO_PADRAO)
+    if not nome or not cabecalho:
+        print("Modelo não guardado.")
+        return
+    fronteiras = [area[0]] + sorted(colunas) + [area[2]]
+    try:
+        modelo = criar_modelo(nome, pagina_atual['tamanho'], area, fronteiras,
+                              [c.strip() for c in cabecalho.split(',')])
+        print(f"✅ Modelo guardado em '{salvar_modelo(modelo)}'")
+    except ValueError as e:
+        print(f"❌ ERRO: {e}")
+    area = None
+    colunas.clear()
+
+
+def calibrar_modelo_automatico(event=None):
+    """Cria o modelo a partir da tabela detetada pelo find_tables na página."""
+    nome = simpledialog.askstring("Modelo de Layout", "Nome do modelo:")
+    if not nome:
+        print("Modelo não guardado.")
+        return
+    with fitz.open(pagina_atual['pdf']) as doc:
+        modelo = calibrar_modelo(doc[pagina_atual['numero']], nome)
+    if modelo is None:
+        print("❌ Nenhuma tabela encontrada nesta página.")
+        return
+    print(f"✅ Modelo guardado em '{salvar_modelo(modelo)}'")
 
 
 def main():
@@ -46,6 +105,8 @@ def main():
     doc = fitz.open(pdf_path)
     page = doc.load_page(page_num)
     pix = page.get_pixmap()
+    pagina_atual.update(pdf=pdf_path, numero=page_num,
+                        tamanho=(page.rect.width, page.rect.height))
     doc.close()
 
     # Cria uma nova janela para exibir a imagem
@@ -62,6 +123,8 @@ def main():
 
     # Associa o evento de clique do mouse à nossa função
     canvas.bind("<Button-1>", get_mouse_click)
+    window.bind("<Return>", salvar_modelo_clicado)
+    window.bind("a", calibrar_modelo_automatico)
 
     print("Clique no canto SUPERIOR ESQUERDO e depois no canto INFERIOR DIREITO da área desejada.")
 
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+from similaridade import hash_descricao
+
+# --- HISTÓRICO: Nº de hashes por consulta em carregar(sha256s), abaixo do
+# limite de parâmetros por instrução do SQLite (999 nas versões antigas) ---
+TAMANHO_LOTE_CONSULTA = 500
+
+
+class HistoricoTarefas:
+    """
+    Histórico (SQLite, só de acréscimo) do estado de cada tarefa em cada
+    relatório aplicado ao mestre: uma linha por (relatório, SEQ) com a data
+    do relatório, o STATUS, o GROUP e o hash da DESCRIPTION.
+
+    As linhas são indexadas pelo SHA-256 do relatório, pelo que reaplicar um
+    relatório (ex: ao reconstruir o mestre) não as duplica. Os textos das
+    descrições ficam numa tabela à parte, uma vez por hash.
+    """
+
+    def __init__(self, caminho_db):
+        self.conn = sqlite3.connect(caminho_db)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS historico (
+                sha256_relatorio TEXT NOT NULL,
+                data_relatorio TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                grupo TEXT,
+                hash_descricao TEXT,
+                PRIMARY KEY (sha256_relatorio, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_historico_seq
+                ON historico (seq, data_relatorio);
+            CREATE INDEX IF NOT EXISTS idx_historico_data
+                ON historico (data_relatorio, status);
+            CREATE TABLE IF NOT EXISTS historico_descricoes (
+                hash TEXT PRIMARY KEY,
+                texto TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def relatorios_registados(self):
+        """SHA-256 dos relatórios que já têm linhas no histórico."""
+        return {sha for (sha,) in self.conn.execute(
+            "SELECT DISTINCT sha256_relatorio FROM historico")}
+
+    def registar(self, sha256, data_relatorio, df_novo):
+        """Acrescenta as tarefas de um relatório (df_novo, já consolidado por SEQ)."""
+        descricoes = df_novo['DESCRIPTION'].fillna('').astype(str)
+        hashes = descricoes.map(hash_descricao)
+        data = pd.Timestamp(data_relatorio).strftime('%Y-%m-%d %H:%M:%S')
+        linhas = zip([sha256] * len(df_novo), [data] * len(df_novo),
+                     df_novo['SEQ'].astype(int).tolist(), df_novo['STATUS'].astype(str).tolist(),
+                     df_novo['GROUP'].astype(str).tolist(), hashes.tolist())
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO historico_descricoes VALUES (?, ?)",
+                zip(hashes.tolist(), descricoes.tolist()))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO historico VALUES (?, ?, ?, ?, ?, ?)", linhas)
+
+    def carregar(self, sha256s=None):
+        """
+        Linhas do histórico (relatório, data, SEQ, STATUS, GROUP), opcionalmente
+        só dos relatórios com SHA-256 em `sha256s`.
+        """
+        colunas = "sha256_relatorio, data_relatorio, seq, status, grupo"
+        if sha256s is None:
+            return pd.read_sql(f"SELECT {colunas} FROM historico", self.conn,
+                               parse_dates=['data_relatorio'])
+
+        # Filtrado no SQLite (pela chave primária), em lotes de parâmetros; o
+        # rowid repõe a ordem de inserção da leitura completa
+        sha256s = list(dict.fromkeys(sha256s))
+        partes = [pd.read_sql(
+            f"SELECT rowid, {colunas} FROM historico "
+            f"WHERE sha256_relatorio IN ({', '.join('?' * len(lote))})",
+            self.conn, params=lote, parse_dates=['data_relatorio'])
+            for lote in (sha256s[i:i + TAMANHO_LOTE_CONSULTA]
+                         for i in range(0, len(sha256s), TAMANHO_LOTE_CONSULTA))]
+        if not partes:
+            return pd.read_sql(f"SELECT {colunas} FROM historico WHERE 0", self.conn,
+                               parse_dates=['data_relatorio'])
+        return (pd.concat(partes, ignore_index=True).sort_values('rowid')
+                .drop(columns='rowid').reset_index(drop=True))
+
+    def linha_do_tempo(self, seq):
+        """
+        Estado da tarefa `seq` em cada relatório, por data, com a coluna
+        `mudou` a marcar os relatórios em que o STATUS mudou.
+        """
+        df = pd.read_sql("""
+            SELECT h.data_relatorio, h.status, h.grupo, d.texto AS descricao
+            FROM historico h LEFT JOIN historico_descricoes d ON d.hash = h.hash_descricao
+            WHERE h.seq = ? ORDER BY h.data_relatorio""", self.conn, params=(int(seq),),
+            parse_dates=['data_relatorio'])
+        df['mudou'] = df['status'].ne(df['status'].shift())
+        return df
+
+    def contagens_por_relatorio(self):
+        """Número de tarefas por STATUS em cada data de relatório (uma coluna por STATUS)."""
+        df = pd.read_sql("""
+            SELECT data_relatorio, status, COUNT(*) AS tarefas
+            FROM historico GROUP BY data_relatorio, status""", self.conn,
+            parse_dates=['data_relatorio'])
+        return df.pivot(index='data_relatorio', columns='status', values='tarefas').fillna(0).astype(int)
+
+    def fechar(self):
+        self.conn.close()
+
+
+def caminho_historico_para(caminho_mestre):
+    """Caminho do histórico de tarefas guardado ao lado do ficheiro mestre."""
+    base, _ = os.path.splitext(caminho_mestre)
+    return f"{base}.historico.sqlite"
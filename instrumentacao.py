@@ -0,0 +1,158 @@
+import cProfile
+import json
+import time
+from collections import defaultdict
+
+
+class _Medicao:
+    """Mede uma chamada de uma etapa; `contar` regista páginas/linhas tratadas."""
+
+    __slots__ = ('coletor', 'nome', 'inicio', 'paginas', 'linhas')
+
+    def __init__(self, coletor, nome):
+        self.coletor = coletor
+        self.nome = nome
+        self.paginas = 0
+        self.linhas = 0
+
+    def contar(self, paginas=0, linhas=0):
+        self.paginas += paginas
+        self.linhas += linhas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.coletor.registrar(self.nome, self.inicio,
+                               time.perf_counter() - self.inicio, self.paginas, self.linhas)
+        return False
+
+
+class _MedicaoNula:
+    """Usada com a instrumentação desligada: não mede nem guarda nada."""
+
+    __slots__ = ()
+
+    def contar(self, paginas=0, linhas=0):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_MEDICAO_NULA = _MedicaoNula()
+
+
+class Coletor:
+    """Acumula, por etapa, o tempo, o número de chamadas e as páginas/linhas."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = defaultdict(
+            lambda: {'segundos': 0.0, 'chamadas': 0, 'paginas': 0, 'linhas': 0})
+        self.eventos = []
+        self.com_workers = False
+
+    def registrar(self, nome, inicio, segundos, paginas, linhas):
+        etapa = self.etapas[nome]
+        etapa['segundos'] += segundos
+        etapa['chamadas'] += 1
+        etapa['paginas'] += paginas
+        etapa['linhas'] += linhas
+        self.eventos.append({'etapa': nome, 'inicio': inicio - self.inicio,
+                             'segundos': segundos, 'paginas': paginas, 'linhas': linhas})
+
+    def exportar(self):
+        return {'etapas': dict(self.etapas), 'eventos': self.eventos}
+
+    def incorporar(self, dados, origem=None):
+        """Junta as estatísticas exportadas por outro processo (ex: um worker)."""
+        for nome, valores in dados['etapas'].items():
+            etapa = self.etapas[nome]
+            for chave, valor in valores.items():
+                etapa[chave] += valor
+        for evento in dados['eventos']:
+            self.eventos.append(dict(evento, processo=origem))
+        self.com_workers = True
+
+
+# --- Estado do processo: None enquanto a instrumentação estiver desligada ---
+_coletor = None
+_perfil = None
+
+
+def ativar(perfil=False):
+    """Liga a instrumentação (e o cProfile, se `perfil`) com contadores limpos."""
+    global _coletor, _perfil
+    _coletor = Coletor()
+    if perfil:
+        _perfil = cProfile.Profile()
+        _perfil.enable()
+
+
+def ativa():
+    return _coletor is not None
+
+
+def etapa(nome):
+    """
+    Contexto que mede uma chamada da etapa `nome`:
+
+        with instrumentacao.etapa('merge') as medicao:
+            ...
+            medicao.contar(linhas=len(df))
+
+    Desligada, devolve sempre o mesmo objeto nulo, sem medir o tempo.
+    """
+    if _coletor is None:
+        return _MEDICAO_NULA
+    return _Medicao(_coletor, nome)
+
+
+def exportar_e_desativar():
+    """Devolve as estatísticas do processo atual e desliga a instrumentação."""
+    global _coletor
+    dados = _coletor.exportar() if _coletor is not None else None
+    _coletor = None
+    return dados
+
+
+def incorporar(dados, origem=None):
+    if _coletor is not None and dados:
+        _coletor.incorporar(dados, origem)
+
+
+def imprimir_resumo():
+    if _coletor is None or not _coletor.etapas:
+        return
+    total = time.perf_counter() - _coletor.inicio
+    print("\n⏱️ Tempo por etapa:")
+    print(f"   {'etapa':<16} {'chamadas':>9} {'páginas':>8} {'linhas':>8} {'tempo (s)':>10} {'% total':>8}")
+    for nome, e in _coletor.etapas.items():
+        print(f"   {nome:<16} {e['chamadas']:>9} {e['paginas']:>8} {e['linhas']:>8} "
+              f"{e['segundos']:>10.3f} {100 * e['segundos'] / total:>7.1f}%")
+    print(f"   {'execução':<16} {'':>9} {'':>8} {'':>8} {total:>10.3f}")
+    if _coletor.com_workers:
+        print("   (os tempos dos workers são somados, por isso podem passar de 100%)")
+
+
+def gravar(caminho_base):
+    """
+    Grava `<caminho_base>.json` com as etapas e os eventos e, se o cProfile
+    estiver ligado, `<caminho_base>.prof` (legível com pstats/snakeviz).
+    """
+    global _perfil
+    if _coletor is None:
+        return
+    dados = _coletor.exportar()
+    dados['total_segundos'] = time.perf_counter() - _coletor.inicio
+    with open(f"{caminho_base}.json", 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+    if _perfil is not None:
+        _perfil.disable()
+        _perfil.dump_stats(f"{caminho_base}.prof")
+        _perfil = None
@@ -0,0 +1,191 @@
+import bisect
+import glob
+import json
+import os
+from functools import lru_cache
+
+# --- Pasta com os modelos de layout calibrados (um JSON por formato de relatório) ---
+# Ao lado deste ficheiro, e não na pasta de trabalho, para que as execuções a
+# partir de outra pasta (ex: processar_lote.py com caminhos absolutos) os usem
+PASTA_MODELOS = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), 'Modelos_Layout')
+# Folga, em pontos, ao comparar posições da página com as do modelo
+TOLERANCIA = 2.0
+# Uma linha horizontal só separa linhas da tabela se cobrir esta fração da largura
+FRACAO_LINHA_HORIZONTAL = 0.9
+
+
+def criar_modelo(nome, tamanho_pagina, area, colunas, cabecalho):
+    """
+    Modelo de layout de uma tabela:
+      - tamanho_pagina: (largura, altura) das páginas onde se aplica
+      - area: (x0, y0, x1, y1) onde a tabela pode estar
+      - colunas: fronteiras x das colunas, da esquerda para a direita
+      - cabecalho: textos esperados na linha de cabeçalho, um por coluna
+    """
+    if len(colunas) != len(cabecalho) + 1:
+        raise ValueError(
+            "O modelo precisa de uma fronteira a mais do que colunas no cabeçalho.")
+    return {
+        'nome': nome,
+        'tamanho_pagina': [round(v, 2) for v in tamanho_pagina],
+        'area': [round(v, 2) for v in area],
+        'colunas': sorted(round(v, 2) for v in colunas),
+        'cabecalho': list(cabecalho),
+    }
+
+
+def calibrar_modelo(page, nome):
+    """
+    Cria um modelo a partir de uma página de exemplo, usando a primeira
+    tabela detetada pelo `find_tables` (fronteiras das colunas e área).
+    Devolve None se a página não tiver tabela.
+    """
+    tabelas = page.find_tables()
+    if not tabelas.tables:
+        return None
+    tabela = tabelas[0]
+    celulas = [c for c in tabela.rows[0].cells if c is not None]
+    colunas = [c[0] for c in celulas] + [celulas[-1][2]]
+    cabecalho = [' '.join(str(t or '').split()) for t in tabela.extract()[0]]
+    return criar_modelo(nome, (page.rect.width, page.rect.height), tabela.bbox,
+                        colunas, cabecalho)
+
+
+def salvar_modelo(modelo, pasta=PASTA_MODELOS):
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"{modelo['nome']}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(modelo, f, indent=2, ensure_ascii=False)
+    return caminho
+
+
+@lru_cache(maxsize=None)
+def _carregar_modelos(pasta):
+    modelos = []
+    for caminho in sorted(glob.glob(os.path.join(pasta, '*.json'))):
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                modelos.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Aviso: Modelo de layout '{caminho}' ignorado. Erro: {e}")
+    return tuple(modelos)
+
+
+def carregar_modelos(pasta=PASTA_MODELOS):
+    """Modelos guardados em `pasta` (lidos uma vez por processo)."""
+    return _carregar_modelos(os.path.abspath(pasta))
+
+
+def _perto(a, b):
+    return abs(a - b) <= TOLERANCIA
+
+
+def _linhas_da_tabela(page, modelo):
+    """
+    Fronteiras y das linhas da tabela: as linhas horizontais que cobrem a
+    largura do modelo e o fim das verticais (a tabela pode continuar na
+    página seguinte sem linha de fecho). Devolve None se as linhas verticais
+    não coincidirem com as colunas do modelo.
+    """
+    x0, y0, x1, y1 = modelo['area']
+    colunas = modelo['colunas']
+    largura = colunas[-1] - colunas[0]
+    horizontais = []
+    fim_verticais = None
+    colunas_vistas = set()
+
+    for desenho in page.get_drawings():
+        for item in desenho['items']:
+            if item[0] != 'l':
+                continue
+            a, b = item[1], item[2]
+            if abs(a.y - b.y) < 0.5 and abs(a.x - b.x) >= largura * FRACAO_LINHA_HORIZONTAL:
+                if y0 - TOLERANCIA <= a.y <= y1 + TOLERANCIA:
+                    horizontais.append(a.y)
+            elif abs(a.x - b.x) < 0.5 and x0 - TOLERANCIA <= a.x <= x1 + TOLERANCIA:
+                topo, base = sorted((a.y, b.y))
+                if base < y0 - TOLERANCIA or topo > y1 + TOLERANCIA:
+                    continue
+                coluna = next(
+                    (i for i, c in enumerate(colunas) if _perto(a.x, c)), None)
+                if coluna is None:
+                    return None
+                colunas_vistas.add(coluna)
+                fim_verticais = base if fim_verticais is None else max(
+                    fim_verticais, base)
+
+    if len(colunas_vistas) != len(colunas) or not horizontais:
+        return None
+
+    fronteiras = []
+    for y in sorted(horizontais + [fim_verticais]):
+        if not fronteiras or y - fronteiras[-1] > TOLERANCIA:
+            fronteiras.append(y)
+    return fronteiras if len(fronteiras) > 1 else None
+
+
+def extrair_tabela_por_modelo(page, modelo):
+    """
+    Extrai a tabela de `page` com as posições do modelo, sem deteção de
+    tabelas: as palavras de `page.get_text("words")` são distribuídas pelas
+    células conforme o seu centro. Devolve as linhas (listas de textos, como o
+    `Table.extract()` do PyMuPDF, cabeçalho incluído) ou None se a página não
+    corresponder ao modelo.
+    """
+    largura, altura = modelo['tamanho_pagina']
+    if not (_perto(page.rect.width, largura) and _perto(page.rect.height, altura)):
+        return None
+
+    fronteiras = _linhas_da_tabela(page, modelo)
+    if fronteiras is None:
+        return None
+
+    x0, y0, x1, y1 = modelo['area']
+    colunas = modelo['colunas']
+    num_colunas = len(colunas) - 1
+    celulas = [[[] for _ in range(num_colunas)]
+               for _ in range(len(fronteiras) - 1)]
+
+    for palavra in page.get_text('words'):
+        cx = (palavra[0] + palavra[2]) / 2
+        cy = (palavra[1] + palavra[3]) / 2
+        if not (x0 <= cx <= x1 and y0 <= cy <= y1):
+            continue
+        linha = bisect.bisect_right(fronteiras, cy) - 1
+        coluna = bisect.bisect_right(colunas, cx) - 1
+        if not (0 <= linha < len(celulas) and 0 <= coluna < num_colunas):
+            # Texto na área, mas fora da tabela: layout diferente do modelo
+            return None
+        celulas[linha][coluna].append(palavra)
+
+    linhas_tabela = [[_texto_celula(palavras) for palavras in linha]
+                     for linha in celulas]
+    if [' '.join(t.split()) for t in linhas_tabela[0]] != modelo['cabecalho']:
+        return None
+    return linhas_tabela
+
+
+def _texto_celula(palavras):
+    """
+    Junta as palavras de uma célula por linha visual: palavras com o centro
+    vertical à mesma altura ficam na mesma linha ('\n' entre linhas).
+    """
+    linhas = []
+    for palavra in sorted(palavras, key=lambda p: ((p[1] + p[3]) / 2, p[0])):
+        centro = (palavra[1] + palavra[3]) / 2
+        if linhas and centro - linhas[-1][0] <= TOLERANCIA:
+            linhas[-1][1].append(palavra)
+        else:
+            linhas.append((centro, [palavra]))
+    return '\n'.join(' '.join(p[4] for p in sorted(ps, key=lambda p: p[0]))
+                     for _, ps in linhas)
+
+
+def extrair_tabela(page, modelos):
+    """Tabela da página pelo primeiro modelo que corresponder, ou None."""
+    for modelo in modelos:
+        tabela = extrair_tabela_por_modelo(page, modelo)
+        if tabela is not None:
+            return tabela
+    return None
@@ -0,0 +1,163 @@
+import argparse
+import os
+import queue
+import threading
+import time
+
+import gerenciador_de_tarefas as gt
+
+# --- OBSERVADOR: Tempos (em segundos) do modo contínuo ---
+# Intervalo entre duas verificações da pasta
+INTERVALO_VERIFICACAO = 2.0
+# Um ficheiro só é processado depois de ficar este tempo sem mudar de
+# tamanho nem de data de modificação (cópias/uploads ainda a decorrer)
+TEMPO_ESTABILIZACAO = 5.0
+# Depois do primeiro ficheiro de uma rajada, espera-se até passar este tempo
+# sem chegarem outros, para que todos saiam numa só atualização do dashboard
+JANELA_AGRUPAMENTO = 10.0
+
+
+def assinaturas_relatorios(pasta):
+    """{caminho: (tamanho, mtime_ns)} dos relatórios PDF (gt.eh_relatorio_pdf) em `pasta`."""
+    assinaturas = {}
+    try:
+        entradas = list(os.scandir(pasta))
+    except FileNotFoundError:
+        return assinaturas
+    for entrada in entradas:
+        if entrada.is_file() and gt.eh_relatorio_pdf(entrada.name):
+            info = entrada.stat()
+            assinaturas[entrada.path] = (info.st_size, info.st_mtime_ns)
+    return assinaturas
+
+
+def pdf_completo(caminho):
+    """Um PDF escrito até ao fim termina com '%%EOF' (seguido de espaços, no máximo)."""
+    try:
+        with open(caminho, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 1024))
+            return b'%%EOF' in f.read()
+    except OSError:
+        return False
+
+
+class ObservadorRelatorios:
+    """
+    Observa a pasta de relatórios e mantém o dashboard atualizado.
+
+    A thread principal verifica a pasta periodicamente; um ficheiro novo ou
+    alterado entra na fila quando estabiliza (TEMPO_ESTABILIZACAO) e está
+    completo. Uma thread de trabalho esvazia a fila em lotes: espera que a
+    rajada acabe (JANELA_AGRUPAMENTO) e faz uma só chamada a
+    `atualizar_dashboard` com os ficheiros já estáveis, pelo que um PDF
+    ainda a ser copiado nunca é lido; no modo incremental, só os relatórios
+    ainda não ingeridos são extraídos e mesclados.
+
+    Os ficheiros já existentes ao arrancar também passam pela fila, pelo que
+    o primeiro lote recupera o que chegou com o observador parado.
+    """
+
+    def __init__(self, pasta, arquivo_mestre='Dashboard_Mestre.xlsx', intervalo=INTERVALO_VERIFICACAO,
+                 estabilizacao=TEMPO_ESTABILIZACAO, janela=JANELA_AGRUPAMENTO):
+        self.pasta = pasta
+        self.arquivo_mestre = arquivo_mestre
+        self.intervalo = intervalo
+        self.estabilizacao = estabilizacao
+        self.janela = janela
+        self.fila = queue.Queue()
+        self._parar = threading.Event()
+        # caminho -> assinatura com que foi posto na fila (já estável)
+        self._processados = {}
+        self._trava = threading.Lock()
+        # caminho -> (assinatura, instante em que foi vista pela primeira vez)
+        self._pendentes = {}
+
+    def verificar(self):
+        """Uma verificação da pasta; põe na fila os ficheiros já estáveis."""
+        agora = time.monotonic()
+        atuais = assinaturas_relatorios(self.pasta)
+        for caminho in set(self._pendentes) - set(atuais):
+            del self._pendentes[caminho]
+        with self._trava:
+            for caminho in set(self._processados) - set(atuais):
+                del self._processados[caminho]
+
+        for caminho, assinatura in atuais.items():
+            with self._trava:
+                if self._processados.get(caminho) == assinatura:
+                    continue
+                # Alterado depois de estável: deixa de ser lido até estabilizar de novo
+                self._processados.pop(caminho, None)
+            pendente = self._pendentes.get(caminho)
+            if pendente is None or pendente[0] != assinatura:
+                # Novo ou ainda a mudar: o debounce recomeça
+                self._pendentes[caminho] = (assinatura, agora)
+            elif agora - pendente[1] >= self.estabilizacao and pdf_completo(caminho):
+                del self._pendentes[caminho]
+                with self._trava:
+                    self._processados[caminho] = assinatura
+                self.fila.put(caminho)
+
+    def _proximo_lote(self):
+        """Bloqueia até haver ficheiros na fila e devolve a rajada completa."""
+        while not self._parar.is_set():
+            try:
+                lote = [self.fila.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    lote.append(self.fila.get(timeout=self.janela))
+                except queue.Empty:
+                    return lote
+        return None
+
+    def _trabalhar(self):
+        while True:
+            lote = self._proximo_lote()
+            if lote is None:
+                return
+            nomes = ', '.join(sorted(os.path.basename(c) for c in lote))
+            print(f"\n📥 {len(lote)} relatório(s) novo(s) ou alterado(s): {nomes}")
+            with self._trava:
+                estaveis = list(self._processados)
+            try:
+                gt.atualizar_dashboard(
+                    self.pasta, self.arquivo_mestre, arquivos=estaveis)
+            except Exception as e:
+                print(f"❌ ERRO ao atualizar o dashboard: {e}")
+            print(f"\n👀 A observar '{self.pasta}'...")
+
+    def executar(self):
+        """Corre até Ctrl+C; a atualização em curso termina antes de sair."""
+        trabalhador = threading.Thread(
+            target=self._trabalhar, name='atualizacao-dashboard')
+        trabalhador.start()
+        print(f"👀 A observar '{self.pasta}' (Ctrl+C para terminar)...")
+        try:
+            while True:
+                self.verificar()
+                time.sleep(self.intervalo)
+        except KeyboardInterrupt:
+            print("\n⏹️ A terminar o observador...")
+        finally:
+            self._parar.set()
+            trabalhador.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Observa a pasta de relatórios e atualiza o dashboard mestre a cada PDF novo ou alterado.")
+    parser.add_argument('pasta', nargs='?', default='Relatorios_PDF')
+    parser.add_argument('--mestre', default='Dashboard_Mestre.xlsx')
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_VERIFICACAO,
+                        help="segundos entre verificações da pasta")
+    parser.add_argument('--estabilizacao', type=float, default=TEMPO_ESTABILIZACAO,
+                        help="segundos sem mudanças até um ficheiro ser processado")
+    parser.add_argument('--janela', type=float, default=JANELA_AGRUPAMENTO,
+                        help="segundos de espera por mais ficheiros antes de atualizar")
+    args = parser.parse_args()
+
+    ObservadorRelatorios(args.pasta, args.mestre, args.intervalo,
+                         args.estabilizacao, args.janela).executar()
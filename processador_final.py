@@ -3,6 +3,7 @@ import pdfplumber
 import fitz  # PyMuPDF
 import re
 import os
+import io
 import xlsxwriter
 from datetime import datetime
 
@@ -13,51 +14,52 @@ def extrair_dados_com_pre_processamento(pdf_path):
     para desenhar guias e depois extrai as tabelas com PDFPlumber.
     """
 
-    # Etapa 1: Extração do Cabeçalho
     dados_cabecalho = {"report_datetime": None, "progress_percentage": None}
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            page_one = pdf.pages[0]
-            text_page_one = page_one.extract_text()
-            match_date = re.search(r"Today\n(.*)", text_page_one)
-            if match_date:
-                dados_cabecalho["report_datetime"] = match_date.group(
-                    1).strip()
-    except Exception as e:
-        print(f"Aviso: Não foi possível ler o cabeçalho. Erro: {e}")
 
-    # Etapa 2: Pré-processamento com Fitz
-    temp_pdf_path = "temp_processed.pdf"
+    # Etapa 1: Pré-processamento com Fitz (única abertura do PDF original).
+    # O documento com as guias fica num buffer em memória, sem ficheiro
+    # temporário, o que também permite chamadas em paralelo.
     try:
         with fitz.open(pdf_path) as doc:
             for page in doc:
                 for y in range(350, 800, 15):
                     page.draw_line(p1=(20, y), p2=(780, y),
                                    color=(0, 0, 0), width=0.5)
-            doc.save(temp_pdf_path)
+            buffer_processado = io.BytesIO(doc.tobytes())
     except Exception as e:
+        print(f"Aviso: Não foi possível ler o cabeçalho. Erro: {e}")
         print(f"Erro durante o pré-processamento com Fitz: {e}")
         return dados_cabecalho, pd.DataFrame()
 
-    # Etapa 3: Extração de Tabelas do PDF pré-processado
+    # Etapa 2: Cabeçalho e tabelas lidos do PDF pré-processado, com um único
+    # handle do PDFPlumber (as guias desenhadas não alteram o texto)
     tabelas_brutas = []
     try:
-        with pdfplumber.open(temp_pdf_path) as pdf:
+        with pdfplumber.open(buffer_processado) as pdf:
+            try:
+                page_one = pdf.pages[0]
+                text_page_one = page_one.extract_text()
+                match_date = re.search(r"Today\n(.*)", text_page_one)
+                if match_date:
+                    dados_cabecalho["report_datetime"] = match_date.group(
+                        1).strip()
+                page_one.close()
+            except Exception as e:
+                print(f"Aviso: Não foi possível ler o cabeçalho. Erro: {e}")
+
             for page in pdf.pages[1:]:
                 tabelas_pagina = page.extract_tables()
                 if tabelas_pagina:
                     tabelas_brutas.extend(tabelas_pagina)
+                page.close()
     except Exception as e:
         print(f"Erro ao extrair tabelas com PDFPlumber: {e}")
         return dados_cabecalho, pd.DataFrame()
-    finally:
-        if os.path.exists(temp_pdf_path):
-            os.remove(temp_pdf_path)
 
     if not tabelas_brutas:
         return dados_cabecalho, pd.DataFrame()
 
-    # Etapa 4: Limpeza e Concatenação dos dados extraídos
+    # Etapa 3: Limpeza e Concatenação dos dados extraídos
     dfs = []
     header = ['PHASE', 'SEQ', 'GROUP', 'DESCRIPTION',
               'STATUS', 'EXTERNAL TASK', 'ORIG']
@@ -83,7 +85,7 @@ def extrair_dados_com_pre_processamento(pdf_path):
 
     df_bruto = pd.concat(dfs, ignore_index=True)
 
-    # Etapa 5: Pós-processamento para juntar linhas de descrição
+    # Etapa 4: Pós-processamento para juntar linhas de descrição
     dados_corrigidos = []
     buffer_linha = {}
     for _, row in df_bruto.iterrows():
@@ -102,7 +104,7 @@ def extrair_dados_com_pre_processamento(pdf_path):
 
     df_final = pd.DataFrame(dados_corrigidos)
 
-    # Etapa 6: Limpeza Final
+    # Etapa 5: Limpeza Final
     df_final.loc[df_final['STATUS'] == '', 'STATUS'] = 'WAIT APPROVAL'
     df_final = df_final.drop(columns=['PHASE'], errors='ignore')
     colunas_ordenadas = ['GROUP', 'SEQ', 'DESCRIPTION',
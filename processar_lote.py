@@ -0,0 +1,333 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+import gerenciador_de_tarefas as gt
+from cache_extracao import calcular_sha256
+
+# --- LOTE: Limites da extração de cada ficheiro ---
+# Segundos que uma tentativa pode demorar até o processo ser terminado
+# (None ou 0 desliga o limite) e nº de tentativas por ficheiro.
+TEMPO_LIMITE_PADRAO = 300
+TENTATIVAS_PADRAO = 3
+LARGURA_BARRA = 30
+
+
+def _tarefa_cabecalho(caminho_pdf, saida, conhecidos):
+    """SHA-256 do PDF e o cabeçalho da 1.ª página (None se o hash está em `conhecidos`)."""
+    sha256 = calcular_sha256(caminho_pdf)
+    cabecalho = None if sha256 in conhecidos else gt.ler_cabecalho_pdf(caminho_pdf)
+    return 'ok', (sha256, cabecalho)
+
+
+def _tarefa_extracao(caminho_pdf, saida, _):
+    """
+    Extração completa. Um resultado vazio só é falha se o extrator imprimiu
+    um erro (devolvido como mensagem); sem erro, o relatório não tem tarefas.
+    """
+    resultado = gt.extrair_dados_pdf_pymupdf(caminho_pdf)
+    if resultado[1].empty:
+        erros = [linha for linha in saida.getvalue().splitlines() if linha.startswith('Erro')]
+        if erros:
+            return 'vazio', erros[-1]
+    return 'ok', resultado
+
+
+# --- Etapas executadas em processos com tempo limite: nome -> tarefa ---
+TAREFAS = {
+    'cabecalho': _tarefa_cabecalho,
+    'extracao': _tarefa_extracao,
+}
+
+
+def _executar_no_worker(etapa, caminho_pdf, argumento, conexao, verboso):
+    """
+    Corre num processo próprio a tarefa da `etapa` sobre um PDF e envia pela
+    `conexao` ('ok', valor), ('vazio', mensagem) ou ('erro', exceção). O
+    `find_tables` fica no próprio processo (sem pool por página), para que
+    terminá-lo cancele tudo.
+    """
+    saida = io.StringIO()
+    if not verboso:
+        sys.stdout = saida
+    gt.NUM_PROCESSOS_PAGINAS = 1
+    try:
+        conexao.send(TAREFAS[etapa](caminho_pdf, saida, argumento))
+    except Exception as e:
+        conexao.send(('erro', f"{type(e).__name__}: {e}"))
+    finally:
+        conexao.close()
+
+
+class ExtracaoEmLote:
+    """
+    Leitura dos PDFs com um processo por tentativa, no máximo `num_processos`
+    em simultâneo, tanto no hash e pré-leitura do cabeçalho como na extração.
+    Uma tentativa que exceda `tempo_limite` é terminada (e com ela o
+    `find_tables` ou a leitura presa); falhas, tempos esgotados e extrações
+    vazias com erro do extrator voltam à fila até `tentativas` (um relatório
+    sem tarefas e sem erro é um resultado normal). Um ficheiro cujo cabeçalho não se
+    lê fica de fora da atualização; um que não se extrai é devolvido vazio.
+    Em ambos os casos não é ingerido e volta a ser tentado na execução
+    seguinte.
+
+    `ler_cabecalhos` e `extrair` substituem `gt.hashes_e_cabecalhos` e
+    `gt.extrair_relatorios` em `gt.atualizar_dashboard`; o resultado de cada
+    ficheiro fica em `ficheiros` para o resumo JSON.
+    """
+
+    def __init__(self, num_processos=None, tempo_limite=TEMPO_LIMITE_PADRAO, tentativas=TENTATIVAS_PADRAO,
+                 progresso=True, verboso=False):
+        self.num_processos = max(1, num_processos or os.cpu_count() or 1)
+        self.tempo_limite = tempo_limite or None
+        self.tentativas = max(1, tentativas)
+        self.progresso = progresso
+        self.verboso = verboso
+        self.contexto = multiprocessing.get_context()
+        # caminho -> {'estado', 'tentativas' ({etapa: nº}), 'segundos', 'erros'}
+        self.ficheiros = {}
+
+    def _registo(self, arquivo_pdf):
+        return self.ficheiros.setdefault(arquivo_pdf, {
+            'estado': None, 'tentativas': {}, 'segundos': 0.0, 'erros': []})
+
+    def _desenhar_progresso(self, etapa, feitos, total, ativos, falhas, inicio, final=False):
+        if not self.progresso or not total:
+            return
+        decorrido = time.monotonic() - inicio
+        taxa = feitos / decorrido if decorrido > 0 else 0.0
+        preenchido = LARGURA_BARRA * feitos // total
+        sys.stderr.write(
+            f"\r{etapa:<10} [{'#' * preenchido}{'.' * (LARGURA_BARRA - preenchido)}] {feitos}/{total} ficheiros"
+            f" | {taxa:.2f} fich/s | {ativos} em curso | {falhas} falhas ")
+        if final:
+            sys.stderr.write('\n')
+        sys.stderr.flush()
+
+    def ler_cabecalhos(self, arquivos_pdf, cache=None):
+        """
+        ({arquivo: sha256}, {arquivo: cabeçalho}) como `gt.hashes_e_cabecalhos`;
+        os ficheiros que falharam todas as tentativas não aparecem.
+        """
+        conhecidos = frozenset(cache.hashes_com_cabecalho()) if cache is not None else frozenset()
+        print(f"📅 A ler hash e cabeçalho de {len(arquivos_pdf)} PDFs "
+              f"(limite de {self.tempo_limite or '∞'} s, {self.tentativas} tentativas)...")
+        hashes, lidos = {}, {}
+        for arquivo_pdf, valor in self._executar_com_limites(arquivos_pdf, 'cabecalho', conhecidos):
+            if valor is not None:
+                hashes[arquivo_pdf], cabecalho = valor
+                if cabecalho is not None:
+                    lidos[hashes[arquivo_pdf]] = cabecalho
+        if cache is not None:
+            if lidos:
+                cache.guardar_cabecalhos(lidos)
+            lidos = cache.obter_cabecalhos(hashes.values())
+        return hashes, {a: lidos[sha] for a, sha in hashes.items()}
+
+    def extrair(self, arquivos_pdf, cache=None, hashes=None):
+        """(dados_cabecalho, df) de cada PDF, na ordem de `arquivos_pdf`."""
+        hashes = dict(hashes or {})
+        resultados = {}
+        for arquivo_pdf in arquivos_pdf:
+            if cache is None:
+                continue
+            if arquivo_pdf not in hashes:
+                hashes[arquivo_pdf] = calcular_sha256(arquivo_pdf)
+            resultado = cache.obter(hashes[arquivo_pdf])
+            if resultado is not None:
+                resultados[arquivo_pdf] = resultado
+                registo = self._registo(arquivo_pdf)
+                registo['estado'] = registo['estado'] or 'cache'
+        if resultados:
+            print(
+                f"💾 {len(resultados)} de {len(arquivos_pdf)} relatórios carregados do cache.")
+
+        a_extrair = [a for a in arquivos_pdf if a not in resultados]
+        if a_extrair:
+            print(
+                f"⚙️ Extraindo {len(a_extrair)} PDFs com até {self.num_processos} processos "
+                f"(limite de {self.tempo_limite or '∞'} s, {self.tentativas} tentativas)...")
+            for arquivo_pdf, resultado in self._executar_com_limites(a_extrair, 'extracao'):
+                if resultado is None:
+                    resultado = ({'report_date': None}, pd.DataFrame())
+                else:
+                    self._registo(arquivo_pdf)['estado'] = 'extraido'
+                resultados[arquivo_pdf] = resultado
+                if cache is not None and not resultado[1].empty:
+                    cache.guardar(hashes[arquivo_pdf], resultado)
+        return [resultados[a] for a in arquivos_pdf]
+
+    def _iniciar(self, etapa, arquivo_pdf, argumento):
+        recetor, emissor = self.contexto.Pipe(duplex=False)
+        processo = self.contexto.Process(
+            target=_executar_no_worker, args=(etapa, arquivo_pdf, argumento, emissor, self.verboso),
+            daemon=True)
+        processo.start()
+        emissor.close()
+        tentativas = self._registo(arquivo_pdf)['tentativas']
+        tentativas[etapa] = tentativas.get(etapa, 0) + 1
+        return recetor, processo
+
+    def _executar_com_limites(self, arquivos_pdf, etapa, argumento=None):
+        """
+        Gera (arquivo, valor) à medida que cada ficheiro termina a `etapa`,
+        com valor None se esgotou as tentativas.
+        """
+        pendentes = deque(arquivos_pdf)
+        # recetor -> (arquivo, processo, instante de início)
+        ativos = {}
+        feitos = falhas = 0
+        inicio = time.monotonic()
+        try:
+            while pendentes or ativos:
+                while pendentes and len(ativos) < self.num_processos:
+                    arquivo_pdf = pendentes.popleft()
+                    recetor, processo = self._iniciar(etapa, arquivo_pdf, argumento)
+                    ativos[recetor] = (arquivo_pdf, processo, time.monotonic())
+
+                terminados = []
+                for recetor in wait(list(ativos), timeout=0.5):
+                    arquivo_pdf, processo, inicio_tentativa = ativos.pop(recetor)
+                    try:
+                        estado, valor = recetor.recv()
+                    except EOFError:
+                        processo.join()
+                        estado, valor = 'erro', f"o processo terminou sem resultado (código {processo.exitcode})"
+                    recetor.close()
+                    processo.join()
+                    terminados.append((arquivo_pdf, estado, valor, inicio_tentativa))
+
+                agora = time.monotonic()
+                for recetor, (arquivo_pdf, processo, inicio_tentativa) in list(ativos.items()):
+                    if self.tempo_limite is None or agora - inicio_tentativa < self.tempo_limite:
+                        continue
+                    del ativos[recetor]
+                    processo.terminate()
+                    processo.join()
+                    recetor.close()
+                    terminados.append((arquivo_pdf, 'tempo_esgotado',
+                                       f"sem resultado após {self.tempo_limite} s", inicio_tentativa))
+
+                for arquivo_pdf, estado, valor, inicio_tentativa in terminados:
+                    self._registo(arquivo_pdf)['segundos'] += time.monotonic() - inicio_tentativa
+                    if estado == 'ok':
+                        feitos += 1
+                        yield arquivo_pdf, valor
+                    elif self._falhou(arquivo_pdf, etapa, estado, valor, pendentes):
+                        feitos += 1
+                        falhas += 1
+                        yield arquivo_pdf, None
+
+                self._desenhar_progresso(
+                    etapa, feitos, len(arquivos_pdf), len(ativos), falhas, inicio)
+            self._desenhar_progresso(
+                etapa, feitos, len(arquivos_pdf), 0, falhas, inicio, final=True)
+        finally:
+            # Interrompido (ex: Ctrl+C): termina as tentativas em curso e marca
+            # como canceladas as que ainda não tinham terminado
+            for recetor, (arquivo_pdf, processo, _) in ativos.items():
+                processo.terminate()
+                processo.join()
+                recetor.close()
+            for arquivo_pdf in [a for a, _, _ in ativos.values()] + list(pendentes):
+                self._registo(arquivo_pdf)['estado'] = 'cancelado'
+
+    def _falhou(self, arquivo_pdf, etapa, tipo, mensagem, pendentes):
+        """Regista a falha e volta a pôr o ficheiro na fila; True se esgotou as tentativas da etapa."""
+        registo = self._registo(arquivo_pdf)
+        tentativas = registo['tentativas'][etapa]
+        registo['erros'].append({'etapa': etapa, 'tipo': tipo, 'mensagem': mensagem})
+        if tentativas < self.tentativas:
+            pendentes.append(arquivo_pdf)
+            return False
+        registo['estado'] = 'falhou'
+        if self.progresso:
+            sys.stderr.write('\n')
+        print(
+            f"❌ '{os.path.basename(arquivo_pdf)}' falhou ({etapa}) após {tentativas} tentativas: {mensagem}")
+        return True
+
+    def resumo(self, pasta, arquivo_mestre, dashboard_gravado, inicio, cancelado=False):
+        """
+        Resumo da execução, para gravar em JSON. Os ficheiros lidos mas não
+        extraídos (já ingeridos ou duplicados) ficam com o estado 'nao_extraido'.
+        """
+        ficheiros = [{'arquivo': os.path.basename(arquivo), **registo}
+                     for arquivo, registo in sorted(self.ficheiros.items())]
+        for ficheiro in ficheiros:
+            ficheiro['estado'] = ficheiro['estado'] or 'nao_extraido'
+            ficheiro['segundos'] = round(ficheiro['segundos'], 3)
+        return {
+            'pasta': pasta,
+            'mestre': arquivo_mestre,
+            'inicio': inicio.isoformat(timespec='seconds'),
+            'duracao_s': round((datetime.now() - inicio).total_seconds(), 3),
+            'processos': self.num_processos,
+            'tempo_limite_s': self.tempo_limite,
+            'tentativas': self.tentativas,
+            'cancelado': cancelado,
+            'dashboard_gravado': dashboard_gravado,
+            'totais': {estado: sum(f['estado'] == estado for f in ficheiros)
+                       for estado in ('extraido', 'cache', 'nao_extraido', 'falhou', 'cancelado')},
+            'falhas': [f for f in ficheiros if f['estado'] in ('falhou', 'cancelado')],
+            'ficheiros': ficheiros,
+        }
+
+
+def caminho_resumo_lote_para(caminho_mestre):
+    """Caminho do resumo JSON da última execução em lote, ao lado do ficheiro mestre."""
+    base, _ = os.path.splitext(caminho_mestre)
+    return f"{base}.lote.json"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Atualiza os dashboards mestre a partir de uma pasta de relatórios, com tempo limite "
+                    "e novas tentativas por ficheiro e um resumo JSON das falhas.")
+    parser.add_argument('pasta', nargs='?', default='Relatorios_PDF')
+    parser.add_argument('--mestre', default='Dashboard_Mestre.xlsx',
+                        help="ficheiro mestre base (os mestres por nº de relatório ficam ao lado)")
+    parser.add_argument('--processos', type=int, default=gt.NUM_PROCESSOS_EXTRACAO,
+                        help="ficheiros extraídos em simultâneo (por omissão, um por núcleo)")
+    parser.add_argument('--tempo-limite', type=float, default=TEMPO_LIMITE_PADRAO,
+                        help="segundos por tentativa antes de a cancelar (0 desliga)")
+    parser.add_argument('--tentativas', type=int, default=TENTATIVAS_PADRAO,
+                        help="tentativas por ficheiro")
+    parser.add_argument('--resumo', help="ficheiro JSON do resumo (por omissão, <mestre>.lote.json)")
+    parser.add_argument('--sem-progresso', action='store_true',
+                        help="não mostra a barra de progresso")
+    parser.add_argument('--verboso', action='store_true',
+                        help="mostra as mensagens dos processos de extração")
+    args = parser.parse_args()
+
+    lote = ExtracaoEmLote(args.processos, args.tempo_limite, args.tentativas,
+                          progresso=not args.sem_progresso and sys.stderr.isatty(), verboso=args.verboso)
+    inicio = datetime.now()
+    cancelado = False
+    gravado = False
+    try:
+        gravado = gt.atualizar_dashboard(
+            args.pasta, args.mestre, extrair=lote.extrair, ler_cabecalhos=lote.ler_cabecalhos)
+    except KeyboardInterrupt:
+        cancelado = True
+        print("\n⏹️ Execução cancelada.")
+
+    resumo = lote.resumo(args.pasta, args.mestre, gravado, inicio, cancelado)
+    caminho_resumo = args.resumo or caminho_resumo_lote_para(args.mestre)
+    with open(caminho_resumo, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f"📊 Resumo gravado em '{caminho_resumo}' ({len(resumo['falhas'])} falhas).")
+
+    if cancelado:
+        sys.exit(130)
+    sys.exit(0 if gravado and not resumo['falhas'] else 1)
@@ -0,0 +1,198 @@
+import bisect
+import hashlib
+import sqlite3
+from collections import defaultdict
+
+try:
+    # O thefuzz (>= 0.20) delega o fuzz.ratio ao rapidfuzz; usá-lo diretamente
+    # dá os mesmos valores com o ciclo de comparação em C.
+    from rapidfuzz import fuzz as _fuzz_c
+    from rapidfuzz import process as _process_c
+except ImportError:
+    _fuzz_c = None
+    _process_c = None
+    from thefuzz import fuzz as _fuzz_py
+
+LIMITE_SIMILARIDADE = 98
+
+
+def _ratio(s1, s2):
+    """Mesma pontuação inteira que o `thefuzz.fuzz.ratio`."""
+    if _fuzz_c is not None:
+        return int(round(_fuzz_c.ratio(s1, s2)))
+    return _fuzz_py.ratio(s1, s2)
+
+
+def _comprimento_maximo(comprimento, corte):
+    """
+    Maior comprimento que ainda pode atingir `corte` face a uma string de
+    `comprimento` caracteres. O ratio é 200 * LCS / (l1 + l2) e o LCS não
+    passa do comprimento menor, logo l2 <= l1 * (200 - corte) / corte.
+    """
+    if corte <= 0:
+        return float('inf')
+    # Pequena folga para não perder candidatos por arredondamento
+    return comprimento * (200 - corte) / corte + 1e-9
+
+
+def hash_descricao(texto):
+    """Hash estável de uma descrição, usado como chave nos pares guardados."""
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+class CacheSimilaridade:
+    """
+    Pares de descrições similares guardados entre execuções (SQLite).
+
+    Regista os hashes das descrições já comparadas entre si e os pares que
+    atingiram o limite. Na execução seguinte só são pontuados os pares que
+    envolvem descrições novas ou alteradas; hashes que deixaram de existir no
+    mestre são removidos juntamente com os seus pares.
+    """
+
+    def __init__(self, caminho_db):
+        self.conn = sqlite3.connect(caminho_db)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS similaridade_meta (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+            CREATE TABLE IF NOT EXISTS similaridade_descricoes (
+                hash TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS similaridade_pares (
+                hash_a TEXT NOT NULL,
+                hash_b TEXT NOT NULL,
+                PRIMARY KEY (hash_a, hash_b)
+            );
+            CREATE INDEX IF NOT EXISTS idx_similaridade_pares_b
+                ON similaridade_pares (hash_b);
+        """)
+        self.conn.commit()
+
+    def sincronizar(self, hashes_atuais, limite):
+        """
+        Remove descrições que sumiram do mestre (e os seus pares) e devolve
+        (hashes já comparados, pares similares conhecidos) para o `limite`.
+        """
+        with self.conn:
+            linha = self.conn.execute(
+                "SELECT valor FROM similaridade_meta WHERE chave = 'limite'").fetchone()
+            if linha is None or float(linha[0]) != float(limite):
+                self.conn.execute("DELETE FROM similaridade_descricoes")
+                self.conn.execute("DELETE FROM similaridade_pares")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO similaridade_meta VALUES ('limite', ?)", (str(limite),))
+
+            self.conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS hashes_atuais (hash TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM hashes_atuais")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO hashes_atuais VALUES (?)", [(h,) for h in hashes_atuais])
+            self.conn.execute(
+                "DELETE FROM similaridade_descricoes WHERE hash NOT IN (SELECT hash FROM hashes_atuais)")
+            self.conn.execute("""
+                DELETE FROM similaridade_pares
+                WHERE hash_a NOT IN (SELECT hash FROM hashes_atuais)
+                   OR hash_b NOT IN (SELECT hash FROM hashes_atuais)""")
+
+        conhecidos = {h for (h,) in self.conn.execute(
+            "SELECT hash FROM similaridade_descricoes")}
+        pares = set(self.conn.execute(
+            "SELECT hash_a, hash_b FROM similaridade_pares"))
+        return conhecidos, pares
+
+    def registrar(self, hashes_comparados, pares):
+        """Guarda os hashes agora comparados e os pares similares encontrados."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO similaridade_descricoes VALUES (?)",
+                [(h,) for h in hashes_comparados])
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO similaridade_pares VALUES (?, ?)",
+                [tuple(sorted(p)) for p in pares])
+
+    def fechar(self):
+        self.conn.close()
+
+
+def _pares_similares(textos, limite, ja_comparados=frozenset()):
+    """
+    Devolve os pares (texto_a, texto_b) de textos distintos com
+    `fuzz.ratio >= limite`, ignorando pares em que ambos os textos estão em
+    `ja_comparados`.
+
+    Os textos são ordenados por comprimento e cada um só é comparado com a
+    janela de comprimentos compatível com o limite; os candidatos da janela
+    são pontuados em C (rapidfuzz), com corte.
+    """
+    textos = sorted(textos, key=len)
+    comprimentos = [len(t) for t in textos]
+    pares = set()
+
+    # O ratio arredondado atinge `limite` a partir de `limite - 0.5`
+    corte = limite - 0.5
+    for i, texto in enumerate(textos):
+        fim = bisect.bisect_right(
+            comprimentos, _comprimento_maximo(comprimentos[i], corte), lo=i + 1)
+        candidatos = textos[i + 1:fim]
+        if texto in ja_comparados:
+            candidatos = [c for c in candidatos if c not in ja_comparados]
+        if not candidatos:
+            continue
+        if _process_c is not None:
+            encontrados = [
+                c for c, pontuacao, _ in _process_c.extract(
+                    texto, candidatos, scorer=_fuzz_c.ratio,
+                    score_cutoff=max(corte, 0), limit=None)
+                if int(round(pontuacao)) >= limite]
+        else:
+            encontrados = [c for c in candidatos if _ratio(texto, c) >= limite]
+        pares.update((texto, c) for c in encontrados)
+    return pares
+
+
+def encontrar_descricoes_similares(descricoes, limite=LIMITE_SIMILARIDADE, cache=None):
+    """
+    Devolve o conjunto de posições de `descricoes` que têm pelo menos outra
+    descrição com `fuzz.ratio >= limite`.
+
+    Dá exatamente o mesmo resultado que a comparação de todos os pares, mas
+    descrições idênticas são agrupadas e comparadas uma única vez e as
+    restantes passam pelo bloqueio por comprimento de `_pares_similares`.
+    Com um `CacheSimilaridade`, só os pares que envolvem descrições novas são
+    pontuados; os restantes vêm do cache.
+    """
+    posicoes_por_texto = defaultdict(list)
+    for posicao, texto in enumerate(descricoes):
+        posicoes_por_texto[texto].append(posicao)
+
+    similares = set()
+
+    # Descrições repetidas: basta comparar o texto consigo próprio
+    for texto, posicoes in posicoes_por_texto.items():
+        if len(posicoes) > 1 and _ratio(texto, texto) >= limite:
+            similares.add(texto)
+
+    if cache is None:
+        pares = _pares_similares(posicoes_por_texto, limite)
+    else:
+        hash_por_texto = {t: hash_descricao(t) for t in posicoes_por_texto}
+        texto_por_hash = {h: t for t, h in hash_por_texto.items()}
+        hashes_conhecidos, pares_conhecidos = cache.sincronizar(
+            texto_por_hash, limite)
+        ja_comparados = {texto_por_hash[h] for h in hashes_conhecidos}
+        pares = _pares_similares(posicoes_por_texto, limite, ja_comparados)
+        cache.registrar(texto_por_hash, [
+            (hash_por_texto[a], hash_por_texto[b]) for a, b in pares])
+        pares.update((texto_por_hash[a], texto_por_hash[b])
+                     for a, b in pares_conhecidos)
+
+    for a, b in pares:
+        similares.add(a)
+        similares.add(b)
+
+    indices_similares = set()
+    for texto in similares:
+        indices_similares.update(posicoes_por_texto[texto])
+    return indices_similares
@@ -0,0 +1,76 @@
+import pytest
+
+from gerenciador_de_tarefas import (LINHA_CABECALHO, LINHA_CONTINUACAO,
+                                    LINHA_CRITICA, LINHA_DESLOCADA,
+                                    LINHA_NORMAL, _linhas_validadas,
+                                    classificar_linha)
+
+# --- Linhas brutas e o tipo atribuído pelo classificador ---
+LINHAS = [
+    (['SEQ', 'GROUP', 'DESCRIPTION', 'STATUS'], LINHA_CABECALHO),
+    (['ID', 'SEQ', 'DESCRIPTION', 'STATUS'], LINHA_CABECALHO),
+    # O cabeçalho completo cai na continuação, que o descarta pelo texto
+    (['PHASE', 'SEQ', 'GROUP', 'DESCRIPTION', 'STATUS', 'EXTERNAL TASK', 'ORIG'], LINHA_CONTINUACAO),
+    (['1321', '53', '(FINDING) DVDR\nFAILURE', 'OPEN'], LINHA_CRITICA),
+    (['TO BE\nDEFINED', '8', 'Planned', 'FUEL TANK BIOCIDE', 'OPEN', '', ''], LINHA_NORMAL),
+    ([None, ' 9 ', 'Planned', 'APU', 'OPEN'], LINHA_NORMAL),
+    (['15', 'Planned', 'WHEEL CHECK', 'OPEN', '32-41-00-001', ''], LINHA_DESLOCADA),
+    (['', None, 'BORESCOPE\nINSPECTION', '', ''], LINHA_CONTINUACAO),
+    ([], LINHA_CONTINUACAO),
+]
+
+# --- Casos fixos: (nome, tabelas brutas, registos esperados) ---
+# Fixam a classificação de cada tipo de linha (crítica, normal, deslocada e
+# continuação); os registos seguem a ordem de COLUNAS_TAREFA.
+CASOS = [
+    ('cabecalho ignorado',
+     [[['PHASE', 'SEQ', 'GROUP', 'DESCRIPTION', 'STATUS', 'EXTERNAL TASK', 'ORIG']]],
+     []),
+    ('critica',
+     [[['1321', '53', '(FINDING) DVDR\nFAILURE', 'OPEN']]],
+     [['None', 53, 'Finding', '(FINDING) DVDR FAILURE', 'OPEN', '1321', 'None']]),
+    ('critica com follow up longo',
+     [[['1321', '53', 'DVDR FAILURE', 'IDENTIFICADO POSSÍVEL MATERIAL EM ESTOQUE', 'Não']]],
+     [['None', 53, 'Finding', 'DVDR FAILURE IDENTIFICADO POSSÍVEL MATERIAL EM ESTOQUE',
+       'OPEN', '1321', 'None']]),
+    ('normal',
+     [[['TO BE\nDEFINED', '8', 'Planned', '28-11-00-003 - FUEL TANK\nBIOCIDE', 'OPEN',
+        '28-11-00-003', '']]],
+     [['TO BE DEFINED', 8, 'Planned', '28-11-00-003 - FUEL TANK BIOCIDE', 'OPEN',
+       '28-11-00-003', '']]),
+    ('normal em texto corrido (SB/ADs)',
+     [[['', '120', 'SB/ADs AD (ANAC) 2024-05-01 INSPECT WING', None]]],
+     [['', 120, 'SB/ADs', 'AD (ANAC) 2024-05-01 INSPECT WING', 'OPEN',
+       'AD (ANAC) 2024-05-01', 'None']]),
+    ('normal em texto corrido (Customer Report)',
+     [[['X', '121', 'Customer Report OIL LEAK ON PANEL', 'CLOSED', '12-34-56-789']]],
+     [['X', 121, 'Customer Report', 'OIL LEAK ON PANEL', 'CLOSED', '12-34-56-789', 'None']]),
+    ('deslocada',
+     [[['15', 'Planned', 'WHEEL CHECK', 'OPEN', '32-41-00-001', '']]],
+     [['None', 15, 'Planned', 'WHEEL CHECK', 'OPEN', '32-41-00-001', '']]),
+    ('deslocada em texto corrido',
+     [[['16', 'SB/ADs AD (ANAC) 2024-05-01 CHECK WAIT APPROVAL']]],
+     [['None', 16, 'SB/ADs', 'AD (ANAC) 2024-05-01 CHECK', 'WAIT APPROVAL', 'None', 'None']]),
+    ('continuacao na pagina seguinte',
+     [[['', '17', 'Planned', 'ENGINE', 'OPEN', '', '']],
+      [['PHASE', 'SEQ', 'GROUP', 'DESCRIPTION', 'STATUS', 'EXTERNAL TASK', 'ORIG'],
+       ['', None, 'BORESCOPE\nINSPECTION', '', '']]],
+     [['', 17, 'Planned', 'ENGINE BORESCOPE INSPECTION', 'OPEN', '', '']]),
+    ('continuacao com codigo de tarefa ignorada',
+     [[['', '18', 'Planned', 'APU', 'CLOSED', '', ''],
+       ['', '', '49-00-00-001 - APU CHECK', '', '']]],
+     [['', 18, 'Planned', 'APU', 'CLOSED', '', '']]),
+]
+
+
+@pytest.mark.parametrize('linha, tipo', LINHAS)
+def test_classificar_linha(linha, tipo):
+    obtido, celulas = classificar_linha(linha)
+    assert obtido == tipo
+    assert celulas == [str(c or '').strip() for c in linha]
+
+
+@pytest.mark.parametrize('tabelas, esperado', [c[1:] for c in CASOS], ids=[c[0] for c in CASOS])
+def test_linhas_validadas(tabelas, esperado):
+    registos = [list(r.values()) for r in _linhas_validadas(tabelas)]
+    assert registos == esperado
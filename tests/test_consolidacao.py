@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+import pytest
+
+from benchmark_consolidacao import (CONSOLIDACOES, registos_do_corpus,
+                                    registos_sinteticos)
+
+PASTA_RELATORIOS = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), 'Relatorios_PDF')
+
+
+@pytest.fixture(scope='module')
+def registos_corpus():
+    """Registos por consolidar de cada relatório incluído no repositório."""
+    return registos_do_corpus(PASTA_RELATORIOS)
+
+
+@pytest.mark.parametrize('nova, legado', [c[1:] for c in CONSOLIDACOES],
+                         ids=[c[0] for c in CONSOLIDACOES])
+def test_consolidacao_igual_a_original_no_corpus(registos_corpus, nova, legado):
+    assert registos_corpus
+    for df in registos_corpus:
+        pd.testing.assert_frame_equal(nova(df), legado(df))
+
+
+@pytest.mark.parametrize('nova, legado', [c[1:] for c in CONSOLIDACOES],
+                         ids=[c[0] for c in CONSOLIDACOES])
+def test_consolidacao_igual_a_original_em_registos_sinteticos(nova, legado):
+    df = registos_sinteticos(2_000, 4)
+    pd.testing.assert_frame_equal(nova(df), legado(df))
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from benchmark_merge import (CENARIO_PARIDADE, executar, mesclar_legado,
+                             normalizar_mestre)
+from gerenciador_de_tarefas import (STATUS_CLOSED, STATUS_OPEN,
+                                    STATUS_POSTPONED, STATUS_REPLANEJADO,
+                                    STATUS_WAIT_APPROVAL,
+                                    mesclar_relatorio_no_mestre)
+
+# --- Tarefas de teste: SEQ -> STATUS em cada relatório (None = ausente) ---
+# Cada tarefa é retirada (ausente depois de vista) e volta num relatório
+# seguinte, com o STATUS que tinha ou com outro.
+SEQUENCIAS = {
+    1: [STATUS_OPEN, None, STATUS_OPEN, STATUS_OPEN],
+    2: [STATUS_CLOSED, None, STATUS_OPEN, None],
+    3: [STATUS_POSTPONED, None, STATUS_POSTPONED, STATUS_OPEN],
+    4: [STATUS_OPEN, None, None, STATUS_CLOSED],
+    5: [STATUS_WAIT_APPROVAL, None, STATUS_REPLANEJADO, None],
+    6: [None, STATUS_OPEN, None, STATUS_OPEN],
+    7: [STATUS_REPLANEJADO, STATUS_OPEN, None, STATUS_CLOSED],
+    8: [STATUS_OPEN, STATUS_CLOSED, None, STATUS_OPEN],
+}
+
+
+def relatorios_das_sequencias(sequencias):
+    """(data, df_novo) de cada relatório descrito em `sequencias`."""
+    num_relatorios = len(next(iter(sequencias.values())))
+    for r in range(num_relatorios):
+        linhas = [(seq, estados[r]) for seq, estados in sequencias.items()
+                  if estados[r] is not None]
+        df_novo = pd.DataFrame({
+            'PHASE': '',
+            'SEQ': [seq for seq, _ in linhas],
+            'GROUP': 'Planned',
+            'DESCRIPTION': [f'TASK {seq}' for seq, _ in linhas],
+            'STATUS': [status for _, status in linhas],
+            'EXTERNAL TASK': '',
+            'ORIG': '',
+        })
+        yield datetime(2025, 1, 1 + 7 * r), df_novo
+
+
+def _mesclar_todos(funcao_mesclagem, relatorios):
+    df_mestre = pd.DataFrame()
+    for data_relatorio, df_novo in relatorios:
+        df_mestre = funcao_mesclagem(df_mestre, df_novo.copy(), data_relatorio)
+    return df_mestre
+
+
+def test_mesclagem_igual_a_original_com_tarefas_que_voltam():
+    relatorios = list(relatorios_das_sequencias(SEQUENCIAS))
+    pd.testing.assert_frame_equal(
+        normalizar_mestre(_mesclar_todos(mesclar_relatorio_no_mestre, relatorios)),
+        normalizar_mestre(_mesclar_todos(mesclar_legado, relatorios)))
+
+
+@pytest.mark.parametrize('cenario', [CENARIO_PARIDADE, (300, 20, 20, 0.4)])
+def test_mesclagem_igual_a_original_em_relatorios_sinteticos(cenario):
+    df_mestre, _, _ = executar(mesclar_relatorio_no_mestre, *cenario)
+    df_legado, _, _ = executar(mesclar_legado, *cenario)
+    pd.testing.assert_frame_equal(
+        normalizar_mestre(df_mestre), normalizar_mestre(df_legado))
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+from thefuzz import fuzz
+
+from similaridade import (LIMITE_SIMILARIDADE, CacheSimilaridade,
+                          encontrar_descricoes_similares)
+
+LIMITES = [LIMITE_SIMILARIDADE, 95, 90, 80, 60]
+
+
+def descricoes_sinteticas(quantidade=400, seed=0):
+    """
+    Descrições de tarefas com repetições exatas, variações de um ou poucos
+    caracteres e comprimentos muito diferentes (incluindo vazias).
+    """
+    rng = random.Random(seed)
+    palavras = ['INSPECT', 'REPLACE', 'LH', 'RH', 'MLG', 'NLG', 'ACTUATOR', 'PANEL',
+                'SEAL', 'CORROSION', 'FOUND', 'ON', 'FWD', 'AFT', 'CARGO', 'DOOR',
+                'AD (ANAC) 2020-01-02', 'SB', 'TORQUE', 'CHECK', 'LEAK', 'HYD']
+    bases = [' '.join(rng.choices(palavras, k=rng.randint(1, 25))) for _ in range(60)]
+    descricoes = []
+    for _ in range(quantidade):
+        texto = rng.choice(bases)
+        for _ in range(rng.choice([0, 0, 1, 2, 5])):
+            posicao = rng.randrange(len(texto) + 1)
+            texto = texto[:posicao] + rng.choice('ABCDE 0123-') + texto[posicao + 1:]
+        descricoes.append(texto)
+    return descricoes + ['', '', 'X']
+
+
+def similares_por_forca_bruta(descricoes, limite):
+    """Comparação original de todos os pares com `fuzz.ratio`."""
+    indices = set()
+    for i in range(len(descricoes)):
+        for j in range(i + 1, len(descricoes)):
+            if fuzz.ratio(descricoes[i], descricoes[j]) >= limite:
+                indices.add(i)
+                indices.add(j)
+    return indices
+
+
+@pytest.fixture(scope='module')
+def descricoes():
+    return descricoes_sinteticas()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheSimilaridade(str(tmp_path / 'similaridade.sqlite'))
+    yield cache
+    cache.fechar()
+
+
+@pytest.mark.parametrize('limite', LIMITES)
+def test_similares_iguais_a_forca_bruta(descricoes, limite, cache):
+    esperado = similares_por_forca_bruta(descricoes, limite)
+    assert esperado
+    assert encontrar_descricoes_similares(descricoes, limite) == esperado
+    # Cache vazio e depois já preenchido com os mesmos textos
+    assert encontrar_descricoes_similares(descricoes, limite, cache=cache) == esperado
+    assert encontrar_descricoes_similares(descricoes, limite, cache=cache) == esperado
+
+
+@pytest.mark.parametrize('limite', LIMITES)
+def test_cache_com_descricoes_alteradas(descricoes, limite, cache):
+    encontrar_descricoes_similares(descricoes, limite, cache=cache)
+
+    # Sai um terço das descrições e entram variações das que ficaram
+    rng = random.Random(1)
+    seguintes = descricoes[::3] + descricoes[1::3] + \
+        [d[:-1] + 'Z' for d in rng.sample(descricoes, 40) if d]
+    assert encontrar_descricoes_similares(seguintes, limite, cache=cache) == \
+        similares_por_forca_bruta(seguintes, limite)
+
+
+def test_cache_descartado_ao_mudar_o_limite(descricoes, cache):
+    encontrar_descricoes_similares(descricoes, LIMITE_SIMILARIDADE, cache=cache)
+    assert encontrar_descricoes_similares(descricoes, 80, cache=cache) == \
+        similares_por_forca_bruta(descricoes, 80)